@@ -0,0 +1,108 @@
+"""流程回放基准 — 在模拟后端 + 虚拟时钟下反复执行 combo，测量引擎开销
+
+用法:
+    python -m benchmarks.flow_replay                      # 内置示例流程
+    python -m benchmarks.flow_replay config.yaml -n 5000  # 回放配置中的所有 combo 动作
+    python -m benchmarks.flow_replay --optimize           # 启用全部流程优化项
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.actions import ActionExecutor  # noqa: E402
+from src.core.combo_executor import ComboExecutor  # noqa: E402
+from src.core.combo_runs import FlowRun, RUN_COMPLETED  # noqa: E402
+from src.utils.platform_backend import SimulatedBackend, set_backend  # noqa: E402
+
+SAMPLE_FLOW = {
+    'id': 'bench_sample',
+    'type': 'combo',
+    'label': 'sample',
+    'delay': 50,
+    'steps': [
+        {'type': 'set_var', 'name': 'name', 'value': 'FlowKit'},
+        {'type': 'set_clipboard', 'value': 'hello {{name}}'},
+        {'type': 'get_clipboard', 'var': 'clip'},
+        {'type': 'wait_window', 'title': 'notepad', 'timeout': 1000},
+        {'type': 'loop', 'count': 5, 'body_steps': [
+            {'type': 'mouse_click', 'x': '{{_loop_index}}', 'y': 100},
+            {'type': 'type_text', 'text': '{{clip}} #{{_loop_index}}', 'char_delay': 0},
+            {'type': 'delay', 'ms': 200},
+        ]},
+        {'type': 'if_condition',
+         'condition': {'source': 'window_title', 'op': 'contains', 'value': 'notepad'},
+         'then_steps': [{'type': 'keys', 'target': 'ctrl+s'}],
+         'else_steps': [{'type': 'toast', 'message': 'no window', 'duration': 500}]},
+    ],
+}
+
+
+def load_flows(path: str) -> list[dict]:
+    """读取配置文件中的所有 combo 动作"""
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        raw = yaml.safe_load(f) or {}
+    flows = []
+    for page in raw.get('launcher', {}).get('pages', []):
+        for action in page.get('actions', []):
+            if action.get('type') == 'combo' and action.get('steps'):
+                flows.append(action)
+    return flows
+
+
+def replay(executor: ActionExecutor, flow: dict, iterations: int) -> dict:
+    """同步回放 iterations 次，返回耗时统计"""
+    steps = 0
+    failed = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        run = FlowRun(flow)
+        ComboExecutor(executor).execute(flow, run)
+        steps += run.steps_executed
+        failed += run.status != RUN_COMPLETED
+    elapsed = time.perf_counter() - started
+    return {
+        'runs_per_sec': iterations / elapsed if elapsed else 0,
+        'us_per_step': elapsed / steps * 1e6 if steps else 0,
+        'steps': steps,
+        'failed': failed,
+        'elapsed': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay combo flows on the simulated backend')
+    parser.add_argument('config', nargs='?', help='config.yaml 路径，省略时使用内置示例流程')
+    parser.add_argument('-n', '--iterations', type=int, default=2000)
+    parser.add_argument('--optimize', action='store_true', help='启用流程优化（optimize: true）')
+    args = parser.parse_args()
+
+    backend = SimulatedBackend()
+    backend.open_window('Untitled - Notepad', 'notepad.exe')
+    set_backend(backend)
+
+    flows = load_flows(args.config) if args.config else [SAMPLE_FLOW]
+    if not flows:
+        print('no combo actions found')
+        return
+    if args.optimize:
+        flows = [{**flow, 'optimize': True} for flow in flows]
+
+    executor = ActionExecutor()
+    print(f"{'flow':<24}{'runs/s':>12}{'us/step':>12}{'steps':>10}{'failed':>8}")
+    for flow in flows:
+        # 预热：编译并缓存计划
+        replay(executor, flow, 1)
+        result = replay(executor, flow, args.iterations)
+        name = (flow.get('label') or flow.get('id') or '?')[:22]
+        print(f"{name:<24}{result['runs_per_sec']:>12.0f}{result['us_per_step']:>12.1f}"
+              f"{result['steps']:>10}{result['failed']:>8}")
+    print(f"virtual time: {backend.clock.monotonic():.1f}s, inputs logged: {backend.input_count}")
+
+
+if __name__ == '__main__':
+    main()
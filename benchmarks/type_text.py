@@ -0,0 +1,112 @@
+"""type_text 输入基准 — 比较逐字符与分块批量 SendInput 的吞吐
+
+使用记录型 Win32 后端：INPUT 数组照常构造，SendInput 调用被替换为解码并记录事件，
+可选地为每次调用加上固定开销以模拟系统调用与输入队列的往返成本。
+
+用法:
+    python -m benchmarks.type_text                   # 5000 字符，块大小 1/16/64/256/1024
+    python -m benchmarks.type_text -c 8000 --call-us 20
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.actions import ActionExecutor  # noqa: E402
+from src.core.combo_executor import ComboExecutor  # noqa: E402
+from src.core.combo_runs import FlowRun, RUN_COMPLETED  # noqa: E402
+from src.utils.keyboard import KEYEVENTF_KEYUP  # noqa: E402
+from src.utils.platform_backend import (  # noqa: E402
+    VirtualClock, Win32Backend, set_backend, text_key_events,
+)
+
+# 含换行、CRLF 和 BMP 之外字符（代理对）的样本
+SAMPLE = 'FlowKit 批量输入 → ok\r\nline two\t😀 end\n'
+
+
+class RecordingBackend(Win32Backend):
+    """记录 SendInput 调用的 Win32 后端
+
+    Args:
+        call_us: 每次 SendInput 模拟的固定开销（微秒）
+    """
+
+    clock = VirtualClock()
+
+    def __init__(self, call_us: float = 0.0):
+        super().__init__()
+        self.call_us = call_us
+        self.calls = 0
+        self.events: list[tuple[int, int, int]] = []
+
+    def _send_input(self, arr, n: int) -> int:
+        self.calls += 1
+        for i in range(n):
+            ki = arr[i]._input.ki
+            self.events.append((ki.wVk, ki.wScan, ki.dwFlags))
+        if self.call_us:
+            deadline = time.perf_counter() + self.call_us / 1e6
+            while time.perf_counter() < deadline:
+                pass
+        return n
+
+    def reset(self):
+        self.calls = 0
+        self.events.clear()
+
+
+def expected_events(text: str) -> list[tuple[int, int]]:
+    """按键按下事件序列（用于校验批量路径输出与逐字符路径一致）"""
+    return text_key_events(text.replace('\r\n', '\n'))
+
+
+def measure(executor: ActionExecutor, backend: RecordingBackend, text: str,
+            chunk: int) -> dict:
+    flow = {'type': 'combo', 'steps': [
+        {'type': 'type_text', 'text': text, 'char_delay': 0, 'chunk_size': chunk},
+    ]}
+    backend.reset()
+    run = FlowRun(flow)
+    started = time.perf_counter()
+    ComboExecutor(executor).execute(flow, run)
+    elapsed = time.perf_counter() - started
+    downs = [(vk, scan) for vk, scan, flags in backend.events if not flags & KEYEVENTF_KEYUP]
+    return {
+        'chars_per_sec': len(text) / elapsed if elapsed else 0,
+        'calls': backend.calls,
+        'events': len(backend.events),
+        'ok': run.status == RUN_COMPLETED and downs == expected_events(text),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched type_text input')
+    parser.add_argument('-c', '--chars', type=int, default=5000)
+    parser.add_argument('--chunks', default='1,16,64,256,1024',
+                        help='逗号分隔的块大小，1 等同于逐字符提交')
+    parser.add_argument('--call-us', type=float, default=0.0,
+                        help='每次 SendInput 模拟的固定开销（微秒）')
+    args = parser.parse_args()
+
+    text = (SAMPLE * (args.chars // len(SAMPLE) + 1))[:args.chars]
+    backend = RecordingBackend(args.call_us)
+    set_backend(backend)
+    executor = ActionExecutor()
+
+    print(f"{args.chars} chars, call overhead {args.call_us:g} us")
+    print(f"{'chunk':>8}{'chars/s':>14}{'calls':>10}{'events':>10}{'speedup':>10}  ok")
+    baseline = None
+    for chunk in (int(c) for c in args.chunks.split(',')):
+        measure(executor, backend, text, chunk)  # 预热
+        result = measure(executor, backend, text, chunk)
+        baseline = baseline or result['chars_per_sec']
+        print(f"{chunk:>8}{result['chars_per_sec']:>14.0f}{result['calls']:>10}"
+              f"{result['events']:>10}{result['chars_per_sec'] / baseline:>9.1f}x  "
+              f"{'yes' if result['ok'] else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Web API 负载基准 — 比较 thread（ThreadingHTTPServer）与 async（asyncio HTTP/1.1）服务
+
+每个客户端线程使用一个 http.client 连接反复请求同一端点：
+async 模式下连接保持复用，thread 模式下服务端每个请求后关闭连接，客户端自动重连。
+
+用法:
+    python -m benchmarks.web_load                        # 8 个客户端，各 500 次 GET /api/v1/health
+    python -m benchmarks.web_load -c 32 -n 200 --path /api/v1/flows/step-types
+"""
+
+import argparse
+import http.client
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.web.async_server import AsyncWebServer  # noqa: E402
+from src.web.server import WebServer  # noqa: E402
+
+
+class StubApp:
+    """只提供路由用到的最少属性"""
+    config: dict = {}
+    tokens: list = []
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def client(port: int, path: str, count: int, latencies: list, errors: list):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def run(mode: str, clients: int, count: int, path: str, workers: int) -> dict:
+    port = free_port()
+    if mode == 'async':
+        server = AsyncWebServer(StubApp(), port=port, workers=workers)
+    else:
+        server = WebServer(StubApp(), port=port)
+    server.start()
+    latencies: list[float] = []
+    errors: list = []
+    # 预热
+    client(port, path, 10, [], [])
+    threads = [threading.Thread(target=client, args=(port, path, count, latencies, errors))
+               for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stats = server.stats()
+    server.stop()
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+
+    return {
+        'req_per_sec': len(latencies) / elapsed if elapsed else 0,
+        'p50_ms': pct(0.50),
+        'p99_ms': pct(0.99),
+        'errors': len(errors),
+        'connections': stats['connections_total'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare thread and asyncio web server modes')
+    parser.add_argument('-c', '--clients', type=int, default=8)
+    parser.add_argument('-n', '--requests', type=int, default=500, help='每个客户端的请求数')
+    parser.add_argument('--path', default='/api/v1/health')
+    parser.add_argument('--workers', type=int, default=8, help='async 模式的处理线程数')
+    parser.add_argument('--mode', choices=('thread', 'async', 'both'), default='both')
+    args = parser.parse_args()
+
+    modes = ('thread', 'async') if args.mode == 'both' else (args.mode,)
+    print(f"{'mode':<10}{'req/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'conns':>8}")
+    for mode in modes:
+        result = run(mode, args.clients, args.requests, args.path, args.workers)
+        print(f"{mode:<10}{result['req_per_sec']:>12.0f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['errors']:>8}{result['connections']:>8}")
+
+
+if __name__ == '__main__':
+    main()
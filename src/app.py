@@ -1,10 +1,15 @@
 """主应用程序"""
 
+import time
 import warnings
 from pathlib import Path
 
 from .core.scheduler import Scheduler
 from .core.actions import ActionExecutor
+from .core.exec_pool import ExecutionPool, PRIORITY_HOTKEY
+from .core.combo_async import FlowEventLoop
+from .core.context import ContextPageWatcher
+from .core.foreground import ForegroundMonitor
 from .core.platform_api import PlatformAPIServer
 from .core.tray import SystemTray
 from .core.stats import ActionStats
@@ -12,7 +17,7 @@ from .core.selection import SelectionWatcher
 from .core.store import ActionStore
 from .themes.dark import DARK
 from .themes.light import LIGHT
-from .utils.http import HttpClient
+from .utils.http import FlowHttpSession, HttpClient
 from .utils.logger import setup_logger, get_logger
 from .utils.config import ConfigManager
 
@@ -62,6 +67,43 @@ class App:
         # action executor
         self.executor = ActionExecutor(root=None, theme=self.theme)
         self.executor.set_feedback_callback(self._show_toast)
+        exec_cfg = self._app_config.execution
+        self.executor.set_pool(ExecutionPool(
+            workers=exec_cfg.workers,
+            max_queue=exec_cfg.max_queue,
+            max_inflight_per_action=exec_cfg.max_inflight_per_action,
+        ))
+        self.executor.set_event_loop(FlowEventLoop(
+            io_workers=exec_cfg.async_io_workers,
+            max_runs=exec_cfg.max_async_runs,
+            max_inflight_per_action=exec_cfg.max_inflight_per_action,
+        ))
+        self.executor.flow_runtime = exec_cfg.flow_runtime
+        self.executor.trace_flows = exec_cfg.trace_flows
+        self.executor.trace_max_spans = exec_cfg.trace_max_spans
+        self.executor.type_chunk_size = exec_cfg.type_chunk_size
+        self.executor.playback_speed = exec_cfg.playback_speed
+        self.executor.high_resolution_timer = exec_cfg.high_resolution_timer
+        self.executor.condition_snapshot_ms = exec_cfg.condition_snapshot_ms
+        self.executor.max_call_depth = exec_cfg.max_call_depth
+        self.executor.flows.set_pages(lambda: self.config.get('launcher', {}).get('pages', []))
+        self.executor.set_http_session(FlowHttpSession(
+            per_host=exec_cfg.http_pool_per_host,
+            cache_entries=exec_cfg.http_cache_entries,
+        ))
+
+        # foreground window events (wait_window / context pages)
+        self.foreground = ForegroundMonitor()
+        self.context_page = None
+        self._context_watcher = None
+        if self.foreground.start():
+            self.executor.set_foreground(self.foreground)
+            self._context_watcher = ContextPageWatcher(
+                self.foreground,
+                lambda: self.config.get('launcher', {}).get('pages', []),
+                self._on_context_page,
+            )
+            self._context_watcher.start()
 
         # usage stats
         self.stats = ActionStats()
@@ -79,13 +121,26 @@ class App:
         # web UI server
         self._web_server = None
         if self._app_config.web.enabled:
-            from .web.server import WebServer
-            self._web_port = self._app_config.web.port
-            self._web_server = WebServer(
-                self,
-                port=self._web_port,
-                allowed_origins=self._app_config.web.allowed_origins
-            )
+            web = self._app_config.web
+            self._web_port = web.port
+            if web.server == 'async':
+                from .web.async_server import AsyncWebServer
+                self._web_server = AsyncWebServer(
+                    self,
+                    port=self._web_port,
+                    allowed_origins=web.allowed_origins,
+                    workers=web.handler_workers,
+                    keepalive_timeout=web.keepalive_timeout,
+                    ws_interval_ms=web.ws_interval_ms,
+                )
+            else:
+                from .web.server import WebServer
+                self._web_server = WebServer(
+                    self,
+                    port=self._web_port,
+                    allowed_origins=web.allowed_origins,
+                    ws_interval_ms=web.ws_interval_ms,
+                )
             self._web_server.start()
 
         self.scheduler = Scheduler()
@@ -115,6 +170,7 @@ class App:
             # 同步字典版本
             self.config = self._config_to_dict()
             app_logger.info("Config saved")
+            self._publish_event('config', 'saved', {'saved_at': time.time()})
         else:
             app_logger.error("Failed to save config")
 
@@ -141,6 +197,19 @@ class App:
         # 通过日志输出
         print(f"[Toast] {msg}")
 
+    # ── context ──
+
+    def _on_context_page(self, page: int, process: str):
+        """前台进程匹配到上下文页：设为启动器当前页，并通知 Web UI 切换显示
+
+        在前台钩子线程调用；启动器界面在 Web UI 中，由 context 主题推送驱动重新加载。
+        """
+        self.context_page = page
+        self._app_config.launcher.current_page = page
+        self.config.setdefault('launcher', {})['current_page'] = page
+        app_logger.info(f"Context page switched to {page} ({process})")
+        self._publish_event('context', 'page', {'page': page, 'process': process})
+
     # ── scheduler ──
 
     def _setup_scheduler(self):
@@ -151,6 +220,16 @@ class App:
         data = card.fetch_data()
         if data:
             card.update(data)
+            if getattr(card, 'http', None) is self.http:
+                # 卡片使用第一个 token 的客户端，结果与 /tokens/0/stats 同形推送
+                from .web.events import token_event
+                self._publish_event('tokens', *token_event(0, 'stats', data))
+
+    def _publish_event(self, topic: str, key, data):
+        """推送给 Web UI 的 WebSocket 订阅者（Web 服务未启用时忽略）"""
+        server = getattr(self, '_web_server', None)
+        if server is not None:
+            server.events.publish(topic, key, data)
 
     # ── hotkey integration ──
 
@@ -219,6 +298,12 @@ class App:
 
         # 定义清理任务列表
         cleanup_tasks = [
+            ('flow runs', lambda: self.executor.runs.cancel_all()),
+            ('execution pool', lambda: self.executor.pool.shutdown()),
+            ('flow event loop', lambda: self.executor.event_loop.shutdown()),
+            ('flow http session', lambda: self.executor.http_session.close()),
+            ('context watcher', lambda: self._context_watcher.stop() if self._context_watcher else None),
+            ('foreground monitor', lambda: self.foreground.stop()),
             ('hotkey manager', lambda: self._stop_hotkey()),
             ('system tray', lambda: self._tray.stop()),
             ('selection watcher', lambda: self._selection_watcher.stop() if self._selection_watcher else None),
@@ -277,7 +362,7 @@ class App:
                     hk = action['hotkey']
                     act = action
                     hid = self._hotkey_mgr.register_hotkey(
-                        hk, lambda a=act: self.executor.execute(a))
+                        hk, lambda a=act: self.executor.execute(a, PRIORITY_HOTKEY))
                     if hid:
                         self._action_hotkey_ids.append(hid)
 
@@ -37,11 +37,18 @@ class StepType(str, Enum):
     # 窗口操作
     WAIT_WINDOW = 'wait_window'
     WAIT_PIXEL = 'wait_pixel'
+    WAIT_REGION = 'wait_region'
+    FIND_IMAGE = 'find_image'
     WINDOW_ACTIVATE = 'window_activate'
 
     # 流程控制
     IF_CONDITION = 'if_condition'
     LOOP = 'loop'
+    PARALLEL = 'parallel'
+    PARALLEL_FOR_EACH = 'parallel_for_each'
+    CALL_FLOW = 'call_flow'
+    FOR_EACH_LINE = 'for_each_line'
+    FOR_EACH_CHUNK = 'for_each_chunk'
 
     # 高级操作
     TYPE_TEXT = 'type_text'
@@ -50,6 +57,8 @@ class StepType(str, Enum):
     HTTP_REQUEST = 'http_request'
     FILE_READ = 'file_read'
     FILE_WRITE = 'file_write'
+    JSON_EXTRACT = 'json_extract'
+    REGEX_EXTRACT = 'regex_extract'
 
     # 原有动作类型（委托）
     APP = 'app'
@@ -6,10 +6,16 @@ import ctypes
 import ctypes.wintypes
 import subprocess
 import webbrowser
-import threading
 from ..utils.logger import get_logger
 from ..utils.clipboard import set_text as clipboard_set_text
 from ..utils.keyboard import parse_keys, send_keys
+from .combo_library import DEFAULT_MAX_DEPTH, FlowLibrary
+from .combo_plan import PlanCache
+from .combo_async import FlowEventLoop, RUNTIME_ASYNC, RUNTIME_THREAD
+from .combo_runs import FlowRun, RunRegistry
+from .combo_timing import clamp_speed
+from .combo_trace import FlowTracer
+from .exec_pool import ExecutionPool, QueueFullError, PRIORITY_INTERACTIVE
 
 logger = get_logger('executor')
 
@@ -24,6 +30,22 @@ class ActionExecutor:
         self._api_server = None
         self._script_runner = None
         self._stats = None
+        self._plan_cache = PlanCache()  # combo 编译计划缓存
+        self.flows = FlowLibrary()  # call_flow 子流程库（app 设置页面来源）
+        self.max_call_depth = DEFAULT_MAX_DEPTH  # call_flow 嵌套深度上限
+        self.runs = RunRegistry()  # combo 运行注册表
+        self._pool = ExecutionPool()  # 动作执行池（首次提交时启动线程）
+        self._event_loop = FlowEventLoop()  # 异步模式 combo 的事件循环（首次提交时启动）
+        self.flow_runtime = RUNTIME_THREAD  # combo 默认运行时，动作可用 runtime 字段覆盖
+        self._foreground = None  # 前台窗口事件源（ForegroundMonitor）
+        self._capture = None  # 截图后端（None 使用 GDI）
+        self._http = None  # http_request 步骤的连接池会话（None 使用进程级共享会话）
+        self.trace_flows = False  # 默认是否追踪 combo 步骤，动作可用 trace 字段覆盖
+        self.trace_max_spans = 2000
+        self.type_chunk_size = 256  # type_text 批量输入块大小，步骤可用 chunk_size 覆盖
+        self.playback_speed = 1.0  # combo 默认回放倍速，动作可用 speed 字段覆盖
+        self.high_resolution_timer = False  # combo 运行期间提高系统计时器精度
+        self.condition_snapshot_ms = 0  # 条件来源读取的复用窗口，0 表示每次求值重新读取
 
     def set_feedback_callback(self, cb):
         self._on_feedback = cb
@@ -32,6 +54,51 @@ class ActionExecutor:
         """注入统计实例"""
         self._stats = stats
 
+    def set_pool(self, pool: ExecutionPool):
+        """注入执行池（替换默认配置）"""
+        old, self._pool = self._pool, pool
+        if old:
+            old.shutdown()
+
+    @property
+    def pool(self) -> ExecutionPool:
+        return self._pool
+
+    def set_event_loop(self, event_loop: FlowEventLoop):
+        """注入异步流程事件循环（替换默认配置）"""
+        old, self._event_loop = self._event_loop, event_loop
+        if old:
+            old.shutdown()
+
+    @property
+    def event_loop(self) -> FlowEventLoop:
+        return self._event_loop
+
+    def set_foreground(self, monitor):
+        """注入前台窗口事件源，wait_window 等步骤改为事件驱动"""
+        self._foreground = monitor
+
+    @property
+    def foreground(self):
+        return self._foreground
+
+    def set_capture(self, capture):
+        """注入截图后端（如 SyntheticCapture），供 wait_region/find_image 使用"""
+        self._capture = capture
+
+    def set_http_session(self, session):
+        """注入 http_request 步骤使用的 FlowHttpSession"""
+        self._http = session
+
+    @property
+    def http_session(self):
+        return self._http
+
+    def invalidate_plan(self, action_id: str = None):
+        """动作被编辑后使其编译计划失效，None 表示全部失效"""
+        self._plan_cache.invalidate(action_id)
+        self.flows.invalidate(action_id)
+
     def set_api_server(self, server):
         """注入平台 API 服务实例"""
         self._api_server = server
@@ -39,16 +106,32 @@ class ActionExecutor:
             from .script_runner import ScriptRunner
             self._script_runner = ScriptRunner(api_port=server.port)
 
-    def execute(self, action: dict):
-        """按 type 分发执行"""
+    def execute(self, action: dict, priority: int = PRIORITY_INTERACTIVE) -> FlowRun | None:
+        """按 type 分发执行，队列已满时提示并丢弃
+
+        Returns:
+            combo 动作返回登记的 FlowRun，其余类型或被拒绝时返回 None
+        """
+        try:
+            return self.submit(action, priority)
+        except QueueFullError as e:
+            logger.warning(f"Action rejected: {e}")
+            self._feedback("执行队列已满!")
+            return None
+
+    def submit(self, action: dict, priority: int = PRIORITY_INTERACTIVE) -> FlowRun | None:
+        """提交动作到执行池
+
+        Returns:
+            combo 动作返回登记的 FlowRun，其余类型返回 None
+
+        Raises:
+            QueueFullError: 队列已满或该动作并发已达上限
+        """
         if not action:
             logger.warning("Empty action, skipping")
-            return
-        # 记录统计
-        if self._stats and action.get('id'):
-            self._stats.record(action['id'])
+            return None
         t = action.get('type', '')
-        logger.info(f"Executing action: {action.get('label', 'unnamed')} (type={t})")
         handler = {
             'app': self._exec_app,
             'file': self._exec_file,
@@ -60,10 +143,33 @@ class ActionExecutor:
             'combo': self._exec_combo,
             'script': self._exec_script,
         }.get(t)
-        if handler:
-            threading.Thread(target=handler, args=(action,), daemon=True).start()
-        else:
+        if not handler:
             logger.warning(f"Unknown action type: {t}")
+            return None
+        run = FlowRun(action) if t == 'combo' else None
+        if run and action.get('trace', self.trace_flows):
+            run.tracer = FlowTracer(self.trace_max_spans)
+        if run:
+            run.speed = clamp_speed(action.get('speed', self.playback_speed))
+        if run:
+            # 先登记再提交，运行一开始即可按 run_id 查询和取消
+            self.runs.register(run)
+        try:
+            if run and action.get('runtime', self.flow_runtime) == RUNTIME_ASYNC:
+                self._event_loop.submit(self._exec_combo_async, action, run,
+                                        key=action.get('id') or None)
+            else:
+                args = (action, run) if run else (action,)
+                self._pool.submit(handler, *args, priority=priority, key=action.get('id') or None)
+        except QueueFullError:
+            if run:
+                self.runs.unregister(run.run_id)
+            raise
+        # 记录统计
+        if self._stats and action.get('id'):
+            self._stats.record(action['id'])
+        logger.info(f"Queued action: {action.get('label', 'unnamed')} (type={t}, priority={priority})")
+        return run
 
     def _feedback(self, msg: str):
         if self._on_feedback:
@@ -220,11 +326,16 @@ class ActionExecutor:
             logger.error("Failed to send keys")
             self._feedback("发送失败!")
 
-    def _exec_combo(self, action: dict):
+    def _exec_combo(self, action: dict, run: FlowRun = None):
         """顺序执行组合动作（委托给 ComboExecutor）"""
         from .combo_executor import ComboExecutor
         executor = ComboExecutor(self)
-        executor.execute(action)
+        executor.execute(action, run or self.runs.create(action))
+
+    async def _exec_combo_async(self, action: dict, run: FlowRun):
+        """在事件循环中执行组合动作（异步模式）"""
+        from .combo_executor import ComboExecutor
+        await ComboExecutor(self).execute_async(action, run)
 
     def _exec_script(self, action: dict):
         """执行 Python 脚本"""
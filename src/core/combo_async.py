@@ -0,0 +1,520 @@
+"""异步流程执行 — 延时与等待挂起在单个事件循环上，阻塞步骤卸载到小线程池
+
+线程模式下每个运行中的 combo 独占一个执行池线程，大部分时间花在 sleep 上。
+异步模式把延时、步骤间隔、toast 停留和窗口/像素轮询变为协程挂起，
+Win32 输入、剪贴板、文件和网络等阻塞步骤交给 io 线程池执行，
+大量定时或等待中的流程只占用少量线程。
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
+from typing import Callable
+from ..utils.logger import get_logger
+from .combo_plan import CompiledStep
+from .exec_pool import QueueFullError
+
+logger = get_logger('combo_async')
+
+# for_each_line / for_each_chunk 每次在 io 线程中预读的行/块数
+STREAM_BATCH = 64
+
+# 运行时模式
+RUNTIME_THREAD = 'thread'
+RUNTIME_ASYNC = 'async'
+RUNTIMES = (RUNTIME_THREAD, RUNTIME_ASYNC)
+
+# 可从前台窗口事件源直接读取的条件来源
+_FOREGROUND_SOURCES = frozenset({'window_title', 'process_name'})
+
+
+class FlowEventLoop:
+    """后台线程中的共享事件循环
+
+    Args:
+        io_workers: 阻塞步骤卸载线程数
+        max_runs: 同时运行的异步流程上限，超出时拒绝提交
+        max_inflight_per_action: 同一动作同时运行的异步流程上限（与执行池的限制一致）
+    """
+
+    def __init__(self, io_workers: int = 4, max_runs: int = 256,
+                 max_inflight_per_action: int = 4):
+        self._io_workers = max(1, io_workers)
+        self._max_runs = max_runs
+        self._max_inflight = max_inflight_per_action
+        self._inflight: dict[str, int] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._io: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._shutdown = False
+        # 指标
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _ensure_started(self):
+        """首次提交时启动事件循环线程"""
+        if self._loop is not None:
+            return
+        self._io = ThreadPoolExecutor(max_workers=self._io_workers, thread_name_prefix='flow-io')
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(self._io)
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+            loop.close()
+
+        self._loop = loop
+        self._thread = threading.Thread(target=run, name='flow-event-loop', daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def submit(self, coro_fn: Callable, *args, key: str = None) -> Future:
+        """在事件循环中运行 coro_fn(*args)
+
+        Args:
+            key: 动作标识，用于限制同一动作的并发数
+
+        Returns:
+            concurrent.futures.Future，可在其他线程中等待结果
+
+        Raises:
+            QueueFullError: 异步流程数或该动作并发已达上限，或事件循环已停止
+        """
+        with self._lock:
+            if self._shutdown:
+                raise QueueFullError('flow event loop is shut down')
+            if self._active >= self._max_runs:
+                self._rejected += 1
+                raise QueueFullError('too many async flows running')
+            if key and self._inflight.get(key, 0) >= self._max_inflight:
+                self._rejected += 1
+                raise QueueFullError(f'action {key} has too many runs in flight')
+            if key:
+                self._inflight[key] = self._inflight.get(key, 0) + 1
+            self._active += 1
+            self._submitted += 1
+            self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(coro_fn(*args), self._loop)
+        future.add_done_callback(lambda f: self._on_done(f, key))
+        return future
+
+    def _on_done(self, future: Future, key: str | None):
+        failed = future.cancelled() or future.exception() is not None
+        if failed and not future.cancelled():
+            exc = future.exception()
+            logger.error(f"Async flow failed: {exc}", exc_info=exc)
+        with self._lock:
+            self._active -= 1
+            self._completed += 1
+            self._failed += failed
+            if key:
+                left = self._inflight.get(key, 1) - 1
+                if left > 0:
+                    self._inflight[key] = left
+                else:
+                    self._inflight.pop(key, None)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'started': self._loop is not None,
+                'io_workers': self._io_workers,
+                'max_runs': self._max_runs,
+                'max_inflight_per_action': self._max_inflight,
+                'active': self._active,
+                'inflight_by_action': dict(self._inflight),
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'completed': self._completed,
+                'failed': self._failed,
+            }
+
+    def shutdown(self):
+        """停止事件循环，未完成的流程随之中止（调用前应先取消所有运行）"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            loop, io = self._loop, self._io
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if io is not None:
+            io.shutdown(wait=False)
+
+
+class AsyncPlanRunner:
+    """以协程方式执行编译后的步骤
+
+    复用 ComboExecutor 的变量作用域、run 和步骤处理器：
+    延时、等待、流程控制和并行步骤原生异步执行，其余步骤卸载到 io 线程池。
+    """
+
+    def __init__(self, combo):
+        self._combo = combo
+        self._run = combo.run
+
+    async def run(self, steps: tuple[CompiledStep, ...], delay: float, block: str = ''):
+        run = self._run
+        if run.tracer is not None:
+            await self._run_traced(steps, delay, block)
+            return
+        first = True
+        for step in steps:
+            if run.interrupt.is_set() and await self._hold() is None:
+                return
+            if first:
+                first = False
+            elif not await self._delay(delay, counted=False):
+                return
+            await self._step(step, delay)
+            run.steps_executed += 1
+
+    async def _step(self, step: CompiledStep, delay: float):
+        native = ASYNC_HANDLERS.get(step.type)
+        if native is not None:
+            await native(self, step, delay)
+        else:
+            await self._offload(step.handler, self._combo, step, delay)
+
+    async def _run_traced(self, steps: tuple[CompiledStep, ...], delay: float, block: str):
+        """带追踪的步骤执行，路径与记录格式同 ComboExecutor._execute_traced"""
+        run = self._run
+        tracer = run.tracer
+        combo = self._combo
+        parent = combo._path
+        prefix = f'{parent}/{block or "-"}/' if parent else ''
+        for i, step in enumerate(steps):
+            if run.interrupt.is_set() and await self._hold() is None:
+                return
+            if i:
+                gap = time.perf_counter()
+                waited = await self._delay(delay, counted=False)
+                tracer.add_gap(time.perf_counter() - gap)
+                if not waited:
+                    return
+            path = combo._path = f'{prefix}{i}'
+            waited = combo._waited
+            error = ''
+            started = time.perf_counter()
+            try:
+                await self._step(step, delay)
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                tracer.record(path, step.type, combo._lane, started, time.perf_counter(),
+                              combo._waited - waited, combo._variables, error,
+                              step.args.get('fused', ()))
+                combo._path = parent
+            run.steps_executed += 1
+
+    async def _interruptible(self, coro):
+        """执行协程，run 被取消或暂停时立即中止并返回 False"""
+        run = self._run
+        task = asyncio.ensure_future(coro)
+        loop = asyncio.get_running_loop()
+
+        def on_change():
+            if run.interrupt.is_set() and not task.done():
+                task.cancel()
+
+        remove = run.add_listener(lambda: loop.call_soon_threadsafe(on_change))
+        on_change()
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task.cancelled() and run.interrupt.is_set():
+                return False
+            raise
+        finally:
+            remove()
+
+    @staticmethod
+    async def _offload(fn: Callable, *args):
+        """在 io 线程池中执行阻塞调用"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _sleep_until(self, deadline: float) -> float | None:
+        """挂起到 clock.now() 达到 deadline
+
+        取消或暂停通过 run 监听立即唤醒；暂停期间截止时间顺延。
+
+        Returns:
+            其间暂停的总时长（秒）；被取消返回 None
+        """
+        run = self._run
+        clock = self._combo._clock
+        paused_total = 0.0
+        if clock.virtual:
+            # 虚拟时钟：推进时间后仅让出一次事件循环
+            clock.sleep_until(deadline)
+            await asyncio.sleep(0)
+            return None if run.cancel_event.is_set() else paused_total
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        remove = run.add_listener(lambda: loop.call_soon_threadsafe(wake.set))
+        try:
+            while True:
+                if run.interrupt.is_set():
+                    paused = await self._hold(wake)
+                    if paused is None:
+                        return None
+                    deadline += paused
+                    paused_total += paused
+                    continue
+                left = deadline - clock.now()
+                if left <= 0:
+                    return paused_total
+                wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), left)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            remove()
+
+    async def _hold(self, wake: asyncio.Event = None) -> float | None:
+        """异步检查点：暂停时挂起到恢复，语义同 FlowRun.hold"""
+        run = self._run
+        if run.cancel_event.is_set():
+            return None
+        if not run.paused:
+            return 0.0
+        held_at = run.mark_held()
+        remove = None
+        if wake is None:
+            loop = asyncio.get_running_loop()
+            wake = asyncio.Event()
+            remove = run.add_listener(lambda: loop.call_soon_threadsafe(wake.set))
+        try:
+            while run.paused and not run.cancel_event.is_set():
+                wake.clear()
+                if not run.paused:
+                    break
+                await wake.wait()
+        finally:
+            if remove is not None:
+                remove()
+        if run.cancel_event.is_set():
+            return None
+        return run.resumed_after(held_at)
+
+    async def _sleep(self, seconds: float) -> float:
+        """步骤内的等待，计入等待时间
+
+        Returns:
+            其间暂停的总时长（秒）
+        """
+        if seconds <= 0:
+            return 0.0
+        clock = self._combo._clock
+        started = clock.now()
+        paused = await self._sleep_until(started + seconds)
+        self._combo._waited += clock.now() - started
+        return paused or 0.0
+
+    async def _delay(self, seconds: float, counted: bool = True) -> bool:
+        """录制的延时：与线程模式共用截止时间调度和倍速，挂起期间不自旋
+
+        Returns:
+            被取消返回 False
+        """
+        if seconds <= 0:
+            return True
+        combo = self._combo
+        clock = combo._clock
+        timer = combo._timer
+        deadline = timer.next_deadline(seconds)
+        started = clock.now()
+        paused = await self._sleep_until(deadline)
+        if paused is not None:
+            timer.shift(paused)
+            timer.settle(deadline + paused)
+        if counted:
+            combo._waited += clock.now() - started
+        return paused is not None
+
+    async def _wait_until(self, predicate: Callable[[], bool], timeout: float,
+                          interval: float = 0.1, blocking: bool = False) -> bool:
+        """轮询等待条件成立，超时或取消返回 False
+
+        Args:
+            predicate: 条件函数
+            timeout: 超时（毫秒）
+            interval: 轮询间隔（秒）
+            blocking: 条件函数是否可能阻塞，是则卸载到 io 线程池
+        """
+        clock = self._combo._clock
+        deadline = clock.monotonic() + timeout / 1000.0
+        cancel = self._run.cancel_event
+        while not cancel.is_set():
+            if await self._offload(predicate) if blocking else predicate():
+                return True
+            if clock.monotonic() >= deadline:
+                return False
+            # 暂停时长不计入超时
+            deadline += await self._sleep(interval)
+        return False
+
+    async def _condition(self, cond) -> bool:
+        """条件求值：只读变量或前台事件源状态时直接求值，其余来源卸载"""
+        if cond.sources <= _FOREGROUND_SOURCES and (
+                not cond.sources or self._combo._foreground() is not None):
+            return self._combo._eval_condition(cond)
+        return await self._offload(self._combo._eval_condition, cond)
+
+    # ── 原生异步步骤 ──
+
+    async def _exec_delay(self, step: CompiledStep, delay: float):
+        await self._delay(step.args['ms'])
+
+    async def _exec_toast(self, step: CompiledStep, delay: float):
+        await self._offload(self._combo._show_toast, step)
+        await self._sleep(step.args['duration'])
+
+    async def _exec_wait_window(self, step: CompiledStep, delay: float):
+        monitor = self._combo._foreground()
+        if monitor is not None:
+            title = self._combo._value(step.args['title'])
+            run = self._run
+            started = time.perf_counter()
+            remaining = step.args['timeout'] / 1000.0
+            while True:
+                began = time.perf_counter()
+                matched = await self._interruptible(monitor.wait_for_async(
+                    lambda e: title in e.title.lower(), remaining, run.interrupt))
+                if matched or not run.interrupt.is_set():
+                    break
+                # 暂停：停住后继续等待剩余时间
+                remaining -= time.perf_counter() - began
+                if await self._hold() is None or remaining <= 0:
+                    break
+            self._combo._waited += time.perf_counter() - started
+            return
+        await self._wait_until(self._combo._window_predicate(step), step.args['timeout'])
+
+    async def _exec_wait_pixel(self, step: CompiledStep, delay: float):
+        await self._wait_until(self._combo._pixel_predicate(step), step.args['timeout'],
+                               blocking=True)
+
+    async def _exec_wait_region(self, step: CompiledStep, delay: float):
+        predicate, result = self._combo._region_predicate(step)
+        await self._wait_until(predicate, step.args['timeout'], step.args['interval'],
+                               blocking=True)
+        self._combo._store_match(step, result[0])
+
+    async def _exec_if_condition(self, step: CompiledStep, delay: float):
+        then_steps, else_steps = step.blocks
+        if await self._condition(step.args['condition']):
+            await self.run(then_steps, delay, 'then')
+        else:
+            await self.run(else_steps, delay, 'else')
+
+    async def _exec_loop(self, step: CompiledStep, delay: float):
+        combo = self._combo
+        args = step.args
+        mode = args['mode']
+        max_iter = args['max_iterations']
+        body = step.blocks[0]
+        cancel = self._run.cancel_event
+
+        if mode == 'count':
+            count = combo._value(args['count'])
+            for i in range(min(count, max_iter)):
+                if cancel.is_set():
+                    return
+                combo._variables['_loop_index'] = i
+                await self.run(body, delay, f'#{i}')
+        elif mode == 'while_condition':
+            condition = args['condition']
+            iterations = 0
+            while not cancel.is_set() and iterations < max_iter:
+                if not await self._condition(condition):
+                    break
+                combo._variables['_loop_index'] = iterations
+                await self.run(body, delay, f'#{iterations}')
+                iterations += 1
+
+    async def _exec_for_each_stream(self, step: CompiledStep, delay: float):
+        """流式遍历文件：文件读取按批卸载到 io 线程池，循环体在事件循环中执行"""
+        combo = self._combo
+        items = await self._offload(combo._open_stream, step)
+        if items is None:
+            return
+        args = step.args
+        item_var = args['item_var']
+        max_iter = args['max_iterations']
+        body = step.blocks[0]
+        cancel = self._run.cancel_event
+        i = 0
+        with closing(items):
+            while batch := await self._offload(lambda: list(islice(items, STREAM_BATCH))):
+                for item in batch:
+                    if cancel.is_set() or 0 < max_iter <= i:
+                        return
+                    combo._variables[item_var] = item
+                    combo._variables['_loop_index'] = i
+                    await self.run(body, delay, f'#{i}')
+                    i += 1
+
+    async def _exec_call_flow(self, step: CompiledStep, delay: float):
+        child, plan, label = self._combo._callee(step)
+        await AsyncPlanRunner(child).run(plan.steps, plan.delay, label)
+        self._combo._collect_returns(step, child)
+
+    async def _exec_parallel(self, step: CompiledStep, delay: float):
+        await self._run_branches(self._combo._branch_jobs(step), step.args['concurrency'], delay)
+
+    async def _exec_parallel_for_each(self, step: CompiledStep, delay: float):
+        await self._run_branches(self._combo._branch_jobs(step), step.args['concurrency'], delay)
+
+    async def _run_branches(self, jobs: list[tuple[tuple, dict | None, str]], concurrency: int,
+                            delay: float):
+        """并发执行分支协程，语义与线程模式的 _run_branches 一致"""
+        if not jobs:
+            return
+        limit = asyncio.Semaphore(len(jobs) if concurrency <= 0 else concurrency)
+
+        async def branch(steps: tuple, extra: dict | None, label: str) -> dict:
+            async with limit:
+                child = self._combo._fork(extra)
+                await AsyncPlanRunner(child).run(steps, delay, label)
+                return self._combo._changes(child)
+
+        results = await asyncio.gather(*(branch(*job) for job in jobs),
+                                       return_exceptions=True)
+        error = None
+        for result in results:
+            if isinstance(result, BaseException):
+                error = error or result
+                continue
+            self._combo._variables.update(result)
+        if error is not None:
+            raise error
+
+
+# 原生异步执行的步骤类型，其余步骤卸载到 io 线程池
+ASYNC_HANDLERS: dict[str, Callable] = {
+    'delay': AsyncPlanRunner._exec_delay,
+    'toast': AsyncPlanRunner._exec_toast,
+    'wait_window': AsyncPlanRunner._exec_wait_window,
+    'wait_pixel': AsyncPlanRunner._exec_wait_pixel,
+    'wait_region': AsyncPlanRunner._exec_wait_region,
+    'if_condition': AsyncPlanRunner._exec_if_condition,
+    'loop': AsyncPlanRunner._exec_loop,
+    'call_flow': AsyncPlanRunner._exec_call_flow,
+    'for_each_line': AsyncPlanRunner._exec_for_each_stream,
+    'for_each_chunk': AsyncPlanRunner._exec_for_each_stream,
+    'parallel': AsyncPlanRunner._exec_parallel,
+    'parallel_for_each': AsyncPlanRunner._exec_parallel_for_each,
+}
@@ -1,312 +1,801 @@
 """增强组合执行引擎 — 支持流程控制、变量系统、条件分支、循环"""
 
-import re
+import json
+import threading
 import time
-import ctypes
-import ctypes.wintypes
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable
 from ..utils.logger import get_logger
 from ..utils.clipboard import get_text as clipboard_get_text, set_text as clipboard_set_text
-from ..utils.keyboard import (
-    INPUT, KEYBDINPUT, INPUT_KEYBOARD, KEYEVENTF_UNICODE, KEYEVENTF_KEYUP
+from ..utils.keyboard import parse_keys
+from ..utils.platform_backend import (
+    DEFAULT_INPUT_CHUNK, INPUT_BUTTON, INPUT_KEY, INPUT_MOVE, INPUT_WHEEL, get_backend,
 )
+from .combo_expr import Condition, SourceSnapshot
+from .combo_extract import compile_json_path, compile_regex, documents, regex_result
+from .combo_library import DEFAULT_MAX_DEPTH
+from .combo_files import AppendHandles, iter_chunks, iter_lines
+from .combo_plan import ComboPlan, CompiledStep, PlanCompiler
+from .combo_template import Template
+from .combo_runs import FlowRun, RUN_CANCELLED, RUN_COMPLETED, RUN_FAILED
+from .combo_timing import FlowTimer, timer_resolution
+from .combo_values import coerce, to_text
+from .screen_match import CaptureBackend, default_capture, load_pattern
 
 logger = get_logger('combo_executor')
 
+_MISSING = object()
+
+# 可中断的阻塞调用（HTTP 等）所用的共享线程池，首次使用时创建
+_IO_POOL: ThreadPoolExecutor | None = None
+_IO_POOL_LOCK = threading.Lock()
+
+
+def _io_pool() -> ThreadPoolExecutor:
+    global _IO_POOL
+    with _IO_POOL_LOCK:
+        if _IO_POOL is None:
+            _IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='combo-io')
+        return _IO_POOL
+
+# type_text 字符间隔不超过该值（秒）时改为分块批量输入
+_BATCH_CHAR_DELAY = 0.005
+
 
 class ComboExecutor:
-    """执行增强型 combo 步骤列表，支持变量、条件、循环等流程控制"""
+    """执行增强型 combo 步骤列表，支持变量、条件、循环等流程控制
+
+    步骤先由 PlanCompiler 编译为不可变的 ComboPlan，执行期只调用预绑定的处理器。
+    """
+
+    _compiler: PlanCompiler | None = None
 
     def __init__(self, action_executor):
         self._executor = action_executor
-        self._variables: dict[str, str] = {}
-        self._stop_flag = False
+        self._run: FlowRun | None = None
+        self._variables: dict[str, Any] = {}  # 原生类型的变量值，渲染时才转为文本
+        self._waited = 0.0  # 步骤内累计等待时间（秒），供追踪区分等待与工作
+        self._path = ''  # 追踪时当前步骤的路径
+        self._lane = 0  # 追踪泳道，并行分支各自独立
+        self._backend = get_backend()  # 平台后端（输入、窗口、时钟）
+        self._clock = self._backend.clock
+        self._timer: FlowTimer | None = None  # 录制间隔的截止时间调度，_begin 时创建
+        self._high_resolution = False  # 是否持有系统计时器精度
+        self._snapshot: SourceSnapshot | None = None  # 条件来源快照，首次求值时创建
+        self._call_depth = 0  # call_flow 嵌套深度
+
+    @property
+    def _stop_flag(self) -> bool:
+        run = self._run
+        return run is not None and run.cancel_event.is_set()
+
+    @property
+    def run(self) -> FlowRun | None:
+        return self._run
 
     def stop(self):
-        self._stop_flag = True
+        if self._run:
+            self._run.cancel()
+
+    @classmethod
+    def compiler(cls) -> PlanCompiler:
+        """获取共享的计划编译器（首次调用时构建处理器表）"""
+        if cls._compiler is None:
+            from .actions import ActionExecutor
+            handlers = {stype: getattr(cls, name) for stype, name in STEP_HANDLERS.items()}
+            legacy = {stype: getattr(ActionExecutor, name) for stype, name in LEGACY_HANDLERS.items()}
+            cls._compiler = PlanCompiler(handlers, cls._exec_legacy, legacy)
+        return cls._compiler
+
+    def compile(self, action: dict) -> ComboPlan:
+        """编译动作，优先使用 ActionExecutor 上的计划缓存"""
+        cache = getattr(self._executor, '_plan_cache', None)
+        if cache is not None:
+            return cache.get(action, self.compiler())
+        return self.compiler().compile(action)
+
+    def execute(self, action: dict, run: FlowRun = None):
+        """执行 combo 动作
+
+        Args:
+            action: combo 动作
+            run: 由 RunRegistry 登记的运行，None 时创建未登记的运行
+        """
+        run = self._begin(action, run)
+        if run is None:
+            return
+        try:
+            plan = self.compile(action)
+            run.optimization = plan.optimization
+            self._execute_steps(plan.steps, plan.delay)
+        except Exception as e:
+            self._fail(e)
+            return
+        self._finish()
+
+    async def execute_async(self, action: dict, run: FlowRun = None):
+        """在事件循环中执行 combo 动作（异步模式），语义与 execute 一致"""
+        from .combo_async import AsyncPlanRunner
+        run = self._begin(action, run)
+        if run is None:
+            return
+        try:
+            plan = self.compile(action)
+            run.optimization = plan.optimization
+            await AsyncPlanRunner(self).run(plan.steps, plan.delay)
+        except Exception as e:
+            self._fail(e)
+            return
+        self._finish()
+
+    def _begin(self, action: dict, run: FlowRun | None) -> FlowRun | None:
+        """绑定并启动运行，执行前已被取消时返回 None"""
+        run = run or FlowRun(action)
+        self._run = run
+        self._variables = run.variables
+        if run.cancelled:
+            run.finish(RUN_CANCELLED)
+            return None
+        self._timer = run.timer = FlowTimer(self._clock, run.speed)
+        run.files = AppendHandles()
+        if getattr(self._executor, 'high_resolution_timer', False):
+            self._high_resolution = timer_resolution.acquire(self._backend)
+        run.start()
+        return run
+
+    def _release(self):
+        if self._run.files is not None:
+            self._run.files.close()
+        if self._high_resolution:
+            self._high_resolution = False
+            timer_resolution.release()
+
+    def _fail(self, error: Exception):
+        run = self._run
+        self._release()
+        logger.error(f"Run {run.run_id} failed: {error}", exc_info=True)
+        run.finish(RUN_FAILED, str(error))
+
+    def _finish(self):
+        run = self._run
+        self._release()
+        run.finish(RUN_CANCELLED if run.cancelled else RUN_COMPLETED)
+        logger.info(f"Run {run.run_id} {run.status} ({run.steps_executed} steps)")
 
-    def execute(self, action: dict):
-        """执行 combo 动作"""
-        self._variables.clear()
-        self._stop_flag = False
-        steps = action.get('steps', [])
-        delay = action.get('delay', 500) / 1000.0
-        self._execute_steps(steps, delay)
+    def _execute_steps(self, steps: tuple[CompiledStep, ...], delay: float, block: str = ''):
+        """顺序执行步骤
 
-    def _execute_steps(self, steps: list, delay: float):
+        Args:
+            block: 嵌套块标签（then/else/#循环序号/分支名），仅用于追踪路径
+        """
+        run = self._run
+        if run.tracer is not None:
+            self._execute_traced(steps, delay, block)
+            return
+        first = True
+        for step in steps:
+            if run.interrupt.is_set() and run.hold() is None:
+                return
+            if first:
+                first = False
+            elif not self._timer.wait(delay, run):
+                return
+            step.handler(self, step, delay)
+            run.steps_executed += 1
+
+    def _execute_traced(self, steps: tuple[CompiledStep, ...], delay: float, block: str):
+        """带追踪的步骤执行，逐步记录路径、耗时与等待时间"""
+        run = self._run
+        tracer = run.tracer
+        parent = self._path
+        prefix = f'{parent}/{block or "-"}/' if parent else ''
         for i, step in enumerate(steps):
-            if self._stop_flag:
+            if run.interrupt.is_set() and run.hold() is None:
                 return
-            if i > 0:
-                time.sleep(delay)
-            self._execute_one(step, delay)
+            if i:
+                gap = time.perf_counter()
+                waited = self._timer.wait(delay, run)
+                tracer.add_gap(time.perf_counter() - gap)
+                if not waited:
+                    return
+            path = self._path = f'{prefix}{i}'
+            waited = self._waited
+            error = ''
+            started = time.perf_counter()
+            try:
+                step.handler(self, step, delay)
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                tracer.record(path, step.type, self._lane, started, time.perf_counter(),
+                              self._waited - waited, self._variables, error,
+                              step.args.get('fused', ()))
+                self._path = parent
+            run.steps_executed += 1
 
-    def _execute_one(self, step: dict, delay: float):
-        if not step or self._stop_flag:
-            return
-        stype = step.get('type', '')
-
-        # 新增流程控制步骤
-        handler = {
-            'delay': self._exec_delay,
-            'set_var': self._exec_set_var,
-            'get_clipboard': self._exec_get_clipboard,
-            'set_clipboard': self._exec_set_clipboard,
-            'mouse_click': self._exec_mouse_click,
-            'mouse_double_click': self._exec_mouse_double_click,
-            'mouse_move': self._exec_mouse_move,
-            'mouse_scroll': self._exec_mouse_scroll,
-            'wait_window': self._exec_wait_window,
-            'wait_pixel': self._exec_wait_pixel,
-            'window_activate': self._exec_window_activate,
-            'if_condition': self._exec_if_condition,
-            'loop': self._exec_loop,
-            'type_text': self._exec_type_text,
-            'toast': self._exec_toast,
-            'screenshot': self._exec_screenshot,
-            'http_request': self._exec_http_request,
-            'file_read': self._exec_file_read,
-            'file_write': self._exec_file_write,
-        }.get(stype)
-
-        if handler:
-            handler(step, delay)
-        else:
-            # 委托给原有动作处理器
-            interpolated = self._interpolate_step(step)
-            self._exec_legacy(interpolated)
-
-    def _exec_legacy(self, step: dict):
-        """委托给 ActionExecutor 的原有处理器"""
-        t = step.get('type', '')
-        handler_map = {
-            'app': self._executor._exec_app,
-            'file': self._executor._exec_file,
-            'folder': self._executor._exec_folder,
-            'url': self._executor._exec_url,
-            'shell': self._executor._exec_shell,
-            'snippet': self._executor._exec_snippet,
-            'keys': self._executor._exec_keys,
-            'script': self._executor._exec_script,
-        }
-        handler = handler_map.get(t)
-        if handler:
-            handler(step)
-
-    # ── 变量插值 ──
-
-    def _interpolate(self, text: str) -> str:
-        if not text or '{{' not in text:
-            return text
-        return re.sub(r'\{\{(\w+)\}\}',
-                      lambda m: self._variables.get(m.group(1), m.group(0)),
-                      text)
-
-    def _interpolate_step(self, step: dict) -> dict:
-        """对步骤中所有字符串字段进行变量插值"""
-        result = {}
-        for k, v in step.items():
-            if isinstance(v, str):
-                result[k] = self._interpolate(v)
-            else:
-                result[k] = v
-        return result
+    def _sleep(self, seconds: float) -> float:
+        """步骤内的等待，计入等待时间
+
+        取消或暂停立即打断等待；暂停期间顺延，恢复后继续等待剩余时间。
+
+        Returns:
+            其间暂停的总时长（秒），供超时计算扣除
+        """
+        if seconds <= 0:
+            return 0.0
+        clock = self._clock
+        run = self._run
+        started = clock.now()
+        deadline = started + seconds
+        paused_total = 0.0
+        while not clock.sleep_until(deadline, 0.0, run.interrupt):
+            paused = run.hold()
+            if paused is None:
+                break
+            deadline += paused
+            paused_total += paused
+        self._waited += clock.now() - started
+        return paused_total
+
+    def _delay(self, seconds: float):
+        """录制的延时：按截止时间调度并按回放倍速缩放，计入等待时间"""
+        started = self._clock.now()
+        self._timer.wait(seconds, self._run)
+        self._waited += self._clock.now() - started
+
+    def _call_interruptible(self, fn: Callable, *args):
+        """在 io 线程中执行阻塞调用并等待结果，取消时立即放弃等待
+
+        暂停不打断进行中的调用，调用完成后在下一个检查点停住。
+
+        Returns:
+            fn 的返回值；被取消返回 _MISSING
+        """
+        run = self._run
+        if run.cancel_event.is_set():
+            return _MISSING
+        future = _io_pool().submit(fn, *args)
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        remove = run.add_listener(done.set)
+        try:
+            while not future.done():
+                if run.cancel_event.is_set():
+                    return _MISSING
+                done.wait()
+                done.clear()
+        finally:
+            remove()
+        return future.result()
+
+    def _exec_legacy(self, step: CompiledStep, delay: float):
+        """委托给 ActionExecutor 的原有处理器，仅对含占位符的字段插值"""
+        self._flush_files()
+        step.args['action'](self._executor, self._legacy_source(step))
+
+    def _legacy_source(self, step: CompiledStep):
+        args = step.args
+        source = args['step']
+        if args['dynamic']:
+            source = dict(source)
+            variables = self._variables
+            for key, template in args['dynamic']:
+                source[key] = template.render(variables)
+        return source
+
+    def _value(self, value):
+        """解析编译后的字段值：Template 按当前变量渲染，常量原样返回"""
+        if type(value) is Template:
+            return value.render(self._variables)
+        return value
+
+    def _render(self, value):
+        """渲染 compile_structure 编译的 JSON 结构"""
+        if type(value) is Template:
+            return value.render(self._variables)
+        if isinstance(value, dict):
+            return {k: self._render(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._render(v) for v in value]
+        return value
 
     # ── 流程控制步骤 ──
 
-    def _exec_delay(self, step: dict, delay: float):
-        ms = step.get('ms', 1000)
-        time.sleep(ms / 1000.0)
+    def _exec_delay(self, step: CompiledStep, delay: float):
+        self._delay(step.args['ms'])
 
-    def _exec_set_var(self, step: dict, delay: float):
-        name = step.get('name', '')
-        value = self._interpolate(str(step.get('value', '')))
-        if name:
-            self._variables[name] = value
+    def _exec_set_var(self, step: CompiledStep, delay: float):
+        args = step.args
+        name = args['name']
+        if not name:
+            return
+        value = self._render(args['value'])
+        if args['value_type']:
+            try:
+                value = coerce(value, args['value_type'])
+            except ValueError as e:
+                logger.warning(f"set_var {name}: {e}")
+        self._variables[name] = value
 
-    def _exec_get_clipboard(self, step: dict, delay: float):
-        var_name = step.get('var', '')
+    def _exec_get_clipboard(self, step: CompiledStep, delay: float):
+        var_name = step.args['var']
         if not var_name:
             logger.warning("No var name for get_clipboard")
             return
         text = clipboard_get_text()
         self._variables[var_name] = text
 
-    def _exec_set_clipboard(self, step: dict, delay: float):
-        value = self._interpolate(str(step.get('value', '')))
+    def _exec_set_clipboard(self, step: CompiledStep, delay: float):
+        value = self._value(step.args['value'])
         if not clipboard_set_text(value):
             logger.error("Failed to set clipboard")
 
-    def _exec_mouse_click(self, step: dict, delay: float):
-        x = int(self._interpolate(str(step.get('x', 0))))
-        y = int(self._interpolate(str(step.get('y', 0))))
-        button = step.get('button', 'left')
-        ctypes.windll.user32.SetCursorPos(x, y)
-        time.sleep(0.05)
-        if button == 'right':
-            ctypes.windll.user32.mouse_event(0x0008, 0, 0, 0, 0)  # RIGHTDOWN
-            ctypes.windll.user32.mouse_event(0x0010, 0, 0, 0, 0)  # RIGHTUP
-        elif button == 'middle':
-            ctypes.windll.user32.mouse_event(0x0020, 0, 0, 0, 0)  # MIDDLEDOWN
-            ctypes.windll.user32.mouse_event(0x0040, 0, 0, 0, 0)  # MIDDLEUP
-        else:
-            ctypes.windll.user32.mouse_event(0x0002, 0, 0, 0, 0)  # LEFTDOWN
-            ctypes.windll.user32.mouse_event(0x0004, 0, 0, 0, 0)  # LEFTUP
-
-    def _exec_mouse_move(self, step: dict, delay: float):
-        x = int(self._interpolate(str(step.get('x', 0))))
-        y = int(self._interpolate(str(step.get('y', 0))))
-        ctypes.windll.user32.SetCursorPos(x, y)
-
-    def _exec_wait_window(self, step: dict, delay: float):
-        title = self._interpolate(step.get('title', ''))
-        timeout = step.get('timeout', 5000)
-        start = time.time()
-        while not self._stop_flag:
-            current_title = self._get_foreground_title()
-            if title.lower() in current_title.lower():
-                return
-            if (time.time() - start) * 1000 >= timeout:
-                return
-            time.sleep(0.1)
-
-    def _exec_wait_pixel(self, step: dict, delay: float):
-        x = step.get('x', 0)
-        y = step.get('y', 0)
-        target_color = step.get('color', '#000000').lower()
-        tolerance = step.get('tolerance', 10)
-        timeout = step.get('timeout', 5000)
-        start = time.time()
+    def _exec_mouse_click(self, step: CompiledStep, delay: float):
+        args = step.args
+        x = self._value(args['x'])
+        y = self._value(args['y'])
+        self._backend.move_mouse(x, y)
+        self._sleep(0.05)
+        if self._stop_flag:
+            return
+        self._backend.mouse_click(args['button'])
+
+    def _exec_mouse_move(self, step: CompiledStep, delay: float):
+        x = self._value(step.args['x'])
+        y = self._value(step.args['y'])
+        self._backend.move_mouse(x, y)
+
+    def _exec_wait_window(self, step: CompiledStep, delay: float):
+        monitor = self._foreground()
+        if monitor is not None:
+            # 事件驱动：仅在前台切换或标题变化时重新匹配
+            title = self._value(step.args['title'])
+            run = self._run
+            started = time.perf_counter()
+            remaining = step.args['timeout'] / 1000.0
+            remove = run.add_listener(monitor.wake)
+            try:
+                while True:
+                    began = time.perf_counter()
+                    if monitor.wait_for(lambda e: title in e.title.lower(), remaining,
+                                        run.interrupt):
+                        break
+                    # 超时或取消结束等待；暂停则停住后继续等待剩余时间
+                    if not run.interrupt.is_set():
+                        break
+                    remaining -= time.perf_counter() - began
+                    if run.hold() is None or remaining <= 0:
+                        break
+            finally:
+                remove()
+            self._waited += time.perf_counter() - started
+            return
+        self._wait_until(self._window_predicate(step), step.args['timeout'])
+
+    def _exec_wait_pixel(self, step: CompiledStep, delay: float):
+        self._wait_until(self._pixel_predicate(step), step.args['timeout'])
+
+    def _window_predicate(self, step: CompiledStep) -> Callable[[], bool]:
+        title = self._value(step.args['title'])
+        return lambda: title in self._get_foreground_title().lower()
+
+    def _pixel_predicate(self, step: CompiledStep) -> Callable[[], bool]:
+        args = step.args
+        x, y = args['x'], args['y']
+        target_color = args['color']
+        tolerance = args['tolerance']
+        return lambda: self._color_match(self._get_pixel_color(x, y), target_color, tolerance)
+
+    def _exec_find_image(self, step: CompiledStep, delay: float):
+        self._store_match(step, self._region_matcher(step)())
+
+    def _exec_wait_region(self, step: CompiledStep, delay: float):
+        predicate, result = self._region_predicate(step)
+        self._wait_until(predicate, step.args['timeout'], step.args['interval'])
+        self._store_match(step, result[0])
+
+    def _region_predicate(self, step: CompiledStep) -> tuple[Callable[[], bool], list]:
+        """区域匹配的轮询条件，命中坐标写入返回的列表"""
+        matcher = self._region_matcher(step)
+        result = [None]
+
+        def predicate() -> bool:
+            result[0] = matcher()
+            return result[0] is not None
+        return predicate, result
+
+    def _region_matcher(self, step: CompiledStep) -> Callable[[], tuple[int, int] | None]:
+        """构建一次截图 + 匹配的函数，返回命中位置的屏幕坐标（参考图为中心点）"""
+        args = step.args
+        capture = self._capture()
+        tolerance = args['tolerance']
+        points = args['points']
+        if points is not None:
+            bounds = points.bounds
+            return lambda: points.center if points.match(capture.capture(*bounds), tolerance) else None
+
+        path = self._value(args['image'])
+        if not path:
+            logger.warning(f"No image or points for {step.type}")
+            return lambda: None
+        try:
+            pattern = load_pattern(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load reference image {path}: {e}")
+            return lambda: None
+        region = (self._value(args['x']), self._value(args['y']),
+                  self._value(args['w']), self._value(args['h']))
+
+        def match() -> tuple[int, int] | None:
+            frame = capture.capture(*region)
+            pos = pattern.find(frame, tolerance)
+            if pos is None:
+                return None
+            return (frame.x + pos[0] + pattern.width // 2,
+                    frame.y + pos[1] + pattern.height // 2)
+        return match
+
+    def _store_match(self, step: CompiledStep, pos: tuple[int, int] | None):
+        """匹配结果写入变量：{var}=true/false，{var}_x/{var}_y 为命中坐标"""
+        var = step.args['var']
+        if not var:
+            return
+        self._variables[var] = pos is not None
+        if pos:
+            self._variables[f'{var}_x'] = pos[0]
+            self._variables[f'{var}_y'] = pos[1]
+
+    def _wait_until(self, predicate: Callable[[], bool], timeout: float,
+                    interval: float = 0.1) -> bool:
+        """轮询等待条件成立，超时或取消返回 False
+
+        Args:
+            predicate: 条件函数
+            timeout: 超时（毫秒）
+            interval: 轮询间隔（秒）
+        """
+        clock = self._clock
+        start = clock.monotonic()
         while not self._stop_flag:
-            current = self._get_pixel_color(x, y)
-            if self._color_match(current, target_color, tolerance):
-                return
-            if (time.time() - start) * 1000 >= timeout:
-                return
-            time.sleep(0.1)
+            if predicate():
+                return True
+            if (clock.monotonic() - start) * 1000 >= timeout:
+                return False
+            # 暂停时长不计入超时
+            start += self._sleep(interval)
+        return False
 
-    def _exec_if_condition(self, step: dict, delay: float):
-        condition = step.get('condition', {})
-        if self._eval_condition(condition):
-            then_steps = step.get('then_steps', [])
-            self._execute_steps(then_steps, delay)
+    def _exec_if_condition(self, step: CompiledStep, delay: float):
+        then_steps, else_steps = step.blocks
+        if self._eval_condition(step.args['condition']):
+            self._execute_steps(then_steps, delay, 'then')
         else:
-            else_steps = step.get('else_steps', [])
-            self._execute_steps(else_steps, delay)
+            self._execute_steps(else_steps, delay, 'else')
 
-    def _exec_loop(self, step: dict, delay: float):
-        mode = step.get('mode', 'count')
-        max_iter = step.get('max_iterations', 100)
-        body = step.get('body_steps', [])
+    def _exec_loop(self, step: CompiledStep, delay: float):
+        args = step.args
+        mode = args['mode']
+        max_iter = args['max_iterations']
+        body = step.blocks[0]
 
         if mode == 'count':
-            count = step.get('count', 1)
+            count = self._value(args['count'])
             for i in range(min(count, max_iter)):
                 if self._stop_flag:
                     return
-                self._variables['_loop_index'] = str(i)
-                self._execute_steps(body, delay)
+                self._variables['_loop_index'] = i
+                self._execute_steps(body, delay, f'#{i}')
         elif mode == 'while_condition':
-            condition = step.get('condition', {})
+            condition = args['condition']
             iterations = 0
             while not self._stop_flag and iterations < max_iter:
                 if not self._eval_condition(condition):
                     break
-                self._variables['_loop_index'] = str(iterations)
-                self._execute_steps(body, delay)
+                self._variables['_loop_index'] = iterations
+                self._execute_steps(body, delay, f'#{iterations}')
                 iterations += 1
 
+    # ── 并行步骤 ──
+
+    def _exec_parallel(self, step: CompiledStep, delay: float):
+        self._run_branches(self._branch_jobs(step), step.args['concurrency'], delay)
+
+    def _exec_parallel_for_each(self, step: CompiledStep, delay: float):
+        self._run_branches(self._branch_jobs(step), step.args['concurrency'], delay)
+
+    def _branch_jobs(self, step: CompiledStep) -> list[tuple[tuple, dict | None, str]]:
+        """并行步骤的分支列表 [(steps, 分支初始变量, 分支标签)]"""
+        if step.type == 'parallel':
+            return [(branch, None, f'b{i}') for i, branch in enumerate(step.blocks) if branch]
+        args = step.args
+        items = self._parse_list(self._variables.get(args['list_var'], ''), args['separator'])
+        body = step.blocks[0]
+        item_var = args['item_var']
+        return [(body, {item_var: item, '_loop_index': i}, f'#{i}')
+                for i, item in enumerate(items[:args['max_iterations']])]
+
+    def _run_branches(self, jobs: list[tuple[tuple, dict | None, str]], concurrency: int,
+                      delay: float):
+        """并发执行分支，全部结束后按分支顺序把变更合并回当前作用域
+
+        每个分支拥有父作用域的独立副本，共享同一个 run（取消、步骤计数）。
+        执行期间父作用域不变，可直接作为比较基准。
+        """
+        if not jobs:
+            return
+        workers = len(jobs) if concurrency <= 0 else min(concurrency, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='combo-branch') as pool:
+            futures = [pool.submit(self._run_branch, steps, extra, label, delay)
+                       for steps, extra, label in jobs]
+        error = None
+        for future in futures:
+            exc = future.exception()
+            if exc is not None:
+                error = error or exc
+                continue
+            self._variables.update(future.result())
+        if error is not None:
+            raise error
+
+    def _run_branch(self, steps: tuple, extra: dict | None, label: str, delay: float) -> dict:
+        """在子执行器中执行分支，返回相对父作用域变化的变量"""
+        child = self._fork(extra)
+        child._execute_steps(steps, delay, label)
+        return self._changes(child)
+
+    def _fork(self, extra: dict | None = None) -> 'ComboExecutor':
+        """创建共享 run、拥有父作用域独立副本的子执行器"""
+        child = ComboExecutor(self._executor)
+        child._run = self._run
+        child._variables = dict(self._variables)
+        child._timer = FlowTimer(self._clock, self._timer.speed)
+        child._call_depth = self._call_depth
+        if extra:
+            child._variables.update(extra)
+        if self._run.tracer is not None:
+            child._path = self._path
+            child._lane = self._run.tracer.new_lane()
+        return child
+
+    # ── 子流程 ──
+
+    def _exec_call_flow(self, step: CompiledStep, delay: float):
+        child, plan, label = self._callee(step)
+        child._execute_steps(plan.steps, plan.delay, label)
+        self._collect_returns(step, child)
+
+    def _callee(self, step: CompiledStep) -> tuple['ComboExecutor', ComboPlan, str]:
+        """解析被调用流程，返回 (子执行器, 计划, 追踪块标签)
+
+        子流程拥有独立的变量作用域（只含 args），与调用方共享 run 和延时调度。
+
+        Raises:
+            RecursionError: 超过 max_call_depth
+            LookupError: 找不到该 id 的 combo 动作
+        """
+        args = step.args
+        flow_id = self._value(args['flow'])
+        limit = getattr(self._executor, 'max_call_depth', DEFAULT_MAX_DEPTH)
+        if self._call_depth >= limit:
+            raise RecursionError(f"call_flow depth limit ({limit}) exceeded calling '{flow_id}'")
+        library = getattr(self._executor, 'flows', None)
+        plan = library.plan(flow_id, self.compiler()) if library is not None else None
+        if plan is None:
+            raise LookupError(f"call_flow: combo action '{flow_id}' not found")
+        params = self._render(args['args'])
+        child = ComboExecutor(self._executor)
+        child._run = self._run
+        child._variables = dict(params) if isinstance(params, dict) else {}
+        child._timer = self._timer
+        child._snapshot = self._snapshot
+        child._call_depth = self._call_depth + 1
+        child._path = self._path
+        child._lane = self._lane
+        return child, plan, f'call:{flow_id}'
+
+    def _collect_returns(self, step: CompiledStep, child: 'ComboExecutor'):
+        """把子流程的返回变量写回调用方"""
+        values = child._variables
+        for source, target in step.args['returns']:
+            if source in values:
+                self._variables[target] = values[source]
+
+    def _changes(self, child: 'ComboExecutor') -> dict:
+        """子执行器中相对当前作用域新增或修改的变量"""
+        base = self._variables
+        return {k: v for k, v in child._variables.items()
+                if base.get(k, _MISSING) is not v}
+
+    @staticmethod
+    def _parse_list(value, separator: str) -> list:
+        """将变量值解析为列表：list 原样使用，文本按 JSON 数组或分隔符拆分（元素保留原生类型）"""
+        if isinstance(value, (list, tuple)):
+            return list(value)
+        text = to_text(value)
+        if text.lstrip().startswith('['):
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            if isinstance(data, list):
+                return data
+        return [x for x in text.split(separator or '\n') if x]
+
     # ── 新增步骤处理器 ──
 
-    def _exec_mouse_double_click(self, step: dict, delay: float):
-        x = int(self._interpolate(str(step.get('x', 0))))
-        y = int(self._interpolate(str(step.get('y', 0))))
-        ctypes.windll.user32.SetCursorPos(x, y)
-        time.sleep(0.05)
+    def _exec_mouse_double_click(self, step: CompiledStep, delay: float):
+        x = self._value(step.args['x'])
+        y = self._value(step.args['y'])
+        self._backend.move_mouse(x, y)
+        self._sleep(0.05)
+        for _ in range(2):
+            if self._stop_flag:
+                return
+            self._backend.mouse_click('left')
+            self._sleep(0.03)
+
+    def _exec_mouse_scroll(self, step: CompiledStep, delay: float):
+        args = step.args
+        x = self._value(args['x'])
+        y = self._value(args['y'])
+        delta = self._value(args['delta'])
+        self._backend.move_mouse(x, y)
+        self._sleep(0.05)
+        if self._stop_flag:
+            return
+        self._backend.mouse_wheel(delta)
+
+    def _exec_input_batch(self, step: CompiledStep, delay: float):
+        """融合后的输入步骤：合并所有原始步骤的事件，一次 SendInput 提交"""
+        steps = step.blocks[0]
+        events = []
+        for child in steps:
+            getattr(self, INPUT_EVENTS[child.type])(child, events)
+        if events:
+            sent = self._backend.send_input(events)
+            if sent < len(events):
+                # 被 UIPI 拦截或部分注入，与未融合的 keys 步骤一样记录并提示
+                logger.error(f"SendInput injected {sent}/{len(events)} events "
+                             f"for {len(steps)} fused steps")
+                self._feedback('发送失败!')
+            elif any(child.type == 'keys' for child in steps):
+                self._feedback('已发送!')
+        self._run.steps_executed += len(steps) - 1
+
+    def _events_mouse_move(self, step: CompiledStep, events: list):
+        events.append((INPUT_MOVE, self._value(step.args['x']), self._value(step.args['y'])))
+
+    def _events_mouse_click(self, step: CompiledStep, events: list):
+        self._events_mouse_move(step, events)
+        button = step.args['button']
+        events.append((INPUT_BUTTON, button, True))
+        events.append((INPUT_BUTTON, button, False))
+
+    def _events_mouse_double_click(self, step: CompiledStep, events: list):
+        self._events_mouse_move(step, events)
         for _ in range(2):
-            ctypes.windll.user32.mouse_event(0x0002, 0, 0, 0, 0)  # LEFTDOWN
-            ctypes.windll.user32.mouse_event(0x0004, 0, 0, 0, 0)  # LEFTUP
-            time.sleep(0.03)
-
-    def _exec_mouse_scroll(self, step: dict, delay: float):
-        x = int(self._interpolate(str(step.get('x', 0))))
-        y = int(self._interpolate(str(step.get('y', 0))))
-        delta = int(self._interpolate(str(step.get('delta', -3))))
-        ctypes.windll.user32.SetCursorPos(x, y)
-        time.sleep(0.05)
-        ctypes.windll.user32.mouse_event(0x0800, 0, 0, delta * 120, 0)  # MOUSEEVENTF_WHEEL
-
-    def _exec_type_text(self, step: dict, delay: float):
-        text = self._interpolate(step.get('text', ''))
-        char_delay = step.get('char_delay', 50) / 1000.0
+            events.append((INPUT_BUTTON, 'left', True))
+            events.append((INPUT_BUTTON, 'left', False))
+
+    def _events_mouse_scroll(self, step: CompiledStep, events: list):
+        self._events_mouse_move(step, events)
+        events.append((INPUT_WHEEL, self._value(step.args['delta'])))
+
+    def _events_keys(self, step: CompiledStep, events: list):
+        vk_codes = parse_keys(self._legacy_source(step).get('target', ''))
+        events.extend((INPUT_KEY, vk, True) for vk in vk_codes)
+        events.extend((INPUT_KEY, vk, False) for vk in reversed(vk_codes))
+
+    def _exec_type_text(self, step: CompiledStep, delay: float):
+        text = self._value(step.args['text'])
+        char_delay = step.args['char_delay']
         if not text:
             return
+        # \r\n 只输入一次回车，且分块时不会被拆到两个块里
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
 
-        for ch in text:
+        if char_delay > _BATCH_CHAR_DELAY:
+            for ch in text:
+                if self._stop_flag:
+                    return
+                self._backend.send_unicode(ch)
+                self._sleep(char_delay)
+            return
+
+        # 字符间隔很小时按块批量提交，块后补足整块的间隔以保持总时长
+        chunk = step.args['chunk_size']
+        if chunk <= 0:
+            chunk = getattr(self._executor, 'type_chunk_size', DEFAULT_INPUT_CHUNK)
+        for i in range(0, len(text), chunk):
             if self._stop_flag:
                 return
-            code = ord(ch)
-            inp_down = INPUT(type=INPUT_KEYBOARD)
-            inp_down._input.ki = KEYBDINPUT(wVk=0, wScan=code,
-                                             dwFlags=KEYEVENTF_UNICODE, time=0,
-                                             dwExtraInfo=None)
-            inp_up = INPUT(type=INPUT_KEYBOARD)
-            inp_up._input.ki = KEYBDINPUT(wVk=0, wScan=code,
-                                           dwFlags=KEYEVENTF_UNICODE | KEYEVENTF_KEYUP,
-                                           time=0, dwExtraInfo=None)
-            arr = (INPUT * 2)(inp_down, inp_up)
-            ctypes.windll.user32.SendInput(2, ctypes.byref(arr), ctypes.sizeof(INPUT))
+            part = text[i:i + chunk]
+            self._backend.send_unicode(part)
             if char_delay > 0:
-                time.sleep(char_delay)
+                self._sleep(char_delay * len(part))
+
+    def _exec_toast(self, step: CompiledStep, delay: float):
+        self._show_toast(step)
+        self._sleep(step.args['duration'])
 
-    def _exec_toast(self, step: dict, delay: float):
-        message = self._interpolate(step.get('message', ''))
-        if message and hasattr(self._executor, '_feedback'):
+    def _show_toast(self, step: CompiledStep):
+        message = self._value(step.args['message'])
+        if message:
+            self._feedback(message)
+
+    def _feedback(self, message: str):
+        if hasattr(self._executor, '_feedback'):
             self._executor._feedback(message)
-        duration = step.get('duration', 2000)
-        time.sleep(duration / 1000.0)
-
-    def _exec_screenshot(self, step: dict, delay: float):
-        path = self._interpolate(step.get('path', ''))
-        x = step.get('x', 0)
-        y = step.get('y', 0)
-        w = step.get('w', 0)
-        h = step.get('h', 0)
-        var = step.get('var', '')
+
+    def _exec_screenshot(self, step: CompiledStep, delay: float):
+        args = step.args
+        path = self._value(args['path'])
+        var = args['var']
         if hasattr(self._executor, '_platform') and self._executor._platform:
             result = self._executor._platform._screen_screenshot(
-                path=path, x=x, y=y, w=w, h=h)
+                path=path, x=args['x'], y=args['y'], w=args['w'], h=args['h'])
             if var and result:
                 self._variables[var] = result
 
-    def _exec_http_request(self, step: dict, delay: float):
-        import urllib.request
-        import urllib.error
-        method = step.get('method', 'GET')
-        url = self._interpolate(step.get('url', ''))
-        body = self._interpolate(step.get('body', ''))
-        timeout = step.get('timeout', 5000) / 1000.0
-        var = step.get('var', '')
+    def _exec_http_request(self, step: CompiledStep, delay: float):
+        args = step.args
+        url = self._value(args['url'])
         if not url:
             return
+        method = args['method']
+        headers = args['headers']
+        if headers:
+            headers = {k: str(v) for k, v in self._render(headers).items()}
+        payload = args['json']
+        if payload is not None:
+            payload = self._render(payload)
+        body = self._value(args['body']) if method not in ('GET', 'HEAD') else ''
+        session = self._http_session()
+
+        def fetch():
+            return session.request(method, url, headers=headers, body=body or None,
+                                   json_body=payload, timeout=args['timeout'],
+                                   cache=args['cache'], ttl=args['cache_ttl'])
+
         try:
-            data = body.encode('utf-8') if method == 'POST' and body else None
-            req = urllib.request.Request(url, data=data, method=method)
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                content = resp.read().decode('utf-8', errors='replace')
-            if var:
-                self._variables[var] = content
-        except (urllib.error.URLError, OSError) as e:
+            result = self._call_interruptible(fetch)
+        except OSError as e:
             logger.warning(f"HTTP request failed for {url}: {e}")
-            if var:
-                self._variables[var] = ''
+            result = None
+        if result is _MISSING:
+            return
+        self._store_http(step, result)
 
-    def _exec_file_read(self, step: dict, delay: float):
+    def _store_http(self, step: CompiledStep, result):
+        """响应写入变量：var 为响应体（失败或 4xx/5xx 时为空），status_var 为状态码（连接失败为 0）"""
+        args = step.args
+        variables = self._variables
+        if args['var']:
+            variables[args['var']] = result.text if result is not None and result.ok else ''
+        if args['status_var']:
+            variables[args['status_var']] = result.status if result is not None else 0
+        if args['headers_var']:
+            variables[args['headers_var']] = dict(result.headers) if result is not None else {}
+
+    def _http_session(self):
+        """注入的 HTTP 会话（set_http_session），未注入时使用进程级共享会话"""
+        session = getattr(self._executor, '_http', None)
+        if session is not None:
+            return session
+        from ..utils.http import default_session
+        return default_session()
+
+    def _exec_file_read(self, step: CompiledStep, delay: float):
         import pathlib
-        path = self._interpolate(step.get('path', ''))
-        encoding = step.get('encoding', 'utf-8')
-        var = step.get('var', '')
+        path = self._value(step.args['path'])
+        encoding = step.args['encoding']
+        var = step.args['var']
         if not path or not var:
             return
+        self._release_file(path)
         try:
             content = pathlib.Path(path).read_text(encoding=encoding)
             self._variables[var] = content
@@ -314,99 +803,186 @@ class ComboExecutor:
             logger.warning(f"Failed to read file {path}: {e}")
             self._variables[var] = ''
 
-    def _exec_file_write(self, step: dict, delay: float):
+    def _exec_file_write(self, step: CompiledStep, delay: float):
         import pathlib
-        path = self._interpolate(step.get('path', ''))
-        content = self._interpolate(step.get('content', ''))
-        encoding = step.get('encoding', 'utf-8')
-        mode = step.get('mode', 'write')
+        args = step.args
+        path = self._value(args['path'])
+        content = self._value(args['content'])
+        encoding = args['encoding']
         if not path:
             return
         try:
+            files = self._run.files
+            if args['mode'] == 'append' and files is not None:
+                # 运行内复用追加句柄，循环中逐行写入不再反复打开文件
+                files.write(path, content, encoding)
+                return
+            self._release_file(path)
             p = pathlib.Path(path)
-            if mode == 'append':
+            if args['mode'] == 'append':
                 with p.open('a', encoding=encoding) as f:
                     f.write(content)
             else:
                 p.write_text(content, encoding=encoding)
-        except OSError as e:
+        except (OSError, LookupError) as e:
             logger.error(f"Failed to write file {path}: {e}")
 
-    def _exec_window_activate(self, step: dict, delay: float):
-        title = self._interpolate(step.get('title', ''))
-        if not title:
+    def _exec_json_extract(self, step: CompiledStep, delay: float):
+        """按 JSONPath 从变量中提取值：字符串按 JSON 解析（同一文本只解析一次），list/dict 直接查找"""
+        args = step.args
+        var = args['var']
+        if not var:
             return
-        found = [None]
+        source = self._variables.get(args['source_var'])
+        if isinstance(source, (str, bytes, bytearray)):
+            try:
+                source = documents.parse(to_text(source)) if source else None
+            except ValueError as e:
+                logger.warning(f"json_extract: {args['source_var']} is not valid JSON: {e}")
+                source = None
+        try:
+            # 路径在运行期编译（带缓存），无效路径只影响本步骤
+            path = compile_json_path(self._value(args['path']))
+        except ValueError as e:
+            logger.warning(f"json_extract {var}: {e}")
+            self._variables[var] = self._render(args['default'])
+            return
+        matches = path.find(source) if source is not None else []
+        if args['all']:
+            self._variables[var] = matches
+        else:
+            self._variables[var] = matches[0] if matches else self._render(args['default'])
 
-        def enum_callback(hwnd, _):
-            buf = ctypes.create_unicode_buffer(256)
-            ctypes.windll.user32.GetWindowTextW(hwnd, buf, 256)
-            if title.lower() in buf.value.lower() and buf.value:
-                found[0] = hwnd
-                return False
-            return True
+    def _exec_regex_extract(self, step: CompiledStep, delay: float):
+        """正则提取：all 时写入全部匹配的列表，否则写入第一个匹配"""
+        args = step.args
+        var = args['var']
+        if not var:
+            return
+        text = to_text(self._variables.get(args['source_var'], ''))
+        group = args['group']
+        try:
+            pattern = compile_regex(self._value(args['pattern']), args['flags'])
+            if args['all']:
+                self._variables[var] = [regex_result(m, group) for m in pattern.finditer(text)]
+                return
+            m = pattern.search(text)
+            result = regex_result(m, group) if m else None
+        except (ValueError, IndexError) as e:
+            # 模板渲染后的正则无效，或 group 不存在（IndexError: no such group）
+            logger.warning(f"regex_extract {var}: {e}")
+            result = None
+        self._variables[var] = result if result is not None else self._render(args['default'])
+
+    def _exec_for_each_line(self, step: CompiledStep, delay: float):
+        self._for_each_stream(step, delay)
+
+    def _exec_for_each_chunk(self, step: CompiledStep, delay: float):
+        self._for_each_stream(step, delay)
+
+    def _open_stream(self, step: CompiledStep):
+        """按步骤类型打开文件的逐行/逐块迭代器，路径为空时返回 None"""
+        args = step.args
+        path = self._value(args['path'])
+        if not path:
+            return None
+        self._release_file(path)
+        if step.type == 'for_each_chunk':
+            return iter_chunks(path, args['encoding'], args['chunk_size'])
+        items = iter_lines(path, args['encoding'])
+        if args['skip_empty']:
+            items = (line for line in items if line.strip())
+        return items
+
+    def _for_each_stream(self, step: CompiledStep, delay: float):
+        """流式遍历文件：每次只持有当前行/块，绑定到 item_var 后执行循环体"""
+        items = self._open_stream(step)
+        if items is None:
+            return
+        args = step.args
+        item_var = args['item_var']
+        max_iter = args['max_iterations']
+        body = step.blocks[0]
+        with closing(items):
+            for i, item in enumerate(items):
+                if self._stop_flag or 0 < max_iter <= i:
+                    return
+                self._variables[item_var] = item
+                self._variables['_loop_index'] = i
+                self._execute_steps(body, delay, f'#{i}')
 
-        WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
-        ctypes.windll.user32.EnumWindows(WNDENUMPROC(enum_callback), 0)
-        if found[0]:
-            ctypes.windll.user32.SetForegroundWindow(found[0])
+    def _release_file(self, path: str):
+        """关闭本次运行对该文件的追加句柄，使缓冲内容对后续读取/覆盖可见"""
+        files = self._run.files if self._run else None
+        if files:
+            files.release(path)
+
+    def _flush_files(self):
+        files = self._run.files if self._run else None
+        if files:
+            files.flush()
+
+    def _exec_window_activate(self, step: CompiledStep, delay: float):
+        title = self._value(step.args['title'])
+        if not title:
+            return
+        hwnd = self._backend.find_window(title)
+        if hwnd:
+            self._backend.activate_window(hwnd)
 
     # ── 条件求值 ──
 
-    def _eval_condition(self, cond: dict) -> bool:
-        source = cond.get('source', '')
-        op = cond.get('op', 'contains')
-        value = self._interpolate(str(cond.get('value', '')))
-
-        # 获取当前值
-        if source == 'window_title':
-            current = self._get_foreground_title()
-        elif source == 'process_name':
-            current = self._get_foreground_process()
-        elif source == 'clipboard':
-            current = clipboard_get_text()
-        elif source == 'variable':
-            var_name = cond.get('var_name', '')
-            current = self._variables.get(var_name, '')
-        else:
-            current = ''
-
-        # 比较
-        if op == 'contains':
-            return value.lower() in current.lower()
-        elif op == 'equals':
-            return current.lower() == value.lower()
-        elif op == 'starts_with':
-            return current.lower().startswith(value.lower())
-        elif op == 'not_contains':
-            return value.lower() not in current.lower()
-        return False
+    def _eval_condition(self, cond: Condition) -> bool:
+        """求值编译后的条件，系统状态按快照读取"""
+        return cond(self._variables, self._condition_snapshot().begin())
+
+    def _condition_snapshot(self) -> SourceSnapshot:
+        """条件来源快照，窗口取自 ActionExecutor.condition_snapshot_ms"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            window = getattr(self._executor, 'condition_snapshot_ms', 0) / 1000.0
+            snapshot = self._snapshot = SourceSnapshot({
+                'window_title': self._foreground_title,
+                'process_name': self._foreground_process,
+                'clipboard': clipboard_get_text,
+            }, self._clock, window)
+        return snapshot
 
     # ── 平台工具方法 ──
 
-    @staticmethod
-    def _get_foreground_title() -> str:
-        hwnd = ctypes.windll.user32.GetForegroundWindow()
-        if not hwnd:
-            return ''
-        buf = ctypes.create_unicode_buffer(256)
-        ctypes.windll.user32.GetWindowTextW(hwnd, buf, 256)
-        return buf.value
+    def _capture(self) -> CaptureBackend:
+        """截图后端：优先使用 ActionExecutor 注入的后端"""
+        return getattr(self._executor, '_capture', None) or default_capture()
 
-    @staticmethod
-    def _get_foreground_process() -> str:
-        from .context import get_foreground_process
-        return get_foreground_process()
+    def _foreground(self):
+        """运行中的前台窗口事件源，未注入或不可用时返回 None（回退为轮询）"""
+        monitor = getattr(self._executor, '_foreground', None)
+        if monitor is not None and monitor.running:
+            return monitor
+        return None
 
-    @staticmethod
-    def _get_pixel_color(x: int, y: int) -> str:
-        hdc = ctypes.windll.user32.GetDC(0)
-        color = ctypes.windll.gdi32.GetPixel(hdc, x, y)
-        ctypes.windll.user32.ReleaseDC(0, hdc)
-        r = color & 0xFF
-        g = (color >> 8) & 0xFF
-        b = (color >> 16) & 0xFF
-        return f'#{r:02x}{g:02x}{b:02x}'
+    def _foreground_title(self) -> str:
+        monitor = self._foreground()
+        if monitor is not None:
+            return monitor.current().title
+        return self._get_foreground_title()
+
+    def _foreground_process(self) -> str:
+        monitor = self._foreground()
+        if monitor is not None:
+            return monitor.current().process
+        return self._get_foreground_process()
+
+    def _get_foreground_title(self) -> str:
+        backend = self._backend
+        return backend.window_title(backend.foreground_window())
+
+    def _get_foreground_process(self) -> str:
+        backend = self._backend
+        return backend.window_process(backend.foreground_window())
+
+    def _get_pixel_color(self, x: int, y: int) -> str:
+        return self._backend.pixel_color(x, y)
 
     @staticmethod
     def _color_match(c1: str, c2: str, tolerance: int) -> bool:
@@ -418,3 +994,58 @@ class ComboExecutor:
                     abs(b1 - b2) <= tolerance)
         except (ValueError, IndexError):
             return False
+
+
+# 步骤类型 → ComboExecutor 处理方法名
+STEP_HANDLERS = {
+    'delay': '_exec_delay',
+    'set_var': '_exec_set_var',
+    'get_clipboard': '_exec_get_clipboard',
+    'set_clipboard': '_exec_set_clipboard',
+    'mouse_click': '_exec_mouse_click',
+    'mouse_double_click': '_exec_mouse_double_click',
+    'mouse_move': '_exec_mouse_move',
+    'mouse_scroll': '_exec_mouse_scroll',
+    'wait_window': '_exec_wait_window',
+    'wait_pixel': '_exec_wait_pixel',
+    'wait_region': '_exec_wait_region',
+    'find_image': '_exec_find_image',
+    'window_activate': '_exec_window_activate',
+    'if_condition': '_exec_if_condition',
+    'loop': '_exec_loop',
+    'type_text': '_exec_type_text',
+    'toast': '_exec_toast',
+    'screenshot': '_exec_screenshot',
+    'http_request': '_exec_http_request',
+    'file_read': '_exec_file_read',
+    'file_write': '_exec_file_write',
+    'call_flow': '_exec_call_flow',
+    'json_extract': '_exec_json_extract',
+    'regex_extract': '_exec_regex_extract',
+    'for_each_line': '_exec_for_each_line',
+    'for_each_chunk': '_exec_for_each_chunk',
+    'parallel': '_exec_parallel',
+    'parallel_for_each': '_exec_parallel_for_each',
+    'input_batch': '_exec_input_batch',
+}
+
+# 可融合的输入步骤类型 → 生成 send_input 事件的方法名
+INPUT_EVENTS = {
+    'mouse_move': '_events_mouse_move',
+    'mouse_click': '_events_mouse_click',
+    'mouse_double_click': '_events_mouse_double_click',
+    'mouse_scroll': '_events_mouse_scroll',
+    'keys': '_events_keys',
+}
+
+# 委托给 ActionExecutor 的原有动作类型 → 处理方法名
+LEGACY_HANDLERS = {
+    'app': '_exec_app',
+    'file': '_exec_file',
+    'folder': '_exec_folder',
+    'url': '_exec_url',
+    'shell': '_exec_shell',
+    'snippet': '_exec_snippet',
+    'keys': '_exec_keys',
+    'script': '_exec_script',
+}
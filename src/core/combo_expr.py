@@ -0,0 +1,409 @@
+"""条件表达式 — 编译期解析为闭包，求值时按快照读取前台窗口、进程和剪贴板
+
+表达式示例:
+    @window_title contains "记事本" and count >= 3
+    not (@process_name == "explorer.exe" or status matches "^5\\d\\d$")
+
+- 变量直接写名称，@window_title / @process_name / @clipboard 为系统状态
+- and / or / not（也可写 && / || / !），括号分组
+- == != 两侧为数值时按数值比较，否则按文本不区分大小写比较
+- < <= > >= 仅在两侧都能解析为数值时成立
+- contains / startswith / endswith 不区分大小写；contains 对列表按元素、对字典按键判断
+- matches（或 =~）为正则搜索，字面量正则在编译期编译
+- 函数 len(x)、lower(x)、number(x)；字符串字面量中可使用 {{var}} 插值
+
+旧版条件字典 {source, op, value, var_name} 编译为同样的闭包，语义不变。
+系统状态读取较慢（Win32 调用、打开剪贴板），同一次求值中每个来源最多读取一次，
+并可在 SourceSnapshot 的快照窗口内跨多次求值复用。
+"""
+
+import ast
+import re
+from typing import Any, Callable
+from .combo_extract import compile_regex
+from .combo_template import Template, compile_template
+from .combo_values import to_number, to_text
+
+# 系统状态来源
+SOURCES = frozenset({'window_title', 'process_name', 'clipboard'})
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<num>-?\d+(?:\.\d+)?)
+      | (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|<=|>=|=~|&&|\|\||[<>()!,])
+      | (?P<src>@\w+)
+      | (?P<name>[^\W\d]\w*)
+    )
+''', re.VERBOSE)
+
+_KEYWORD_OPS = {'contains', 'startswith', 'endswith', 'matches', 'starts_with', 'ends_with'}
+_COMPARE_OPS = {'==', '!=', '<', '<=', '>', '>=', '=~'} | _KEYWORD_OPS
+_NUMERIC = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+_FUNCTIONS: dict[str, Callable[[Any], Any]] = {
+    'len': lambda v: len(v) if isinstance(v, (list, dict, str, bytes)) else len(to_text(v)),
+    'lower': lambda v: to_text(v).lower(),
+    'number': lambda v: to_number(v),
+}
+
+# 闭包签名：fn(variables, read) -> 值；read(name) 读取系统状态
+Evaluator = Callable[[dict, Callable[[str], Any]], Any]
+
+
+def truthy(value) -> bool:
+    """表达式值的真假：空文本、0、false/no/off 与空容器为假"""
+    if isinstance(value, str):
+        return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+    return bool(value)
+
+
+class Condition:
+    """编译后的条件
+
+    Attributes:
+        source: 原始表达式（旧版条件为生成的等价表达式）
+        sources: 用到的系统状态来源，为空时求值不涉及 Win32 调用
+        names: 读取的变量名（含字符串字面量中的 {{var}}）
+    """
+
+    __slots__ = ('source', 'sources', 'names', '_fn')
+
+    def __init__(self, fn: Evaluator, sources: frozenset, source: str,
+                 names: frozenset = frozenset()):
+        self._fn = fn
+        self.sources = sources
+        self.source = source
+        self.names = names
+
+    @property
+    def constant(self) -> bool:
+        """不读取任何变量和系统状态，结果在编译期即可确定"""
+        return not self.sources and not self.names
+
+    def __call__(self, variables: dict, read: Callable[[str], Any]) -> bool:
+        return truthy(self._fn(variables, read))
+
+    def __repr__(self) -> str:
+        return f'Condition({self.source!r})'
+
+
+class _Node:
+    """编译中间结果：闭包，以及字面量时的常量值"""
+
+    __slots__ = ('fn', 'const', 'is_const')
+
+    def __init__(self, fn: Evaluator, const=None, is_const: bool = False):
+        self.fn = fn
+        self.const = const
+        self.is_const = is_const
+
+
+def _constant(value) -> _Node:
+    return _Node(lambda variables, read: value, value, True)
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens: list[tuple[str, Any]] = []
+        self.sources: set[str] = set()
+        self.names: set[str] = set()
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            m = _TOKEN.match(text, pos)
+            if m is None or m.end() == pos:
+                raise ValueError(f"Invalid condition {self.text!r} at position {pos}")
+            kind = m.lastgroup
+            self.tokens.append((kind, m.group(kind)))
+            pos = m.end()
+        self.pos = 0
+
+    def peek(self) -> tuple[str, Any] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> tuple[str, Any]:
+        token = self.peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of condition {self.text!r}")
+        self.pos += 1
+        return token
+
+    def accept(self, *values: str) -> str | None:
+        token = self.peek()
+        if token is not None and token[0] in ('op', 'name') and token[1] in values:
+            self.pos += 1
+            return token[1]
+        return None
+
+    def expect(self, value: str):
+        if self.accept(value) is None:
+            raise ValueError(f"Expected {value!r} in condition {self.text!r}")
+
+    def parse(self) -> _Node:
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()[1]!r} in condition {self.text!r}")
+        return node
+
+    def parse_or(self) -> _Node:
+        node = self.parse_and()
+        while self.accept('or', '||'):
+            left, right = node.fn, self.parse_and().fn
+            node = _Node(lambda v, r, a=left, b=right: truthy(a(v, r)) or truthy(b(v, r)))
+        return node
+
+    def parse_and(self) -> _Node:
+        node = self.parse_not()
+        while self.accept('and', '&&'):
+            left, right = node.fn, self.parse_not().fn
+            node = _Node(lambda v, r, a=left, b=right: truthy(a(v, r)) and truthy(b(v, r)))
+        return node
+
+    def parse_not(self) -> _Node:
+        if self.accept('not', '!'):
+            inner = self.parse_not().fn
+            return _Node(lambda v, r: not truthy(inner(v, r)))
+        return self.parse_compare()
+
+    def parse_compare(self) -> _Node:
+        left = self.parse_primary()
+        token = self.peek()
+        if token is None or token[1] not in _COMPARE_OPS:
+            return left
+        self.pos += 1
+        return compare(left, token[1], self.parse_primary())
+
+    def parse_primary(self) -> _Node:
+        kind, value = self.take()
+        if kind == 'num':
+            return _constant(float(value) if '.' in value else int(value))
+        if kind == 'str':
+            return _text(ast.literal_eval(value), self.names)
+        if kind == 'src':
+            name = value[1:]
+            if name not in SOURCES:
+                raise ValueError(f"Unknown source {value!r} in condition {self.text!r}")
+            self.sources.add(name)
+            return _Node(lambda v, read: read(name))
+        if kind == 'op' and value == '(':
+            node = self.parse_or()
+            self.expect(')')
+            return node
+        if kind == 'name':
+            lowered = value.lower()
+            if lowered in ('true', 'false'):
+                return _constant(lowered == 'true')
+            if lowered in ('null', 'none'):
+                return _constant(None)
+            if value in _FUNCTIONS and self.accept('('):
+                arg = self.parse_or().fn
+                self.expect(')')
+                func = _FUNCTIONS[value]
+                return _Node(lambda v, r: func(arg(v, r)))
+            self.names.add(value)
+            return _Node(lambda variables, read: variables.get(value))
+        raise ValueError(f"Unexpected {value!r} in condition {self.text!r}")
+
+
+def _text(value: str, names: set) -> _Node:
+    """字符串字面量：含 {{var}} 时运行期渲染，引用的变量记入 names"""
+    compiled = compile_template(value)
+    if type(compiled) is Template:
+        names.update(compiled.names)
+        return _Node(lambda variables, read: compiled.render(variables))
+    return _constant(compiled)
+
+
+def _is_number(value) -> bool:
+    t = type(value)
+    return t is int or t is float
+
+
+def _equals(a, b) -> bool:
+    if _is_number(a) or _is_number(b):
+        x, y = to_number(a), to_number(b)
+        if x is not None and y is not None:
+            return x == y
+    return to_text(a).lower() == to_text(b).lower()
+
+
+def _contains(container, needle: str) -> bool:
+    """needle 已小写"""
+    if isinstance(container, list):
+        return any(to_text(item).lower() == needle for item in container)
+    if isinstance(container, dict):
+        return any(str(key).lower() == needle for key in container)
+    return needle in to_text(container).lower()
+
+
+def _text_equals(a, b) -> bool:
+    return to_text(a).lower() == to_text(b).lower()
+
+
+def compare(left: _Node, op: str, right: _Node, text_only: bool = False) -> _Node:
+    """编译比较；右侧为字面量时预先完成小写、数值解析与正则编译
+
+    Args:
+        text_only: 旧版语义，== 与 contains 一律按文本比较
+    """
+    a = left.fn
+    if op in ('==', '!='):
+        equals = _text_equals if text_only else _equals
+        if right.is_const:
+            const = right.const
+            fn = lambda v, r: equals(a(v, r), const)  # noqa: E731
+        else:
+            b = right.fn
+            fn = lambda v, r: equals(a(v, r), b(v, r))  # noqa: E731
+        if op == '!=':
+            inner = fn
+            fn = lambda v, r: not inner(v, r)  # noqa: E731
+        return _Node(fn)
+    if op in _NUMERIC:
+        cmp = _NUMERIC[op]
+        b = right.fn
+
+        def numeric(v, r):
+            x, y = to_number(a(v, r)), to_number(b(v, r))
+            return x is not None and y is not None and cmp(x, y)
+        return _Node(numeric)
+    if op in ('matches', '=~'):
+        if right.is_const:
+            pattern = compile_regex(to_text(right.const))
+            return _Node(lambda v, r: pattern.search(to_text(a(v, r))) is not None)
+        b = right.fn
+        return _Node(lambda v, r: compile_regex(to_text(b(v, r))).search(to_text(a(v, r)))
+                     is not None)
+    # contains / startswith / endswith：字面量一侧编译期小写
+    if right.is_const:
+        needle = to_text(right.const).lower()
+        b = lambda v, r: needle  # noqa: E731
+    else:
+        b_raw = right.fn
+        b = lambda v, r: to_text(b_raw(v, r)).lower()  # noqa: E731
+    if op == 'contains':
+        if text_only:
+            return _Node(lambda v, r: b(v, r) in to_text(a(v, r)).lower())
+        return _Node(lambda v, r: _contains(a(v, r), b(v, r)))
+    if op in ('startswith', 'starts_with'):
+        return _Node(lambda v, r: to_text(a(v, r)).lower().startswith(b(v, r)))
+    return _Node(lambda v, r: to_text(a(v, r)).lower().endswith(b(v, r)))
+
+
+def compile_expression(text: str) -> Condition:
+    """编译条件表达式
+
+    Raises:
+        ValueError: 语法错误或未知来源
+    """
+    parser = _Parser(text)
+    if not parser.tokens:
+        return Condition(lambda v, r: True, frozenset(), text)
+    node = parser.parse()
+    return Condition(node.fn, frozenset(parser.sources), text, frozenset(parser.names))
+
+
+# 旧版条件字典的操作符 → 表达式操作符
+_LEGACY_OPS = {
+    'contains': 'contains',
+    'equals': '==',
+    'starts_with': 'startswith',
+    'gt': '>',
+    'ge': '>=',
+    'lt': '<',
+    'le': '<=',
+}
+
+
+def compile_legacy(cond: dict) -> Condition:
+    """编译旧版条件字典 {source, op, value, var_name}
+
+    旧版语义：当前值与比较值都转为小写后比较，未知来源视为空文本，未知操作符恒为假。
+    """
+    source = cond.get('source', '')
+    op = cond.get('op', 'contains')
+    value = cond.get('value', '')
+    names: set[str] = set()
+    if source in SOURCES:
+        left = _Node(lambda v, read: read(source))
+        sources = frozenset({source})
+        label = f'@{source}'
+    elif source == 'variable':
+        name = cond.get('var_name', '')
+        names.add(name)
+        left = _Node(lambda variables, read: variables.get(name, ''))
+        sources = frozenset()
+        label = name
+    else:
+        left = _constant('')
+        sources = frozenset()
+        label = '""'
+    right = _text(str(value), names)
+    if op == 'not_contains':
+        inner = compare(left, 'contains', right, text_only=True).fn
+        fn = lambda v, r: not inner(v, r)  # noqa: E731
+    elif op in _LEGACY_OPS:
+        fn = compare(left, _LEGACY_OPS[op], right, text_only=True).fn
+    else:
+        fn = lambda v, r: False  # noqa: E731
+    return Condition(fn, sources, f'{label} {op} {value!r}', frozenset(names))
+
+
+def compile_condition(cond) -> Condition:
+    """编译步骤的 condition 字段：表达式字符串、{expr: ...} 或旧版条件字典"""
+    if isinstance(cond, Condition):
+        return cond
+    if isinstance(cond, str):
+        return compile_expression(cond)
+    cond = cond or {}
+    if 'expr' in cond:
+        return compile_expression(str(cond['expr']))
+    return compile_legacy(cond)
+
+
+class SourceSnapshot:
+    """系统状态读取的快照
+
+    每次求值开始时调用 begin()：同一次求值内每个来源只读取一次；
+    window > 0 时，距上次读取不超过 window 秒的值在后续求值中直接复用。
+
+    Args:
+        readers: 来源名 → 读取函数
+        clock: 提供 now() 的时钟
+        window: 快照窗口（秒）
+    """
+
+    def __init__(self, readers: dict[str, Callable[[], Any]], clock, window: float = 0.0):
+        self._readers = readers
+        self._clock = clock
+        self.window = window
+        self._cache: dict[str, tuple[Any, float, int]] = {}
+        self._tick = 0
+        self.reads = 0
+        self.hits = 0
+
+    def begin(self) -> Callable[[str], Any]:
+        """开始新的求值周期，返回本周期的读取函数"""
+        self._tick += 1
+        return self.read
+
+    def read(self, name: str):
+        entry = self._cache.get(name)
+        if entry is not None and (entry[2] == self._tick or (
+                self.window > 0 and self._clock.now() - entry[1] <= self.window)):
+            self.hits += 1
+            return entry[0]
+        reader = self._readers.get(name)
+        value = reader() if reader is not None else ''
+        self.reads += 1
+        self._cache[name] = (value, self._clock.now(), self._tick)
+        return value
+
+    def invalidate(self):
+        self._cache.clear()
@@ -0,0 +1,209 @@
+"""数据提取 — json_extract / regex_extract 使用的路径解析与缓存
+
+JSONPath 与正则按表达式缓存编译结果（LRU），同一段响应文本只解析一次：
+轮询流程每隔几秒解析结构相同的响应时，不再重复编译表达式和解析 JSON。
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+# 编译缓存容量（表达式条数）
+PATTERN_CACHE_SIZE = 256
+# 已解析 JSON 文档的缓存容量（响应条数）
+DOCUMENT_CACHE_SIZE = 16
+
+_PATH_TOKEN = re.compile(r'''
+    \.\.(?P<desc>[\w-]+|\*)                      # ..name  递归查找
+  | \.(?P<key>[\w-]+)                            # .name
+  | \.\*                                         # .*
+  | \[\s*(?:
+        (?P<index>-?\d+)                         # [0] [-1]
+      | '(?P<sq>[^']*)' | "(?P<dq>[^"]*)"        # ['name'] ["name"]
+      | \*                                       # [*]
+    )\s*\]
+''', re.VERBOSE)
+
+_KEY = 'key'
+_INDEX = 'index'
+_WILD = 'wild'
+_DESCEND = 'descend'
+
+
+class JsonPath:
+    """编译后的 JSONPath（子集）
+
+    支持 $、.name、['name']、[n]（负数从末尾计）、[*] / .*、..name 递归查找。
+    省略开头的 $ 时按 $.path 处理，如 data.items[0].id。
+    """
+
+    __slots__ = ('source', 'steps')
+
+    def __init__(self, source: str):
+        self.source = source
+        expr = source.strip()
+        if expr.startswith('$'):
+            expr = expr[1:]
+        elif expr and expr[0] != '[':
+            expr = '.' + expr
+        steps: list[tuple[str, Any]] = []
+        pos = 0
+        while pos < len(expr):
+            m = _PATH_TOKEN.match(expr, pos)
+            if m is None:
+                raise ValueError(f"Invalid JSON path {source!r} at position {pos}")
+            if m.group('desc') is not None:
+                name = m.group('desc')
+                steps.append((_DESCEND, None if name == '*' else name))
+            elif m.group('key') is not None:
+                steps.append((_KEY, m.group('key')))
+            elif m.group('index') is not None:
+                steps.append((_INDEX, int(m.group('index'))))
+            elif m.group('sq') is not None or m.group('dq') is not None:
+                steps.append((_KEY, m.group('sq') if m.group('sq') is not None else m.group('dq')))
+            else:
+                steps.append((_WILD, None))
+            pos = m.end()
+        self.steps: tuple[tuple[str, Any], ...] = tuple(steps)
+
+    def find(self, document) -> list:
+        """返回全部匹配值（按文档顺序）"""
+        nodes = [document]
+        for kind, arg in self.steps:
+            found = []
+            for node in nodes:
+                if kind == _KEY:
+                    if isinstance(node, dict):
+                        if arg in node:
+                            found.append(node[arg])
+                    elif isinstance(node, list) and arg.isdigit() and int(arg) < len(node):
+                        found.append(node[int(arg)])
+                elif kind == _INDEX:
+                    if isinstance(node, list) and -len(node) <= arg < len(node):
+                        found.append(node[arg])
+                elif kind == _WILD:
+                    if isinstance(node, dict):
+                        found.extend(node.values())
+                    elif isinstance(node, list):
+                        found.extend(node)
+                else:
+                    _descend(node, arg, found)
+            nodes = found
+            if not nodes:
+                break
+        return nodes
+
+    def __repr__(self) -> str:
+        return f'JsonPath({self.source!r})'
+
+
+def _descend(node, name: str | None, found: list):
+    """递归收集所有层级下名为 name 的字段（name 为 None 时收集全部后代）"""
+    if isinstance(node, dict):
+        children = node.values()
+        if name is not None and name in node:
+            found.append(node[name])
+    elif isinstance(node, list):
+        children = node
+    else:
+        return
+    for child in children:
+        if name is None:
+            found.append(child)
+        _descend(child, name, found)
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_json_path(source: str) -> JsonPath:
+    """编译 JSONPath（带 LRU 缓存）
+
+    Raises:
+        ValueError: 路径语法错误
+    """
+    return JsonPath(str(source))
+
+
+_REGEX_FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_regex(pattern: str, flags: str = '') -> re.Pattern:
+    """编译正则（带 LRU 缓存），flags 为 i/m/s/x 的组合
+
+    Raises:
+        ValueError: 正则或标志无效
+    """
+    bits = 0
+    for ch in flags:
+        if ch not in _REGEX_FLAGS:
+            raise ValueError(f"Unknown regex flag {ch!r}")
+        bits |= _REGEX_FLAGS[ch]
+    try:
+        return re.compile(pattern, bits)
+    except re.error as e:
+        raise ValueError(f"Invalid regex {pattern!r}: {e}") from e
+
+
+class DocumentCache:
+    """已解析 JSON 文档的 LRU 缓存，以响应文本为键
+
+    CPython 的 str 会缓存自身哈希，同一响应字符串再次查找只需一次比较。
+    解析结果在多个步骤间共享，调用方不得原地修改。
+    """
+
+    def __init__(self, max_entries: int = DOCUMENT_CACHE_SIZE):
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, text: str):
+        """解析 JSON 文本
+
+        Raises:
+            ValueError: 不是合法 JSON
+        """
+        with self._lock:
+            if text in self._entries:
+                self._entries.move_to_end(text)
+                self.hits += 1
+                return self._entries[text]
+        document = json.loads(text)
+        with self._lock:
+            self.misses += 1
+            self._entries[text] = document
+            if len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+        return document
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+documents = DocumentCache()
+
+
+def regex_result(m: re.Match, group):
+    """按 group（序号或组名）取匹配文本，group 为空时有分组取第 1 组，否则取整体"""
+    if group in (None, ''):
+        return (m.group(1) or '') if m.re.groups else m.group(0)
+    if isinstance(group, str) and group.isdigit():
+        group = int(group)
+    value = m.group(group)
+    return '' if value is None else value
+
+
+def cache_stats() -> dict:
+    """表达式编译缓存与文档缓存的命中统计"""
+    paths = compile_json_path.cache_info()
+    patterns = compile_regex.cache_info()
+    return {
+        'json_paths': {'entries': paths.currsize, 'hits': paths.hits, 'misses': paths.misses},
+        'regex': {'entries': patterns.currsize, 'hits': patterns.hits, 'misses': patterns.misses},
+        'documents': documents.stats(),
+    }
@@ -0,0 +1,107 @@
+"""流程文件读写 — 按行/按块流式读取与运行期复用的追加句柄
+
+for_each_line / for_each_chunk 通过生成器逐项读取文件，内存占用与文件大小无关；
+file_write 的追加模式在一次运行内复用已打开的句柄，避免循环中每次写入都重新打开文件。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import IO, Iterator
+from ..utils.logger import get_logger
+
+logger = get_logger('combo_files')
+
+# 单次运行最多保持打开的追加句柄数，超出时关闭最久未用的句柄
+MAX_APPEND_HANDLES = 16
+
+
+def iter_lines(path: str, encoding: str = 'utf-8') -> Iterator[str]:
+    """逐行读取文本文件（去掉行尾换行符），读取失败时记录警告并结束迭代"""
+    try:
+        with open(path, encoding=encoding) as f:
+            for line in f:
+                yield line[:-1] if line.endswith('\n') else line
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning(f"Failed to read file {path}: {e}")
+
+
+def iter_chunks(path: str, encoding: str = 'utf-8', size: int = 4096) -> Iterator[str]:
+    """按固定字符数分块读取文本文件，读取失败时记录警告并结束迭代"""
+    size = max(1, size)
+    try:
+        with open(path, encoding=encoding) as f:
+            while chunk := f.read(size):
+                yield chunk
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning(f"Failed to read file {path}: {e}")
+
+
+class AppendHandles:
+    """单次运行内的追加写句柄缓存
+
+    并行分支共享同一个 run，写入在锁内完成。缓冲的内容在运行结束、
+    同一运行读取或覆盖该文件、以及执行外部动作（shell 等）前写回磁盘。
+    """
+
+    def __init__(self, max_handles: int = MAX_APPEND_HANDLES):
+        self._handles: OrderedDict[str, tuple[IO, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max = max_handles
+        self.opened = 0
+        self.writes = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def write(self, path: str, content: str, encoding: str = 'utf-8'):
+        """追加写入，编码变化时重新打开句柄"""
+        key = self._key(path)
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and entry[1] != encoding:
+                self._handles.pop(key)[0].close()
+                entry = None
+            if entry is None:
+                entry = (open(path, 'a', encoding=encoding), encoding)
+                self.opened += 1
+                self._handles[key] = entry
+                if len(self._handles) > self._max:
+                    self._close_entry(self._handles.popitem(last=False))
+            else:
+                self._handles.move_to_end(key)
+            entry[0].write(content)
+            self.writes += 1
+
+    def release(self, path: str):
+        """关闭指定文件的句柄（读取或覆盖该文件前调用）"""
+        with self._lock:
+            entry = self._handles.pop(self._key(path), None)
+            if entry is not None:
+                self._close_entry((path, entry))
+
+    def flush(self):
+        """把所有缓冲内容写回磁盘，句柄保持打开"""
+        with self._lock:
+            for key, (f, _) in self._handles.items():
+                try:
+                    f.flush()
+                except OSError as e:
+                    logger.error(f"Failed to flush file {key}: {e}")
+
+    def close(self):
+        with self._lock:
+            while self._handles:
+                self._close_entry(self._handles.popitem(last=False))
+
+    @staticmethod
+    def _close_entry(item: tuple[str, tuple[IO, str]]):
+        key, (f, _) = item
+        try:
+            f.close()
+        except OSError as e:
+            logger.error(f"Failed to write file {key}: {e}")
+
+    def __bool__(self) -> bool:
+        return bool(self._handles)
@@ -0,0 +1,135 @@
+"""子流程库 — call_flow 步骤按动作 id 查找被调用流程，并按内容哈希缓存编译计划
+
+编译计划以 (id, 内容哈希) 为键：动作被编辑（invalidate）或 steps 被整体替换后重新哈希，
+内容未变时复用原计划；内容相同的不同动作共享同一份计划。
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable
+from ..utils.logger import get_logger
+from .combo_plan import ComboPlan, PlanCompiler
+
+logger = get_logger('combo_library')
+
+# 默认的子流程调用深度上限
+DEFAULT_MAX_DEPTH = 8
+
+# 最多缓存的计划数（按内容哈希）
+MAX_PLANS = 256
+
+# 参与内容哈希的动作字段（影响编译结果的部分）
+_PLAN_FIELDS = ('steps', 'delay', 'fuse_input', 'optimize')
+
+
+def content_hash(action: dict) -> str:
+    """动作中影响编译结果部分的哈希"""
+    payload = {k: action.get(k) for k in _PLAN_FIELDS}
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class FlowLibrary:
+    """可被 call_flow 调用的 combo 流程
+
+    Args:
+        pages: 返回 launcher 页面列表的函数，动作从各页面的 actions 中按 id 查找
+    """
+
+    def __init__(self, pages: Callable[[], list] = None, max_plans: int = MAX_PLANS):
+        self._pages = pages
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] | None = None  # id → 动作，首次查找时构建
+        self._source: list | None = None  # 构建索引时的页面列表
+        self._hashes: dict[str, tuple[object, str]] = {}  # id → (steps 对象, 内容哈希)
+        self._plans: OrderedDict[str, ComboPlan] = OrderedDict()  # 内容哈希 → 计划
+        self._max_plans = max_plans
+        self.hits = 0
+        self.compiles = 0
+
+    def set_pages(self, pages: Callable[[], list]):
+        """设置页面来源并清空索引"""
+        self._pages = pages
+        self.invalidate()
+
+    def find(self, action_id: str) -> dict | None:
+        """按 id 查找 combo 动作
+
+        索引与构建时的页面列表绑定：保存配置会整体替换配置字典，
+        页面列表换了对象即重建，删除或替换的流程不会再被调用。
+        """
+        pages = (self._pages() if self._pages else None) or []
+        with self._lock:
+            if self._index is None or pages is not self._source:
+                self._rebuild(pages)
+            action = self._index.get(action_id)
+            if action is None:
+                # 原地新增的动作不会触发失效，未命中时重建一次索引
+                self._rebuild(pages)
+                action = self._index.get(action_id)
+        return action if action and action.get('type') == 'combo' else None
+
+    def _rebuild(self, pages: list):
+        self._index = self._build_index(pages)
+        self._source = pages
+
+    @staticmethod
+    def _build_index(pages: list) -> dict[str, dict]:
+        index = {}
+        for page in pages:
+            for action in page.get('actions', []) or ():
+                if action and action.get('id'):
+                    index.setdefault(action['id'], action)
+        return index
+
+    def plan(self, action_id: str, compiler: PlanCompiler) -> ComboPlan | None:
+        """获取被调用流程的编译计划，动作不存在时返回 None"""
+        action = self.find(action_id)
+        if action is None:
+            return None
+        steps = action.get('steps')
+        with self._lock:
+            known = self._hashes.get(action_id)
+            digest = known[1] if known is not None and known[0] is steps else None
+        if digest is None:
+            digest = content_hash(action)
+        with self._lock:
+            self._hashes[action_id] = (steps, digest)
+            plan = self._plans.get(digest)
+            if plan is not None:
+                self._plans.move_to_end(digest)
+                self.hits += 1
+                return plan
+        plan = compiler.compile(action)
+        with self._lock:
+            self.compiles += 1
+            self._plans[digest] = plan
+            if len(self._plans) > self._max_plans:
+                self._plans.popitem(last=False)
+        logger.debug(f"Compiled callee {action_id} ({digest[:8]})")
+        return plan
+
+    def invalidate(self, action_id: str = None):
+        """动作被编辑后使其失效，None 表示全部失效
+
+        计划按内容哈希保存，编辑后内容变化自然生成新键；这里丢弃 id 的索引与哈希，
+        下次调用时重新查找动作并计算哈希。
+        """
+        with self._lock:
+            self._index = None
+            if action_id is None:
+                self._hashes.clear()
+                self._plans.clear()
+            else:
+                self._hashes.pop(action_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'flows': len(self._index) if self._index is not None else None,
+                'plans': len(self._plans),
+                'hits': self.hits,
+                'compiles': self.compiles,
+            }
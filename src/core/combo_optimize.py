@@ -0,0 +1,603 @@
+"""流程优化 — 执行前改写 steps，行为不变但执行的步骤更少
+
+按需启用（动作的 optimize 字段），各优化项可单独开关：
+
+- fold_constants: 常量 set_var 的值代入后续字段，删除重复赋值和被覆盖前未读取的赋值
+- prune_branches: 条件为常量的 if 直接展开为命中分支，删除不会执行的循环
+- merge_delays: 相邻 delay 合并为一个（补上原来的步骤间隔，总时长不变）
+- drop_redundant_moves: 删除紧接在同坐标点击/滚动前、或与上一步坐标相同的 mouse_move
+- hoist_invariants: 固定次数循环中与迭代无关的 set_var 提到循环前只执行一次
+
+改写只作用于源 steps 字典，不修改输入；结果仍由 PlanCompiler 编译。
+被删除的步骤同时去掉了它前面的步骤间隔，估算时长会相应减少。
+"""
+
+import re
+from collections import Counter
+from typing import Any, Iterable
+from ..utils.logger import get_logger
+from .combo_expr import compile_condition
+from .combo_template import VAR_PATTERN
+from .combo_values import coerce, to_text
+
+logger = get_logger('combo_optimize')
+
+# 全部优化项（按执行顺序）
+OPTIMIZER_PASSES = (
+    'fold_constants', 'prune_branches', 'merge_delays', 'drop_redundant_moves',
+    'hoist_invariants',
+)
+
+# 点击/滚动处理器自带移动，前面同坐标的 mouse_move 可省略
+_MOVING_STEPS = frozenset({'mouse_click', 'mouse_double_click', 'mouse_scroll'})
+_POSITION_STEPS = _MOVING_STEPS | {'mouse_move'}
+
+# 处理器内部固定的等待（毫秒），用于估算
+_HANDLER_MS = {'mouse_click': 50, 'mouse_double_click': 110, 'mouse_scroll': 50}
+
+# 结果写入 {var}、{var}_x、{var}_y 的匹配步骤
+_MATCH_STEPS = frozenset({'find_image', 'wait_region'})
+
+# 逐项遍历的步骤：写入 item_var 与 _loop_index
+_ITEM_STEPS = frozenset({'parallel_for_each', 'for_each_line', 'for_each_chunk'})
+
+_WAIT_STEPS = frozenset({'wait_window', 'wait_pixel', 'wait_region', 'http_request'})
+
+_WHOLE = re.compile(r'\{\{(\w+)\}\}')
+
+
+def resolve_passes(option) -> tuple[str, ...]:
+    """解析动作的 optimize 字段
+
+    true / "all" 启用全部；列表或逗号分隔字符串启用其中各项；
+    字典在全部启用的基础上按名称开关（{merge_delays: false}）。
+    """
+    if not option:
+        return ()
+    if option is True:
+        return OPTIMIZER_PASSES
+    if isinstance(option, str):
+        if option.strip().lower() in ('all', 'true', 'yes', 'on', '1'):
+            return OPTIMIZER_PASSES
+        option = [s.strip() for s in option.split(',') if s.strip()]
+    if isinstance(option, dict):
+        names = set(option)
+        enabled = {n for n in OPTIMIZER_PASSES if option.get(n, True)}
+    else:
+        names = {str(n) for n in option}
+        enabled = names
+    unknown = names.difference(OPTIMIZER_PASSES)
+    if unknown:
+        logger.warning(f"Unknown optimizer passes: {', '.join(sorted(unknown))}")
+    return tuple(n for n in OPTIMIZER_PASSES if n in enabled)
+
+
+def optimize_flow(steps: list, delay_ms: float = 500,
+                  passes: Iterable[str] = OPTIMIZER_PASSES) -> tuple[list, dict]:
+    """优化 steps 列表
+
+    Args:
+        steps: 源步骤列表（不会被修改）
+        delay_ms: 动作的步骤间隔（毫秒），合并 delay 与估算时使用
+        passes: 启用的优化项
+
+    Returns:
+        (优化后的步骤列表, 报告)，报告含启用项、各项改写次数与前后的步骤数/估算时长
+    """
+    steps = list(steps or ())
+    optimizer = _Optimizer(passes, delay_ms)
+    optimized = optimizer.block(steps, {})
+    return optimized, {
+        'passes': list(optimizer.passes),
+        'changes': {n: optimizer.changes[n] for n in optimizer.passes},
+        'before': estimate(steps, delay_ms),
+        'after': estimate(optimized, delay_ms),
+    }
+
+
+# ── 变量读写分析 ──
+
+def _blocks(step: dict) -> list[list]:
+    """步骤的全部嵌套步骤列表"""
+    from .combo_plan import STEP_BLOCKS, STEP_BRANCHES
+    stype = step.get('type', '')
+    if stype in STEP_BRANCHES:
+        return [b or [] for b in step.get(STEP_BRANCHES[stype]) or ()]
+    return [step.get(key) or [] for key in STEP_BLOCKS.get(stype, ())]
+
+
+def _text_names(value, names: set):
+    if isinstance(value, str):
+        if '{{' in value:
+            names.update(VAR_PATTERN.findall(value))
+    elif isinstance(value, dict):
+        for v in value.values():
+            _text_names(v, names)
+    elif isinstance(value, list):
+        for v in value:
+            _text_names(v, names)
+
+
+def step_reads(step: dict) -> set[str] | None:
+    """步骤（含嵌套）读取的变量名，条件无法解析时返回 None（视为读取全部）"""
+    from .combo_plan import STEP_BLOCKS, STEP_BRANCHES
+    stype = step.get('type', '')
+    nested = set(STEP_BLOCKS.get(stype, ()))
+    if stype in STEP_BRANCHES:
+        nested.add(STEP_BRANCHES[stype])
+    names: set[str] = set()
+    for key, value in step.items():
+        if key in nested or key == 'condition':
+            continue
+        _text_names(value, names)
+    for key in ('source_var', 'list_var'):
+        if step.get(key):
+            names.add(str(step[key]))
+    if 'condition' in step:
+        try:
+            names.update(compile_condition(step['condition']).names)
+        except ValueError:
+            return None
+    for block in _blocks(step):
+        for child in block:
+            if isinstance(child, dict):
+                reads = step_reads(child)
+                if reads is None:
+                    return None
+                names |= reads
+    return names
+
+
+def step_writes(step: dict) -> set[str]:
+    """步骤（含嵌套）可能写入的变量名"""
+    from .combo_plan import _returns
+    stype = step.get('type', '')
+    writes: set[str] = set()
+    var = step.get('var')
+    if stype == 'set_var':
+        var = step.get('name')
+    if var:
+        writes.add(str(var))
+        if stype in _MATCH_STEPS:
+            writes.update((f'{var}_x', f'{var}_y'))
+    if stype == 'http_request':
+        writes.update(str(step[k]) for k in ('status_var', 'headers_var') if step.get(k))
+    elif stype == 'call_flow':
+        writes.update(target for _, target in _returns(step.get('returns')))
+    elif stype == 'loop':
+        writes.add('_loop_index')
+    elif stype in _ITEM_STEPS:
+        writes.update(('_loop_index', str(step.get('item_var') or _default(stype, 'item_var'))))
+    for block in _blocks(step):
+        for child in block:
+            if isinstance(child, dict):
+                writes |= step_writes(child)
+    return writes
+
+
+def _default(stype: str, field: str):
+    from .combo_plan import STEP_FIELDS
+    for name, default, _, _ in STEP_FIELDS.get(stype, ()):
+        if name == field:
+            return default
+    return None
+
+
+def _forget(known: dict, names: Iterable[str]):
+    for name in names:
+        known.pop(name, None)
+
+
+def _constant(value) -> Any:
+    """字段值为编译期常量时返回该值，含占位符返回 None"""
+    if isinstance(value, str):
+        return None if '{{' in value else value
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
+
+def _as_int(value) -> int | None:
+    value = _constant(value)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _no_source(name: str):
+    return ''
+
+
+class _Optimizer:
+    """单次优化：按作用域遍历步骤，known 记录当前位置已确定的常量变量"""
+
+    def __init__(self, passes: Iterable[str], delay_ms: float):
+        enabled = set(passes)
+        self.passes = tuple(n for n in OPTIMIZER_PASSES if n in enabled)
+        self.delay_ms = delay_ms
+        self.changes: Counter = Counter()
+        self.fold = 'fold_constants' in enabled
+        self.prune = 'prune_branches' in enabled
+        self.hoist = 'hoist_invariants' in enabled
+
+    def block(self, steps: list, known: dict) -> list:
+        """优化一个步骤列表，known 更新为列表执行完后的状态"""
+        result = []
+        for step in steps:
+            if not isinstance(step, dict) or not step:
+                result.append(step)
+                continue
+            if self.fold and known:
+                step = self.substitute(step, known)
+            stype = step.get('type', '')
+            if stype == 'set_var':
+                if self.assign(step, known):
+                    continue
+            elif stype == 'if_condition':
+                taken = self.condition_value(step, known) if self.prune else None
+                if taken is not None:
+                    self.changes['prune_branches'] += 1
+                    result.extend(self.block(step.get('then_steps' if taken else 'else_steps')
+                                             or [], known))
+                    continue
+                step = self.nested(step, known, loop=False)
+            elif stype == 'loop':
+                if self.prune and self.loop_skipped(step, known):
+                    self.changes['prune_branches'] += 1
+                    continue
+                step = self.nested(step, known, loop=True)
+                if self.hoist:
+                    hoisted, step = self.hoist_loop(step)
+                    result.extend(hoisted)
+            elif _blocks(step):
+                step = self.nested(step, known, loop=stype in _ITEM_STEPS)
+            else:
+                _forget(known, step_writes(step))
+            result.append(step)
+        if self.fold:
+            result = self.drop_dead_stores(result)
+        if 'merge_delays' in self.passes:
+            result = self.merge_delays(result)
+        if 'drop_redundant_moves' in self.passes:
+            result = self.drop_moves(result)
+        return result
+
+    def nested(self, step: dict, known: dict, loop: bool) -> dict:
+        """优化嵌套块：循环体在清除体内写入的变量后遍历，分支各自从当前状态开始"""
+        from .combo_plan import STEP_BLOCKS, STEP_BRANCHES
+        writes = step_writes(step)
+        stype = step.get('type', '')
+        if loop:
+            _forget(known, writes)
+        if stype in STEP_BRANCHES:
+            key = STEP_BRANCHES[stype]
+            step = {**step, key: [self.block(b or [], dict(known))
+                                  for b in step.get(key) or ()]}
+        else:
+            step = {**step, **{key: self.block(step.get(key) or [], dict(known))
+                               for key in STEP_BLOCKS.get(stype, ()) if key in step}}
+        _forget(known, writes)
+        return step
+
+    # ── fold_constants ──
+
+    def substitute(self, step: dict, known: dict) -> dict:
+        """把已知常量代入支持插值的字段"""
+        from .combo_plan import STEP_FIELDS, compile_structure, compile_value
+        spec = STEP_FIELDS.get(step.get('type', ''))
+        if spec is None:
+            # 委托给 ActionExecutor 的步骤：所有字符串字段都会插值
+            spec = tuple((k, None, str, True) for k, v in step.items()
+                         if k != 'type' and isinstance(v, str))
+        changed = {}
+        for name, _, convert, interp in spec:
+            value = step.get(name)
+            if value is None:
+                continue
+            if convert is compile_value:
+                folded = _fold_structure(value, known, native=True)
+            elif convert is compile_structure:
+                folded = _fold_structure(value, known, native=False)
+            elif interp and isinstance(value, str):
+                folded = _fold_field(value, known, convert)
+            else:
+                continue
+            if folded != value or type(folded) is not type(value):
+                changed[name] = folded
+        if not changed:
+            return step
+        self.changes['fold_constants'] += 1
+        return {**step, **changed}
+
+    def assign(self, step: dict, known: dict) -> bool:
+        """记录 set_var 的常量值；赋值与已知值相同时返回 True（可删除）"""
+        name = step.get('name')
+        if not name:
+            return False
+        value = _constant(step.get('value', ''))
+        if value is not None and step.get('value_type'):
+            try:
+                value = coerce(value, str(step['value_type']).lower())
+            except ValueError:
+                value = None
+            value = _constant(value) if not isinstance(value, bool) else value
+        if not self.fold or value is None:
+            known.pop(name, None)
+            return False
+        if name in known and known[name] == value and type(known[name]) is type(value):
+            self.changes['fold_constants'] += 1
+            return True
+        known[name] = value
+        return False
+
+    def drop_dead_stores(self, steps: list) -> list:
+        """删除在被同名 set_var 覆盖前没有被读取的 set_var"""
+        dead = set()
+        for i, step in enumerate(steps):
+            if not isinstance(step, dict) or step.get('type') != 'set_var' or not step.get('name'):
+                continue
+            name = step['name']
+            for later in steps[i + 1:]:
+                if not isinstance(later, dict):
+                    continue
+                reads = step_reads(later)
+                if reads is None or name in reads:
+                    break
+                if later.get('type') == 'set_var' and later.get('name') == name:
+                    dead.add(i)
+                    break
+        if not dead:
+            return steps
+        self.changes['fold_constants'] += len(dead)
+        return [s for i, s in enumerate(steps) if i not in dead]
+
+    # ── prune_branches ──
+
+    def condition_value(self, step: dict, known: dict) -> bool | None:
+        """条件只依赖已知常量时返回其结果，否则返回 None"""
+        try:
+            cond = compile_condition(step.get('condition'))
+        except ValueError:
+            return None
+        if cond.sources or not cond.names <= known.keys():
+            return None
+        return bool(cond(known, _no_source))
+
+    def loop_skipped(self, step: dict, known: dict) -> bool:
+        """循环一次都不会执行"""
+        if _as_int(step.get('max_iterations', 100)) == 0:
+            return True
+        mode = step.get('mode', 'count')
+        if mode == 'count':
+            count = _as_int(step.get('count', 1))
+            return count is not None and count <= 0
+        if mode == 'while_condition':
+            return self.condition_value(step, known) is False
+        return False
+
+    # ── hoist_invariants ──
+
+    def hoist_loop(self, step: dict) -> tuple[list, dict]:
+        """把固定次数循环体中与迭代无关的 set_var 提到循环前"""
+        if step.get('mode', 'count') != 'count':
+            return [], step
+        count = _as_int(step.get('count', 1))
+        max_iter = _as_int(step.get('max_iterations', 100))
+        if count is None or max_iter is None or min(count, max_iter) < 1:
+            return [], step
+        body = list(step.get('body_steps') or ())
+        header = step_reads({k: v for k, v in step.items() if k != 'body_steps'})
+        if header is None:
+            return [], step
+        hoisted = []
+        i = 0
+        while i < len(body):
+            child = body[i]
+            if self.invariant(body, i, header):
+                hoisted.append(child)
+                del body[i]
+                continue
+            i += 1
+        if not hoisted:
+            return [], step
+        self.changes['hoist_invariants'] += len(hoisted)
+        return hoisted, {**step, 'body_steps': body}
+
+    @staticmethod
+    def invariant(body: list, index: int, header: set) -> bool:
+        step = body[index]
+        if not isinstance(step, dict) or step.get('type') != 'set_var' or not step.get('name'):
+            return False
+        name = step['name']
+        if name in header:
+            return False
+        reads = step_reads(step)
+        if reads is None:
+            return False
+        writes = {'_loop_index'}
+        for j, other in enumerate(body):
+            if j == index or not isinstance(other, dict):
+                continue
+            other_writes = step_writes(other)
+            if name in other_writes:
+                return False
+            writes |= other_writes
+            if j < index:
+                # 第一次迭代中，前面的步骤读到的是循环前的值
+                other_reads = step_reads(other)
+                if other_reads is None or name in other_reads:
+                    return False
+        return not reads & writes and name not in reads
+
+    # ── merge_delays / drop_redundant_moves ──
+
+    def merge_delays(self, steps: list) -> list:
+        """合并相邻的固定时长 delay，合并后的时长包含原来的步骤间隔"""
+        result = []
+        for step in steps:
+            ms = _delay_ms(step)
+            prev = _delay_ms(result[-1]) if result and ms is not None else None
+            if prev is not None:
+                total = prev + self.delay_ms + ms
+                result[-1] = {**result[-1], 'ms': int(total) if total == int(total) else total}
+                self.changes['merge_delays'] += 1
+                continue
+            result.append(step)
+        return result
+
+    def drop_moves(self, steps: list) -> list:
+        result = []
+        for i, step in enumerate(steps):
+            if _is_type(step, 'mouse_move'):
+                nxt = steps[i + 1] if i + 1 < len(steps) else None
+                prev = result[-1] if result else None
+                if ((_is_type(nxt, *_MOVING_STEPS) and _position(nxt) == _position(step))
+                        or (_is_type(prev, *_POSITION_STEPS)
+                            and _position(prev) == _position(step))):
+                    self.changes['drop_redundant_moves'] += 1
+                    continue
+            result.append(step)
+        return result
+
+
+def _fold_text(text: str, known: dict) -> str:
+    if '{{' not in text:
+        return text
+    return VAR_PATTERN.sub(
+        lambda m: to_text(known[m.group(1)]) if m.group(1) in known else m.group(0), text)
+
+
+def _fold_field(text: str, known: dict, convert):
+    """代入插值字段；整段 {{var}} 的数值字段在文本与原值转换结果一致时才代入"""
+    m = _WHOLE.fullmatch(text)
+    if m and m.group(1) in known and convert in (int, float):
+        value = known[m.group(1)]
+        try:
+            if convert(value) != convert(to_text(value)):
+                return text
+        except (TypeError, ValueError):
+            return text
+    return _fold_text(text, known)
+
+
+def _fold_structure(value, known: dict, native: bool):
+    if isinstance(value, str):
+        m = _WHOLE.fullmatch(value)
+        if native and m and m.group(1) in known:
+            return known[m.group(1)]
+        return _fold_text(value, known)
+    if isinstance(value, dict):
+        return {k: _fold_structure(v, known, native) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fold_structure(v, known, native) for v in value]
+    return value
+
+
+def _is_type(step, *types: str) -> bool:
+    return isinstance(step, dict) and step.get('type') in types
+
+
+def _position(step: dict) -> tuple[str, str]:
+    return str(step.get('x', 0)), str(step.get('y', 0))
+
+
+def _delay_ms(step) -> float | None:
+    if not _is_type(step, 'delay'):
+        return None
+    ms = _constant(step.get('ms', 1000))
+    try:
+        return float(ms) if ms is not None else None
+    except ValueError:
+        return None
+
+
+# ── 估算 ──
+
+def estimate(steps: list, delay_ms: float = 500) -> dict:
+    """估算执行的步骤数与耗时（毫秒）
+
+    steps 为静态步骤总数（含嵌套）；executed 为预计执行的步骤数，固定次数循环按次数展开，
+    while/遍历循环按一次迭代、分支按较长的一支计；等待类步骤与子流程不计耗时。
+    exact 为 False 表示结果依赖运行期数据。
+    """
+    executed, ms, exact = _estimate(steps or [], delay_ms)
+    return {
+        'steps': _static_count(steps or []),
+        'executed': executed,
+        'estimated_ms': round(ms, 1),
+        'exact': exact,
+    }
+
+
+def _static_count(steps: list) -> int:
+    total = 0
+    for step in steps:
+        if isinstance(step, dict) and step:
+            total += 1
+            for block in _blocks(step):
+                total += _static_count(block)
+    return total
+
+
+def _estimate(steps: list, gap: float) -> tuple[int, float, bool]:
+    executed = 0
+    ms = 0.0
+    exact = True
+    for step in steps:
+        if not isinstance(step, dict) or not step:
+            continue
+        if executed:
+            ms += gap
+        executed += 1
+        stype = step.get('type', '')
+        ms += _HANDLER_MS.get(stype, 0)
+        if stype == 'delay':
+            value = _delay_ms(step)
+            exact = exact and value is not None
+            ms += value or 0
+        elif stype == 'type_text':
+            text = str(step.get('text', ''))
+            try:
+                ms += len(text) * float(step.get('char_delay', 50))
+            except (TypeError, ValueError):
+                exact = False
+            exact = exact and '{{' not in text
+        elif stype == 'toast':
+            try:
+                ms += float(step.get('duration', 2000))
+            except (TypeError, ValueError):
+                exact = False
+        elif stype in _WAIT_STEPS or stype == 'call_flow':
+            exact = False
+        blocks = _blocks(step)
+        if not blocks:
+            continue
+        parts = [_estimate(b, gap) for b in blocks]
+        if stype == 'parallel':
+            executed += sum(p[0] for p in parts)
+            ms += max(p[1] for p in parts)
+            exact = exact and all(p[2] for p in parts)
+        elif stype == 'if_condition':
+            best = max(parts, key=lambda p: p[1])
+            executed += best[0]
+            ms += best[1]
+            exact = False
+        else:
+            body = parts[0]
+            times = 1
+            if stype == 'loop' and step.get('mode', 'count') == 'count':
+                count = _as_int(step.get('count', 1))
+                max_iter = _as_int(step.get('max_iterations', 100))
+                if count is not None and max_iter is not None:
+                    times = max(0, min(count, max_iter))
+                else:
+                    exact = False
+            else:
+                exact = False
+            executed += body[0] * times
+            ms += body[1] * times
+            exact = exact and body[2]
+    return executed, ms, exact
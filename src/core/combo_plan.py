@@ -0,0 +1,392 @@
+"""组合流程编译 — 将 steps 字典编译为不可变的执行计划
+
+执行前一次性完成字段读取、默认值填充、类型转换和处理器绑定，
+运行期只需按顺序调用预绑定的处理器，不再重复解析原始字典。
+"""
+
+import threading
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+from ..utils.logger import get_logger
+from .combo_expr import compile_condition
+from .combo_template import Template, compile_template
+from .combo_values import native
+from .screen_match import compile_points
+
+logger = get_logger('combo_plan')
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledStep:
+    """编译后的单个步骤
+
+    handler: 未绑定的执行器方法，调用方式 handler(executor, step, delay)
+    args: 预处理后的字段（常量或 Template）
+    blocks: 嵌套子计划（if 的 then/else，loop 的 body，parallel 的各分支）
+    """
+    type: str
+    handler: Callable
+    args: Mapping[str, Any]
+    blocks: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ComboPlan:
+    """编译后的 combo 流程
+
+    optimization: 启用优化时的报告（各优化项改写次数与前后的步骤数/估算时长）
+    """
+    steps: tuple[CompiledStep, ...]
+    delay: float
+    optimization: Mapping | None = None
+
+    @property
+    def step_count(self) -> int:
+        """计划中的步骤总数（含嵌套）"""
+        return _count_steps(self.steps)
+
+
+def _count_steps(steps: tuple) -> int:
+    total = 0
+    for step in steps:
+        # 融合步骤本身不计数，只计其合并的原始步骤
+        total += step.type != FUSED_INPUT_STEP
+        for block in step.blocks:
+            total += _count_steps(block)
+    return total
+
+
+# ── 字段转换 ──
+
+def _raw(v):
+    return v
+
+
+def _seconds(v) -> float:
+    return float(v) / 1000.0
+
+
+def _lower(v) -> str:
+    return str(v).lower()
+
+
+def _upper(v) -> str:
+    return str(v).upper()
+
+
+def _bool(v) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(v)
+
+
+def _returns(value) -> tuple[tuple[str, str], ...]:
+    """call_flow 的 returns：变量名列表（同名带回）或 {子流程变量: 调用方变量}"""
+    if not value:
+        return ()
+    if isinstance(value, dict):
+        return tuple((str(k), str(v)) for k, v in value.items())
+    if isinstance(value, str):
+        value = [v.strip() for v in value.split(',')]
+    return tuple((str(v), str(v)) for v in value if v)
+
+
+def compile_structure(value, convert: Callable = str):
+    """编译 JSON 结构（dict/list）：含占位符的字符串叶子编译为 Template，其余原样保留"""
+    if isinstance(value, str):
+        return compile_template(value, convert)
+    if isinstance(value, dict):
+        return {str(k): compile_structure(v, convert) for k, v in value.items()}
+    if isinstance(value, list):
+        return [compile_structure(v, convert) for v in value]
+    return value
+
+
+def compile_value(value):
+    """编译保留原生类型的值：整段 {{var}} 取变量原值，YAML 中的数字/列表/字典原样保留
+
+    YAML 布尔与 null 沿用旧版 str() 的文本（True/False/None），已有流程的比较结果不变；
+    需要布尔值时用 value_type: bool。
+    """
+    if value is None or type(value) is bool:
+        return str(value)
+    return compile_structure(value, native)
+
+
+# 字段规格：(字段名, 默认值, 转换函数, 是否支持 {{var}} 插值)
+STEP_FIELDS: dict[str, tuple[tuple[str, Any, Callable, bool], ...]] = {
+    'delay': (('ms', 1000, _seconds, False),),
+    'set_var': (('name', '', _raw, False), ('value', '', compile_value, False),
+                ('value_type', '', _lower, False)),
+    'get_clipboard': (('var', '', _raw, False),),
+    'set_clipboard': (('value', '', str, True),),
+    'mouse_click': (('x', 0, int, True), ('y', 0, int, True),
+                    ('button', 'left', _raw, False)),
+    'mouse_double_click': (('x', 0, int, True), ('y', 0, int, True)),
+    'mouse_move': (('x', 0, int, True), ('y', 0, int, True)),
+    'mouse_scroll': (('x', 0, int, True), ('y', 0, int, True),
+                     ('delta', -3, int, True)),
+    'wait_window': (('title', '', _lower, True), ('timeout', 5000, float, False)),
+    'wait_pixel': (('x', 0, int, False), ('y', 0, int, False),
+                   ('color', '#000000', _lower, False),
+                   ('tolerance', 10, int, False), ('timeout', 5000, float, False)),
+    'window_activate': (('title', '', _lower, True),),
+    'if_condition': (),
+    'loop': (('mode', 'count', _raw, False), ('max_iterations', 100, int, False),
+             ('count', 1, int, True)),
+    'type_text': (('text', '', str, True), ('char_delay', 50, _seconds, False),
+                  ('chunk_size', 0, int, False)),
+    'toast': (('message', '', str, True), ('duration', 2000, _seconds, False)),
+    'screenshot': (('path', '', str, True), ('x', 0, _raw, False), ('y', 0, _raw, False),
+                   ('w', 0, _raw, False), ('h', 0, _raw, False), ('var', '', _raw, False)),
+    'http_request': (('method', 'GET', _upper, False), ('url', '', str, True),
+                     ('body', '', str, True), ('timeout', 5000, _seconds, False),
+                     ('var', '', _raw, False), ('headers', None, compile_structure, False),
+                     ('json', None, compile_value, False), ('status_var', '', _raw, False),
+                     ('headers_var', '', _raw, False), ('cache', False, _bool, False),
+                     ('cache_ttl', 0, _seconds, False)),
+    'file_read': (('path', '', str, True), ('encoding', 'utf-8', _raw, False),
+                  ('var', '', _raw, False)),
+    'file_write': (('path', '', str, True), ('content', '', str, True),
+                   ('encoding', 'utf-8', _raw, False), ('mode', 'write', _raw, False)),
+    'find_image': (('image', '', str, True), ('points', None, compile_points, False),
+                   ('x', 0, int, True), ('y', 0, int, True), ('w', 0, int, True),
+                   ('h', 0, int, True), ('tolerance', 0, int, False), ('var', '', _raw, False)),
+    'wait_region': (('image', '', str, True), ('points', None, compile_points, False),
+                    ('x', 0, int, True), ('y', 0, int, True), ('w', 0, int, True),
+                    ('h', 0, int, True), ('tolerance', 0, int, False), ('var', '', _raw, False),
+                    ('timeout', 5000, float, False), ('interval', 100, _seconds, False)),
+    'json_extract': (('source_var', '', _raw, False), ('path', '$', str, True),
+                     ('var', '', _raw, False), ('all', False, _bool, False),
+                     ('default', '', compile_value, False)),
+    'regex_extract': (('source_var', '', _raw, False), ('pattern', '', str, True),
+                      ('flags', '', _lower, False), ('group', None, _raw, False),
+                      ('var', '', _raw, False), ('all', False, _bool, False),
+                      ('default', '', compile_value, False)),
+    'call_flow': (('flow', '', str, True), ('args', None, compile_value, False),
+                  ('returns', None, _returns, False)),
+    'for_each_line': (('path', '', str, True), ('encoding', 'utf-8', _raw, False),
+                      ('item_var', 'line', _raw, False), ('skip_empty', False, _bool, False),
+                      ('max_iterations', 0, int, False)),
+    'for_each_chunk': (('path', '', str, True), ('encoding', 'utf-8', _raw, False),
+                       ('item_var', 'chunk', _raw, False), ('chunk_size', 4096, int, False),
+                       ('max_iterations', 0, int, False)),
+    'parallel': (('concurrency', 0, int, False),),
+    'parallel_for_each': (('list_var', '', _raw, False), ('item_var', 'item', _raw, False),
+                          ('separator', '\n', _raw, False), ('concurrency', 4, int, False),
+                          ('max_iterations', 1000, int, False)),
+}
+
+# 嵌套步骤字段
+STEP_BLOCKS: dict[str, tuple[str, ...]] = {
+    'if_condition': ('then_steps', 'else_steps'),
+    'loop': ('body_steps',),
+    'parallel_for_each': ('body_steps',),
+    'for_each_line': ('body_steps',),
+    'for_each_chunk': ('body_steps',),
+}
+
+# 带条件的步骤
+CONDITION_STEPS = frozenset({'if_condition', 'loop'})
+
+# 分支列表字段（每个元素是一个 steps 列表）
+STEP_BRANCHES: dict[str, str] = {
+    'parallel': 'branches',
+}
+
+# 模拟输入的步骤：并行分支之间通过 INPUT_LOCK 串行化，避免按键交错
+INPUT_STEP_TYPES = frozenset({
+    'keys', 'type_text', 'mouse_click', 'mouse_double_click', 'mouse_move', 'mouse_scroll',
+})
+INPUT_LOCK = threading.RLock()
+
+# 可融合为一次 SendInput 的输入步骤，以及融合后的步骤类型
+FUSIBLE_INPUT_TYPES = frozenset({
+    'keys', 'mouse_click', 'mouse_double_click', 'mouse_move', 'mouse_scroll',
+})
+FUSED_INPUT_STEP = 'input_batch'
+
+# 步骤间隔不超过该值（秒）时才融合相邻输入步骤
+FUSE_MAX_DELAY = 0.01
+
+
+def serialize_input(handler: Callable) -> Callable:
+    """包装输入类步骤的处理器，执行期间持有 INPUT_LOCK"""
+    def run(executor, step, delay):
+        with INPUT_LOCK:
+            handler(executor, step, delay)
+    run.__name__ = getattr(handler, '__name__', 'run')
+    return run
+
+
+def compile_field(value, convert: Callable, interpolate: bool):
+    """编译单个字段：无占位符的值直接转换为常量，否则编译为 Template"""
+    if interpolate:
+        return compile_template(str(value), convert)
+    return convert(value)
+
+
+def compile_fields(source: dict, spec: tuple) -> Mapping[str, Any]:
+    return MappingProxyType({
+        name: compile_field(source.get(name, default), convert, interp)
+        for name, default, convert, interp in spec
+    })
+
+
+class PlanCompiler:
+    """将 steps 列表编译为 ComboPlan
+
+    Args:
+        handlers: 步骤类型 → 未绑定的执行器处理方法
+        legacy_handler: 委托给 ActionExecutor 的通用处理方法
+        legacy_types: 可委托的原有动作类型 → ActionExecutor 未绑定方法
+    """
+
+    def __init__(self, handlers: dict[str, Callable], legacy_handler: Callable,
+                 legacy_types: dict[str, Callable]):
+        self._handlers = handlers
+        self._legacy_handler = legacy_handler
+        self._legacy_types = legacy_types
+
+    def compile(self, action: dict) -> ComboPlan:
+        from .combo_optimize import optimize_flow, resolve_passes
+        source = action.get('steps', [])
+        report = None
+        passes = resolve_passes(action.get('optimize'))
+        if passes:
+            source, report = optimize_flow(source, action.get('delay', 500), passes)
+            logger.debug(f"Optimized flow {action.get('id', '')}: "
+                         f"{report['before']['executed']} -> {report['after']['executed']} steps")
+        steps = self.compile_steps(source)
+        delay = action.get('delay', 500) / 1000.0
+        if delay <= FUSE_MAX_DELAY and action.get('fuse_input', True):
+            steps = self.fuse_inputs(steps)
+        return ComboPlan(steps=steps, delay=delay,
+                         optimization=MappingProxyType(report) if report else None)
+
+    def fuse_inputs(self, steps: tuple[CompiledStep, ...]) -> tuple[CompiledStep, ...]:
+        """将相邻的输入步骤合并为一个 input_batch 步骤，递归处理嵌套块
+
+        融合步骤的 blocks[0] 保存被合并的原始步骤，args['fused'] 为其类型列表。
+        """
+        handler = self._handlers.get(FUSED_INPUT_STEP)
+        if handler is None:
+            return steps
+        result = []
+        group = []
+
+        def flush():
+            if len(group) > 1:
+                args = MappingProxyType({'fused': tuple(s.type for s in group)})
+                result.append(CompiledStep(FUSED_INPUT_STEP, serialize_input(handler), args,
+                                           (tuple(group),)))
+            else:
+                result.extend(group)
+            group.clear()
+
+        for step in steps:
+            if step.type in FUSIBLE_INPUT_TYPES:
+                group.append(step)
+                continue
+            flush()
+            if step.blocks:
+                step = replace(step, blocks=tuple(self.fuse_inputs(b) for b in step.blocks))
+            result.append(step)
+        flush()
+        return tuple(result)
+
+    def compile_steps(self, steps: list) -> tuple[CompiledStep, ...]:
+        result = []
+        for step in steps or ():
+            compiled = self.compile_step(step)
+            if compiled is not None:
+                result.append(compiled)
+        return tuple(result)
+
+    def compile_step(self, step: dict) -> CompiledStep | None:
+        if not step:
+            return None
+        stype = step.get('type', '')
+        if stype == FUSED_INPUT_STEP:
+            # 仅由 fuse_inputs 生成
+            return None
+
+        handler = self._handlers.get(stype)
+        if handler is not None:
+            args = dict(compile_fields(step, STEP_FIELDS.get(stype, ())))
+            if stype in CONDITION_STEPS:
+                args['condition'] = compile_condition(step.get('condition'))
+            if stype in STEP_BRANCHES:
+                blocks = tuple(self.compile_steps(branch)
+                               for branch in step.get(STEP_BRANCHES[stype], []) or ())
+            else:
+                blocks = tuple(self.compile_steps(step.get(key, []))
+                               for key in STEP_BLOCKS.get(stype, ()))
+            if stype in INPUT_STEP_TYPES:
+                handler = serialize_input(handler)
+            return CompiledStep(stype, handler, MappingProxyType(args), blocks)
+
+        action_fn = self._legacy_types.get(stype)
+        if action_fn is None:
+            logger.debug(f"Skipping unknown step type: {stype}")
+            return None
+        # 仅编译含占位符的字段，运行时只对这些字段插值
+        dynamic = []
+        for key, value in step.items():
+            if isinstance(value, str):
+                template = compile_template(value)
+                if type(template) is Template:
+                    dynamic.append((key, template))
+        args = MappingProxyType({
+            'action': action_fn,
+            'step': MappingProxyType(dict(step)),
+            'dynamic': tuple(dynamic),
+        })
+        handler = self._legacy_handler
+        if stype in INPUT_STEP_TYPES:
+            handler = serialize_input(handler)
+        return CompiledStep(stype, handler, args)
+
+
+class PlanCache:
+    """按动作 id 缓存编译结果，动作被编辑时失效"""
+
+    def __init__(self):
+        self._plans: dict[str, tuple[object, ComboPlan]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, action: dict, compiler: PlanCompiler) -> ComboPlan:
+        """获取缓存的计划，不存在则编译
+
+        无 id 的临时流程（如 /flows/execute）不缓存。
+        同时校验 steps 列表对象是否被整体替换，避免配置重载后使用过期计划。
+        """
+        action_id = action.get('id')
+        if not action_id:
+            return compiler.compile(action)
+        source = action.get('steps')
+        with self._lock:
+            entry = self._plans.get(action_id)
+            if entry is not None and entry[0] is source:
+                return entry[1]
+        plan = compiler.compile(action)
+        with self._lock:
+            self._plans[action_id] = (source, plan)
+        return plan
+
+    def invalidate(self, action_id: str = None):
+        """使缓存失效
+
+        Args:
+            action_id: 动作 id，None 表示清除所有
+        """
+        with self._lock:
+            if action_id is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(action_id, None)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._plans)
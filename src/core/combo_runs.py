@@ -0,0 +1,314 @@
+"""流程运行注册表 — 每次 combo 执行分配 run_id，独立变量作用域，可按 run 取消"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable
+from ..utils.logger import get_logger
+from .combo_values import to_json
+
+logger = get_logger('combo_runs')
+
+# 运行状态
+RUN_PENDING = 'pending'
+RUN_RUNNING = 'running'
+RUN_COMPLETED = 'completed'
+RUN_FAILED = 'failed'
+RUN_CANCELLED = 'cancelled'
+RUN_PAUSED = 'paused'
+
+FINISHED_STATES = (RUN_COMPLETED, RUN_FAILED, RUN_CANCELLED)
+
+# 取消 / 暂停生效的目标上限（秒），用于延迟指标统计
+CONTROL_LATENCY_BOUND = 0.02
+
+
+class FlowRun:
+    """单次流程执行的状态与变量作用域"""
+
+    def __init__(self, action: dict):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.action_id = action.get('id', '')
+        self.label = action.get('label', '')
+        self.status = RUN_PENDING
+        self.created_at = time.time()
+        self.started_at = 0.0
+        self.ended_at = 0.0
+        self.steps_executed = 0
+        self.error = ''
+        self.variables: dict[str, Any] = {}
+        self.cancel_event = threading.Event()
+        # 取消或暂停时置位，唤醒所有可中断等待；恢复后清除
+        self.interrupt = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._control_lock = threading.Lock()
+        self._listeners: list[Callable[[], None]] = []
+        self._cancel_requested = 0.0  # perf_counter
+        self._pause_requested = 0.0
+        self._pause_held = False  # 本次暂停是否已被执行器响应
+        self.cancel_latency: float | None = None  # 请求取消到运行结束（秒）
+        self.pause_latency: float | None = None  # 最近一次请求暂停到执行器停住（秒）
+        self.paused_total = 0.0
+        self.tracer = None  # FlowTracer，开启追踪时设置
+        self.speed = 1.0  # 回放倍速（0.5-10），缩放步骤间隔与 delay 步骤
+        self.timer = None  # FlowTimer，执行开始时设置
+        self.files = None  # AppendHandles，执行开始时设置，结束时关闭
+        self.optimization = None  # 启用 optimize 时的优化报告
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def paused(self) -> bool:
+        return not self._resumed.is_set()
+
+    def cancel(self):
+        """请求取消：立即唤醒所有可中断等待，执行器随即退出"""
+        with self._control_lock:
+            if self.cancel_event.is_set():
+                return
+            self._cancel_requested = time.perf_counter()
+            self.cancel_event.set()
+            self.interrupt.set()
+            self._resumed.set()
+        self._notify()
+
+    def pause(self) -> bool:
+        """请求暂停：执行器在当前等待或下一个步骤边界停住，已结束或已取消返回 False"""
+        with self._control_lock:
+            if self.finished or self.cancel_event.is_set():
+                return False
+            if self.paused:
+                return True
+            self._pause_requested = time.perf_counter()
+            self._pause_held = False
+            self._resumed.clear()
+            self.interrupt.set()
+            if self.status == RUN_RUNNING:
+                self.status = RUN_PAUSED
+        self._notify()
+        return True
+
+    def resume(self) -> bool:
+        """恢复暂停的运行，未暂停返回 False"""
+        with self._control_lock:
+            if not self.paused:
+                return False
+            if not self.cancel_event.is_set():
+                self.interrupt.clear()
+            if self.status == RUN_PAUSED:
+                self.status = RUN_RUNNING
+            self._resumed.set()
+        self._notify()
+        return True
+
+    def hold(self) -> float | None:
+        """检查点：暂停时阻塞到恢复
+
+        Returns:
+            暂停时长（秒），未暂停为 0；已取消返回 None
+        """
+        if self.cancel_event.is_set():
+            return None
+        if self._resumed.is_set():
+            return 0.0
+        started = self.mark_held()
+        self._resumed.wait()
+        if self.cancel_event.is_set():
+            return None
+        return self.resumed_after(started)
+
+    def mark_held(self) -> float:
+        """记录执行器响应暂停的时刻，返回该时刻（perf_counter）"""
+        now = time.perf_counter()
+        with self._control_lock:
+            if not self._pause_held:
+                self._pause_held = True
+                self.pause_latency = now - self._pause_requested
+        return now
+
+    def resumed_after(self, held_at: float) -> float:
+        """恢复后累计暂停时长，返回本次暂停时长"""
+        paused = time.perf_counter() - held_at
+        self.paused_total += paused
+        return paused
+
+    def add_listener(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """订阅取消 / 暂停 / 恢复，返回取消订阅函数（回调在请求方线程中调用）"""
+        with self._control_lock:
+            self._listeners.append(callback)
+
+        def remove():
+            with self._control_lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return remove
+
+    def _notify(self):
+        with self._control_lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Run listener failed: {e}")
+
+    def start(self):
+        self.status = RUN_PAUSED if self.paused else RUN_RUNNING
+        self.started_at = time.time()
+
+    def finish(self, status: str, error: str = ''):
+        if status == RUN_CANCELLED and self._cancel_requested:
+            self.cancel_latency = time.perf_counter() - self._cancel_requested
+        self.status = status
+        self.error = error
+        self.ended_at = time.time()
+
+    def to_dict(self, detail: bool = False) -> dict:
+        """序列化为 API 响应格式
+
+        Args:
+            detail: 是否包含变量快照
+        """
+        end = self.ended_at or time.time()
+        result = {
+            'run_id': self.run_id,
+            'action_id': self.action_id,
+            'label': self.label,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'ended_at': self.ended_at,
+            'duration': end - self.started_at if self.started_at else 0,
+            'steps_executed': self.steps_executed,
+            'error': self.error,
+            'traced': self.tracer is not None,
+            'speed': self.speed,
+            'paused': self.paused,
+            'paused_total': self.paused_total,
+            'cancel_latency_ms': _ms(self.cancel_latency),
+            'pause_latency_ms': _ms(self.pause_latency),
+        }
+        if self.timer is not None:
+            result['timing'] = self.timer.stats()
+        if self.optimization is not None:
+            result['optimization'] = dict(self.optimization)
+        if detail:
+            result['variables'] = {k: to_json(v, 200) for k, v in list(self.variables.items())}
+        return result
+
+
+class RunRegistry:
+    """记录进行中和最近结束的流程运行"""
+
+    def __init__(self, max_history: int = 200):
+        self._runs: OrderedDict[str, FlowRun] = OrderedDict()
+        self._max_history = max_history
+        self._lock = threading.Lock()
+
+    def create(self, action: dict) -> FlowRun:
+        """为动作创建并登记一次运行"""
+        return self.register(FlowRun(action))
+
+    def register(self, run: FlowRun) -> FlowRun:
+        """登记已创建的运行"""
+        with self._lock:
+            self._runs[run.run_id] = run
+            self._trim()
+        return run
+
+    def _trim(self):
+        """超出上限时丢弃最早结束的运行，进行中的运行始终保留"""
+        excess = len(self._runs) - self._max_history
+        if excess <= 0:
+            return
+        for run_id in [rid for rid, r in self._runs.items() if r.finished][:excess]:
+            del self._runs[run_id]
+
+    def unregister(self, run_id: str):
+        """移除未能提交执行的运行"""
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def get(self, run_id: str) -> FlowRun | None:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def list_runs(self, status: str = None) -> list[FlowRun]:
+        """按创建顺序返回运行列表，可按状态过滤"""
+        with self._lock:
+            runs = list(self._runs.values())
+        if status:
+            runs = [r for r in runs if r.status == status]
+        return runs
+
+    def active(self) -> list[FlowRun]:
+        """未结束的运行"""
+        with self._lock:
+            return [r for r in self._runs.values() if not r.finished]
+
+    def cancel(self, run_id: str) -> bool:
+        """取消指定运行，不存在或已结束返回 False"""
+        run = self.get(run_id)
+        if not run or run.finished:
+            return False
+        run.cancel()
+        logger.info(f"Run {run_id} cancel requested")
+        return True
+
+    def pause(self, run_id: str) -> bool:
+        run = self.get(run_id)
+        if not run or not run.pause():
+            return False
+        logger.info(f"Run {run_id} pause requested")
+        return True
+
+    def resume(self, run_id: str) -> bool:
+        run = self.get(run_id)
+        if not run or not run.resume():
+            return False
+        logger.info(f"Run {run_id} resumed")
+        return True
+
+    def metrics(self) -> dict:
+        """取消 / 暂停生效延迟统计（基于保留的运行记录）"""
+        with self._lock:
+            runs = list(self._runs.values())
+        return {
+            'cancel_latency': _latency_stats([r.cancel_latency for r in runs
+                                              if r.cancel_latency is not None]),
+            'pause_latency': _latency_stats([r.pause_latency for r in runs
+                                             if r.pause_latency is not None]),
+            'bound_ms': CONTROL_LATENCY_BOUND * 1000,
+        }
+
+    def cancel_all(self) -> int:
+        """取消所有未结束的运行，返回数量"""
+        runs = self.active()
+        for run in runs:
+            run.cancel()
+        return len(runs)
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else seconds * 1000
+
+
+def _latency_stats(values: list[float]) -> dict:
+    if not values:
+        return {'count': 0, 'avg_ms': 0.0, 'max_ms': 0.0, 'p95_ms': 0.0, 'over_bound': 0}
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'avg_ms': sum(values) / len(values) * 1000,
+        'max_ms': values[-1] * 1000,
+        'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+        'over_bound': sum(v > CONTROL_LATENCY_BOUND for v in values),
+    }
@@ -0,0 +1,87 @@
+"""{{var}} 插值模板 — 编译期解析为字面量与变量片段，运行期按依赖复用渲染结果"""
+
+import re
+from typing import Any, Callable
+from .combo_values import native, to_text
+
+VAR_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+
+
+class Template:
+    """预解析的插值模板
+
+    模板在编译期被拆分为字面量和变量片段，并转换为位置格式串，
+    渲染时只做一次 str.format。names 记录模板读取的变量名，
+    若这些变量的值自上次渲染后未变化，直接返回上次的结果。
+
+    变量值可以是原生类型：渲染时按 to_text 转为文本。整段只有一个 {{var}} 的模板
+    在数值/原生字段上直接把变量值交给转换函数，不经过字符串往返。
+    """
+
+    __slots__ = ('source', 'names', 'convert', '_format', '_missing', '_last', '_whole')
+
+    def __init__(self, source: str, convert: Callable[[str], Any] = str):
+        self.source = source
+        self.convert = convert
+        names: list[str] = []
+        parts: list[str] = []
+        pos = 0
+        for m in VAR_PATTERN.finditer(source):
+            parts.append(_escape(source[pos:m.start()]))
+            name = m.group(1)
+            if name not in names:
+                names.append(name)
+            parts.append('{%d}' % names.index(name))
+            pos = m.end()
+        parts.append(_escape(source[pos:]))
+        self.names: tuple[str, ...] = tuple(names)
+        self._format = ''.join(parts)
+        # 未定义的变量保留原占位符
+        self._missing = tuple('{{%s}}' % n for n in names)
+        self._last: tuple | None = None
+        self._whole = self._format == '{0}' and convert in _PASS_NATIVE
+
+    def render(self, variables: dict) -> Any:
+        """渲染模板并转换类型，依赖变量未变化时复用上次结果"""
+        get = variables.get
+        key = tuple(get(n, d) for n, d in zip(self.names, self._missing))
+        last = self._last
+        if last is not None and _same_key(last[0], key):
+            return last[1]
+        if self._whole and key[0] is not self._missing[0]:
+            value = self.convert(key[0])
+        else:
+            value = self.convert(self._format.format(*map(to_text, key)))
+        # 单次赋值元组，多线程共享模板时读写保持一致
+        self._last = (key, value)
+        return value
+
+    def __repr__(self) -> str:
+        return f'Template({self.source!r})'
+
+
+# 整段模板可直接接收原生变量值的转换函数
+_PASS_NATIVE = frozenset({int, float, native})
+
+
+def _same_key(a: tuple, b: tuple) -> bool:
+    """逐项比较变量值，区分类型（1、True、1.0 渲染结果不同）"""
+    return all(x is y or (type(x) is type(y) and x == y) for x, y in zip(a, b))
+
+
+def _escape(literal: str) -> str:
+    return literal.replace('{', '{{').replace('}', '}}')
+
+
+def compile_template(text: str, convert: Callable[[str], Any] = str):
+    """编译文本：含占位符返回 Template，否则直接返回转换后的常量"""
+    if '{{' in text and VAR_PATTERN.search(text):
+        return Template(text, convert)
+    return convert(text)
+
+
+def render_text(text: str, variables: dict) -> str:
+    """一次性插值（不缓存），用于运行期才出现的文本"""
+    if not text or '{{' not in text:
+        return text
+    return VAR_PATTERN.sub(lambda m: to_text(variables.get(m.group(1), m.group(0))), text)
@@ -0,0 +1,157 @@
+"""流程延时调度 — 截止时间累计、倍速回放、精细等待与系统计时器精度
+
+录制回放中的步骤间隔和 delay 步骤按截止时间调度：每次等待的目标时间由上一个目标累加得到，
+步骤本身的耗时和睡眠误差在下一次等待中抵消，长流程不会累积漂移。
+"""
+
+import os
+import threading
+from ..utils.logger import get_logger
+
+logger = get_logger('combo_timing')
+
+# 回放倍速范围
+MIN_SPEED = 0.5
+MAX_SPEED = 10.0
+
+# 精细等待窗口（秒）：剩余等待不足该值时改用高精度睡眠，仅最后约 1ms 让出 CPU 自旋
+# （见 RealClock.sleep_until）。Windows 默认计时器粒度约 15.6ms，提高精度后约 1ms；
+# 其他平台睡眠本身足够精确
+SPIN_DEFAULT = 0.02 if os.name == 'nt' else 0.001
+SPIN_HIGH_RESOLUTION = 0.002
+
+# 落后目标时间超过该值（秒）时放弃追赶，从当前时间重新计时
+# （如 wait_window 阻塞了很久，之后的间隔不应被压缩为 0）
+MAX_LAG = 0.05
+
+# 提高系统计时器精度时请求的周期（毫秒）
+TIMER_PERIOD_MS = 1
+
+
+def clamp_speed(value) -> float:
+    """解析回放倍速，限制在 MIN_SPEED..MAX_SPEED，非法值按 1.0 处理"""
+    try:
+        speed = float(value)
+    except (TypeError, ValueError):
+        return 1.0
+    if speed != speed:  # NaN
+        return 1.0
+    return min(MAX_SPEED, max(MIN_SPEED, speed))
+
+
+class TimerResolution:
+    """系统计时器精度的引用计数：有流程请求时提高，全部结束后恢复"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._backend = None
+
+    @property
+    def active(self) -> bool:
+        return self._count > 0
+
+    def acquire(self, backend) -> bool:
+        with self._lock:
+            if self._count == 0:
+                try:
+                    if not backend.begin_timer_period(TIMER_PERIOD_MS):
+                        return False
+                except Exception as e:
+                    logger.warning(f"timeBeginPeriod failed: {e}")
+                    return False
+                self._backend = backend
+            self._count += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._count == 0:
+                return
+            self._count -= 1
+            if self._count == 0:
+                try:
+                    self._backend.end_timer_period(TIMER_PERIOD_MS)
+                except Exception as e:
+                    logger.warning(f"timeEndPeriod failed: {e}")
+                self._backend = None
+
+
+timer_resolution = TimerResolution()
+
+
+class FlowTimer:
+    """单条执行路径的延时调度器
+
+    并行分支各自持有独立的 FlowTimer，互不推进对方的截止时间。
+
+    Args:
+        clock: 平台时钟（需提供 now / sleep_until）
+        speed: 回放倍速，间隔按 1/speed 缩放
+    """
+
+    def __init__(self, clock, speed: float = 1.0):
+        self._clock = clock
+        self.speed = clamp_speed(speed)
+        self._deadline = clock.now()
+        # 指标
+        self.waits = 0
+        self.rebased = 0
+        self.late_total = 0.0
+        self.late_max = 0.0
+
+    @property
+    def spin(self) -> float:
+        return SPIN_HIGH_RESOLUTION if timer_resolution.active else SPIN_DEFAULT
+
+    def next_deadline(self, seconds: float) -> float:
+        """推进并返回下一个截止时间（clock.now() 基准）"""
+        now = self._clock.now()
+        scaled = seconds / self.speed
+        deadline = self._deadline + scaled
+        if deadline < now - MAX_LAG:
+            deadline = now + scaled
+            self.rebased += 1
+        self._deadline = deadline
+        return deadline
+
+    def settle(self, deadline: float):
+        """记录一次等待结束时相对截止时间的误差"""
+        late = self._clock.now() - deadline
+        self.waits += 1
+        if late > 0:
+            self.late_total += late
+            self.late_max = max(self.late_max, late)
+
+    def shift(self, seconds: float):
+        """暂停后顺延当前截止时间"""
+        self._deadline += seconds
+
+    def wait(self, seconds: float, run) -> bool:
+        """按截止时间等待 seconds（倍速缩放前）
+
+        run 的取消或暂停会立即打断等待；暂停期间截止时间顺延，恢复后继续等待剩余时间。
+
+        Returns:
+            被取消返回 False
+        """
+        if seconds <= 0:
+            return True
+        deadline = self.next_deadline(seconds)
+        while not self._clock.sleep_until(deadline, self.spin, run.interrupt):
+            paused = run.hold()
+            if paused is None:
+                return False
+            deadline += paused
+            self.shift(paused)
+        self.settle(deadline)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'speed': self.speed,
+            'waits': self.waits,
+            'rebased': self.rebased,
+            'late_max_ms': self.late_max * 1000,
+            'late_avg_ms': self.late_total / self.waits * 1000 if self.waits else 0.0,
+        }
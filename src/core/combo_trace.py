@@ -0,0 +1,149 @@
+"""流程执行追踪 — 记录每个步骤的路径、耗时、等待时间与变量大小
+
+追踪按 run 开启：未开启时执行器走原有的无追踪路径，不产生额外开销。
+记录保存在有界缓冲中，可导出为 Chrome trace-event JSON（chrome://tracing、Perfetto）。
+"""
+
+import threading
+import time
+from collections import deque
+from .combo_values import value_size
+
+
+class TraceSpan:
+    """单个步骤的执行记录（时间单位：微秒，相对 run 开始）"""
+
+    __slots__ = ('path', 'type', 'lane', 'start', 'duration', 'wait', 'var_count',
+                 'var_bytes', 'error', 'fused')
+
+    def __init__(self, path: str, stype: str, lane: int, start: float, duration: float,
+                 wait: float, var_count: int, var_bytes: int, error: str = '',
+                 fused: tuple = ()):
+        self.path = path
+        self.type = stype
+        self.lane = lane
+        self.start = start
+        self.duration = duration
+        self.wait = wait
+        self.var_count = var_count
+        self.var_bytes = var_bytes
+        self.error = error
+        self.fused = fused
+
+    def to_dict(self) -> dict:
+        return {
+            'path': self.path,
+            'type': self.type,
+            'lane': self.lane,
+            'start_ms': self.start / 1000,
+            'duration_ms': self.duration / 1000,
+            'wait_ms': self.wait / 1000,
+            'work_ms': max(0.0, self.duration - self.wait) / 1000,
+            'vars': self.var_count,
+            'var_bytes': self.var_bytes,
+            'error': self.error,
+            'fused': list(self.fused),
+        }
+
+
+class FlowTracer:
+    """单次运行的追踪缓冲
+
+    Args:
+        max_spans: 最多保留的步骤记录数，超出时丢弃最早的记录
+    """
+
+    def __init__(self, max_spans: int = 2000):
+        self._spans: deque[TraceSpan] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._lanes = 0
+        self.recorded = 0
+        self.gap_wait = 0.0  # 步骤间隔等待（秒）
+
+    def new_lane(self) -> int:
+        """为并行分支分配独立的泳道编号"""
+        with self._lock:
+            self._lanes += 1
+            return self._lanes
+
+    def record(self, path: str, stype: str, lane: int, started: float, ended: float,
+               waited: float, variables: dict, error: str = '', fused: tuple = ()):
+        """记录一个步骤
+
+        Args:
+            started, ended: perf_counter 时间戳
+            waited: 步骤内部的等待时间（秒）
+            variables: 步骤结束时的变量作用域
+            fused: 融合步骤合并的原始步骤类型
+        """
+        var_bytes = sum(value_size(v) for v in list(variables.values()))
+        span = TraceSpan(path, stype, lane, (started - self._t0) * 1e6,
+                         (ended - started) * 1e6, waited * 1e6, len(variables), var_bytes, error,
+                         fused)
+        with self._lock:
+            self._spans.append(span)
+            self.recorded += 1
+
+    def add_gap(self, seconds: float):
+        with self._lock:
+            self.gap_wait += seconds
+
+    def spans(self) -> list[TraceSpan]:
+        with self._lock:
+            return list(self._spans)
+
+    def summary(self, top: int = 10) -> dict:
+        """汇总：总耗时、等待与工作时间、按类型统计、最慢的步骤
+
+        嵌套步骤（if/loop/parallel）的耗时包含其子步骤，按类型统计时只计叶子步骤的等待与工作时间。
+        """
+        spans = self.spans()
+        by_type: dict[str, dict] = {}
+        for s in spans:
+            entry = by_type.setdefault(s.type, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += s.duration / 1000
+            entry['max_ms'] = max(entry['max_ms'], s.duration / 1000)
+        # 路径形如 3/then/0：去掉末尾两段即为父步骤
+        parents = {s.path.rsplit('/', 2)[0] for s in spans if '/' in s.path}
+        leaves = [s for s in spans if s.path not in parents]
+        slowest = sorted(spans, key=lambda s: s.duration, reverse=True)[:top]
+        return {
+            'recorded': self.recorded,
+            'kept': len(spans),
+            'dropped': self.recorded - len(spans),
+            'wait_ms': sum(s.wait for s in leaves) / 1000,
+            'work_ms': sum(max(0.0, s.duration - s.wait) for s in leaves) / 1000,
+            'gap_wait_ms': self.gap_wait * 1000,
+            'by_type': by_type,
+            'slowest': [s.to_dict() for s in slowest],
+        }
+
+    def to_chrome(self, name: str = 'flow') -> dict:
+        """导出 Chrome trace-event 格式"""
+        spans = self.spans()
+        events = [{'ph': 'M', 'name': 'process_name', 'pid': 1, 'tid': 0,
+                   'args': {'name': name}}]
+        for lane in sorted({s.lane for s in spans}):
+            events.append({'ph': 'M', 'name': 'thread_name', 'pid': 1, 'tid': lane,
+                           'args': {'name': 'main' if lane == 0 else f'branch {lane}'}})
+        for s in spans:
+            events.append({
+                'name': s.type,
+                'cat': 'step',
+                'ph': 'X',
+                'ts': s.start,
+                'dur': s.duration,
+                'pid': 1,
+                'tid': s.lane,
+                'args': {
+                    'path': s.path,
+                    'wait_ms': s.wait / 1000,
+                    'vars': s.var_count,
+                    'var_bytes': s.var_bytes,
+                    **({'error': s.error} if s.error else {}),
+                    **({'fused': list(s.fused)} if s.fused else {}),
+                },
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
@@ -0,0 +1,115 @@
+"""流程变量值 — 变量保存原生类型，仅在模板渲染或对外输出时转为文本
+
+变量可以是 str、int、float、bool、list、dict、bytes 或 None。
+循环序号、HTTP 状态码、JSON 数组元素等直接以原生值保存，
+读取方（数值字段、比较、遍历）无需反复解析字符串。
+文本形式：数字为十进制，布尔为 true/false（与 find_image 等步骤旧版写入的文本一致），
+None 为空串，list/dict 为 JSON。set_var 中 YAML 字面量布尔与 null 在编译期按旧版 str()
+保存为 True/False/None 文本。
+"""
+
+import json
+from typing import Any
+
+# set_var 的 value_type 取值
+VALUE_TYPES = ('', 'str', 'int', 'float', 'bool', 'json')
+
+
+def native(value):
+    """保留原生值的字段转换：整段 {{var}} 模板直接返回变量值，其余按文本处理"""
+    return value
+
+
+def to_text(value) -> str:
+    """变量值的文本形式（模板渲染、字符串比较时使用）"""
+    t = type(value)
+    if t is str:
+        return value
+    if t is bool:
+        return 'true' if value else 'false'
+    if t is int or t is float:
+        return str(value)
+    if value is None:
+        return ''
+    if t is bytes or t is bytearray:
+        return value.decode('utf-8', errors='replace')
+    if t is list or t is dict or t is tuple:
+        return json.dumps(value, ensure_ascii=False, default=to_text)
+    return str(value)
+
+
+def to_number(value) -> float | None:
+    """解析为数值，无法解析时返回 None"""
+    t = type(value)
+    if t is int or t is float:
+        return value
+    if t is bool:
+        return int(value)
+    try:
+        return float(to_text(value).strip())
+    except ValueError:
+        return None
+
+
+def to_bool(value) -> bool:
+    if type(value) is str:
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def coerce(value, kind: str):
+    """按 set_var 的 value_type 转换
+
+    Raises:
+        ValueError: 无法转换
+    """
+    if not kind:
+        return value
+    if kind == 'str':
+        return to_text(value)
+    if kind == 'int':
+        number = to_number(value)
+        if number is None:
+            raise ValueError(f"not a number: {to_text(value)[:40]!r}")
+        return int(number)
+    if kind == 'float':
+        number = to_number(value)
+        if number is None:
+            raise ValueError(f"not a number: {to_text(value)[:40]!r}")
+        return float(number)
+    if kind == 'bool':
+        return to_bool(value)
+    if kind == 'json':
+        if isinstance(value, (str, bytes, bytearray)):
+            return json.loads(value)
+        return value
+    raise ValueError(f"unknown value_type: {kind}")
+
+
+def to_json(value, limit: int = 0) -> Any:
+    """转换为可 JSON 序列化的值（API 输出），limit > 0 时截断长文本"""
+    t = type(value)
+    if t is bytes or t is bytearray:
+        value = to_text(value)
+        t = str
+    if t is str:
+        return value[:limit] + '...' if 0 < limit < len(value) else value
+    if t is list or t is tuple:
+        return [to_json(v, limit) for v in value]
+    if t is dict:
+        return {str(k): to_json(v, limit) for k, v in value.items()}
+    if value is None or t in (bool, int, float):
+        return value
+    return to_text(value)
+
+
+def value_size(value) -> int:
+    """变量的近似大小（字节），用于追踪统计；容器只做一层估算"""
+    t = type(value)
+    if t is str or t is bytes or t is bytearray:
+        return len(value)
+    if t is list or t is tuple:
+        return sum(len(v) if type(v) is str else 8 for v in value)
+    if t is dict:
+        return sum(len(str(k)) + (len(v) if type(v) is str else 8) for k, v in value.items())
+    return 8
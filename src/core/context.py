@@ -1,40 +1,21 @@
 """上下文感知 — 检测前台窗口进程，自动切换到匹配的动作页"""
 
-import ctypes
-import ctypes.wintypes
-import os
+from typing import Callable
+from ..utils.logger import get_logger
+from ..utils.platform_backend import get_backend
+
+logger = get_logger('context')
 
 
 def get_foreground_process() -> str:
     """获取当前前台窗口的进程名（如 Code.exe）"""
-    user32 = ctypes.windll.user32
-    kernel32 = ctypes.windll.kernel32
-
-    hwnd = user32.GetForegroundWindow()
-    if not hwnd:
-        return ''
-
-    pid = ctypes.wintypes.DWORD()
-    user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
-    if not pid.value:
-        return ''
-
-    # 打开进程获取可执行文件名
-    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
-    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
-    if not handle:
-        return ''
-
-    try:
-        buf = ctypes.create_unicode_buffer(260)
-        size = ctypes.wintypes.DWORD(260)
-        ret = kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size))
-        if not ret:
-            return ''
-        full_path = buf.value
-        return os.path.basename(full_path) if full_path else ''
-    finally:
-        kernel32.CloseHandle(handle)
+    backend = get_backend()
+    return backend.window_process(backend.foreground_window())
+
+
+def get_window_process(hwnd: int) -> str:
+    """获取窗口所属进程名"""
+    return get_backend().window_process(hwnd)
 
 
 def find_context_page(pages: list, process_name: str) -> int | None:
@@ -60,3 +41,46 @@ def find_context_page(pages: list, process_name: str) -> int | None:
         if pname in targets:
             return i
     return None
+
+
+class ContextPageWatcher:
+    """订阅前台窗口事件，前台进程变化时切换到匹配的上下文页
+
+    Args:
+        monitor: ForegroundMonitor 实例
+        get_pages: 返回当前 pages 列表的函数（配置可能被重新加载）
+        on_switch: callback(page_index, process_name) 匹配页变化时回调
+    """
+
+    def __init__(self, monitor, get_pages: Callable[[], list],
+                 on_switch: Callable[[int, str], None] = None):
+        self._monitor = monitor
+        self._get_pages = get_pages
+        self._on_switch = on_switch
+        self._unsubscribe = None
+        self._process = None
+        self.page: int | None = None
+
+    def start(self):
+        if self._unsubscribe:
+            return
+        self._unsubscribe = self._monitor.subscribe(self._on_event)
+        self._on_event(self._monitor.current())
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_event(self, event):
+        # 仅在前台进程变化时查找，标题变化不影响上下文页
+        if event.process == self._process:
+            return
+        self._process = event.process
+        idx = find_context_page(self._get_pages(), event.process)
+        if idx is None or idx == self.page:
+            return
+        self.page = idx
+        logger.info(f"Context page -> {idx} ({event.process})")
+        if self._on_switch:
+            self._on_switch(idx, event.process)
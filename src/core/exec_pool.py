@@ -0,0 +1,182 @@
+"""动作执行池 — 固定数量工作线程 + 优先级队列，替代每个动作新建线程"""
+
+import itertools
+import math
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable
+from ..utils.logger import get_logger
+
+logger = get_logger('exec_pool')
+
+# 优先级（数值越小越先执行）
+PRIORITY_HOTKEY = 0
+PRIORITY_INTERACTIVE = 10
+PRIORITY_API = 20
+
+_STOP = object()
+
+
+class QueueFullError(Exception):
+    """队列已满或动作并发已达上限"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ('fn', 'args', 'key', 'enqueued')
+
+    def __init__(self, fn: Callable, args: tuple, key: str | None):
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.enqueued = time.perf_counter()
+
+
+class ExecutionPool:
+    """有界优先级执行池
+
+    Args:
+        workers: 工作线程数
+        max_queue: 排队任务上限，超出时拒绝提交
+        max_inflight_per_action: 同一动作排队 + 执行中的最大数量
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 64,
+                 max_inflight_per_action: int = 4):
+        self._workers = max(1, workers)
+        self._max_queue = max_queue
+        self._max_inflight = max_inflight_per_action
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._inflight: dict[str, int] = {}
+        self._queued = 0
+        self._running = 0
+        self._shutdown = False
+        # 指标
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._recent_waits: deque[float] = deque(maxlen=256)
+
+    def _ensure_started(self):
+        """首次提交时启动工作线程"""
+        if self._threads:
+            return
+        for i in range(self._workers):
+            t = threading.Thread(target=self._worker, name=f'exec-pool-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE,
+               key: str = None):
+        """提交任务
+
+        Args:
+            fn: 任务函数
+            priority: 优先级，数值越小越先执行
+            key: 动作标识，用于限制同一动作的并发数
+
+        Raises:
+            QueueFullError: 队列已满或该动作并发已达上限
+        """
+        with self._lock:
+            if self._shutdown:
+                raise QueueFullError('execution pool is shut down')
+            if self._queued >= self._max_queue:
+                self._rejected += 1
+                raise QueueFullError('execution queue full', self._retry_after())
+            if key and self._inflight.get(key, 0) >= self._max_inflight:
+                self._rejected += 1
+                raise QueueFullError(f'action {key} has too many runs in flight',
+                                     self._retry_after())
+            if key:
+                self._inflight[key] = self._inflight.get(key, 0) + 1
+            self._queued += 1
+            self._submitted += 1
+            self._ensure_started()
+        self._queue.put((priority, next(self._seq), _Job(fn, args, key)))
+
+    def _retry_after(self) -> int:
+        """按平均执行耗时估算重试等待秒数"""
+        if not self._completed:
+            return 1
+        avg_run = self._run_total / self._completed
+        return max(1, min(60, math.ceil(avg_run * (self._queued + 1) / self._workers)))
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is _STOP:
+                return
+            started = time.perf_counter()
+            waited = started - job.enqueued
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._recent_waits.append(waited)
+            failed = False
+            try:
+                job.fn(*job.args)
+            except Exception as e:
+                failed = True
+                logger.error(f"Job {getattr(job.fn, '__name__', job.fn)} failed: {e}",
+                             exc_info=True)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._failed += failed
+                    self._run_total += elapsed
+                    if job.key:
+                        left = self._inflight.get(job.key, 1) - 1
+                        if left > 0:
+                            self._inflight[job.key] = left
+                        else:
+                            self._inflight.pop(job.key, None)
+
+    def metrics(self) -> dict:
+        """队列深度、等待时间等指标"""
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            started = self._submitted - self._queued
+            return {
+                'workers': self._workers,
+                'max_queue': self._max_queue,
+                'max_inflight_per_action': self._max_inflight,
+                'queue_depth': self._queued,
+                'running': self._running,
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'completed': self._completed,
+                'failed': self._failed,
+                'avg_wait_ms': self._wait_total / started * 1000 if started > 0 else 0,
+                'max_wait_ms': self._wait_max * 1000,
+                'p95_wait_ms': waits[int(len(waits) * 0.95)] * 1000 if waits else 0,
+                'avg_run_ms': self._run_total / self._completed * 1000 if self._completed else 0,
+                'inflight_by_action': dict(self._inflight),
+            }
+
+    def shutdown(self):
+        """停止接收任务，工作线程处理完已排队任务后退出"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            # 排在所有任务之后
+            self._queue.put((math.inf, next(self._seq), _STOP))
@@ -0,0 +1,311 @@
+"""前台窗口事件源 — 基于 SetWinEventHook 推送前台切换和标题变化，替代定时轮询
+
+ForegroundMonitor 维护当前前台窗口状态，等待类步骤和上下文页切换订阅其事件。
+事件来源可替换：Windows 下使用 WinEventBackend，无界面环境可用 SimulatedBackend 驱动。
+"""
+
+import asyncio
+import ctypes
+import ctypes.wintypes
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from ..utils.logger import get_logger
+
+logger = get_logger('foreground')
+
+# 事件类型
+EVENT_FOREGROUND = 'foreground'
+EVENT_TITLE = 'title'
+
+# WinEvent 常量
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+WM_QUIT = 0x0012
+
+# 等待期间检查取消的最长间隔（秒）
+_CANCEL_CHECK = 0.1
+
+
+@dataclass(frozen=True, slots=True)
+class ForegroundEvent:
+    """前台窗口状态快照"""
+    kind: str
+    hwnd: int = 0
+    title: str = ''
+    process: str = ''
+    timestamp: float = field(default_factory=time.time)
+
+
+class ForegroundBackend:
+    """前台窗口事件源接口"""
+
+    def snapshot(self) -> ForegroundEvent:
+        """读取当前前台窗口"""
+        raise NotImplementedError
+
+    def start(self, emit: Callable[[ForegroundEvent], None]) -> bool:
+        """开始推送事件，失败返回 False"""
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class WinEventBackend(ForegroundBackend):
+    """SetWinEventHook 事件源：在独立消息循环线程中接收前台切换和标题变化"""
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._ok = False
+        self._emit: Callable[[ForegroundEvent], None] | None = None
+        self._hwnd = 0
+        self._process = ''
+
+    def snapshot(self) -> ForegroundEvent:
+        hwnd = ctypes.windll.user32.GetForegroundWindow() or 0
+        # 作为钩子的初始前台窗口，否则启动时前台窗口的标题变化会被忽略
+        self._hwnd = hwnd
+        self._process = self._window_process(hwnd)
+        return ForegroundEvent(EVENT_FOREGROUND, hwnd, self._window_title(hwnd),
+                               self._process)
+
+    def start(self, emit: Callable[[ForegroundEvent], None]) -> bool:
+        self._emit = emit
+        self._thread = threading.Thread(target=self._loop, name='foreground-hook', daemon=True)
+        self._thread.start()
+        self._ready.wait(2)
+        return self._ok
+
+    def stop(self):
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+
+    def _loop(self):
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD, ctypes.wintypes.HWND,
+            ctypes.wintypes.LONG, ctypes.wintypes.LONG, ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD)
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, ms):
+            try:
+                self._on_event(event, hwnd or 0, id_object, id_child)
+            except Exception as e:
+                logger.error(f"WinEvent callback failed: {e}")
+
+        self._proc = WinEventProc(callback)  # prevent GC
+        user32.SetWinEventHook.restype = ctypes.wintypes.HANDLE
+        hooks = [
+            user32.SetWinEventHook(event, event, None, self._proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+            for event in (EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_NAMECHANGE)
+        ]
+        self._ok = all(hooks)
+        self._ready.set()
+        if not self._ok:
+            logger.warning("SetWinEventHook failed, foreground events unavailable")
+        else:
+            msg = ctypes.wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def _on_event(self, event: int, hwnd: int, id_object: int, id_child: int):
+        if event == EVENT_SYSTEM_FOREGROUND:
+            self._hwnd = hwnd
+            self._process = self._window_process(hwnd)
+            self._emit(ForegroundEvent(EVENT_FOREGROUND, hwnd, self._window_title(hwnd),
+                                       self._process))
+        elif id_object == OBJID_WINDOW and id_child == 0 and hwnd and hwnd == self._hwnd:
+            # 只关心当前前台窗口自身的标题变化
+            self._emit(ForegroundEvent(EVENT_TITLE, hwnd, self._window_title(hwnd),
+                                       self._process))
+
+    @staticmethod
+    def _window_title(hwnd: int) -> str:
+        if not hwnd:
+            return ''
+        buf = ctypes.create_unicode_buffer(256)
+        ctypes.windll.user32.GetWindowTextW(hwnd, buf, 256)
+        return buf.value
+
+    @staticmethod
+    def _window_process(hwnd: int) -> str:
+        from .context import get_window_process
+        return get_window_process(hwnd)
+
+
+class SimulatedBackend(ForegroundBackend):
+    """模拟事件源：由调用方切换前台窗口，用于无界面环境"""
+
+    def __init__(self, title: str = '', process: str = ''):
+        self._state = ForegroundEvent(EVENT_FOREGROUND, 1 if title or process else 0,
+                                      title, process)
+        self._emit: Callable[[ForegroundEvent], None] | None = None
+        self._next_hwnd = 2
+
+    def snapshot(self) -> ForegroundEvent:
+        return self._state
+
+    def start(self, emit: Callable[[ForegroundEvent], None]) -> bool:
+        self._emit = emit
+        return True
+
+    def stop(self):
+        self._emit = None
+
+    def set_foreground(self, title: str, process: str = ''):
+        """模拟切换到新窗口"""
+        hwnd, self._next_hwnd = self._next_hwnd, self._next_hwnd + 1
+        self._push(ForegroundEvent(EVENT_FOREGROUND, hwnd, title, process))
+
+    def set_title(self, title: str):
+        """模拟当前前台窗口标题变化"""
+        state = self._state
+        self._push(ForegroundEvent(EVENT_TITLE, state.hwnd, title, state.process))
+
+    def _push(self, event: ForegroundEvent):
+        self._state = event
+        if self._emit:
+            self._emit(event)
+
+
+class ForegroundMonitor:
+    """前台窗口状态与订阅
+
+    Args:
+        backend: 事件源，默认使用 WinEventBackend
+    """
+
+    def __init__(self, backend: ForegroundBackend = None):
+        self._backend = backend or WinEventBackend()
+        self._cond = threading.Condition()
+        self._state = ForegroundEvent(EVENT_FOREGROUND)
+        self._seq = 0
+        self._subscribers: list[Callable[[ForegroundEvent], None]] = []
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> bool:
+        """读取初始状态并开始接收事件，事件源不可用时返回 False"""
+        if self._running:
+            return True
+        try:
+            self._state = self._backend.snapshot()
+            self._running = self._backend.start(self._emit)
+        except Exception as e:
+            logger.warning(f"Foreground monitor unavailable: {e}")
+            self._running = False
+        if self._running:
+            logger.info(f"Foreground monitor started ({type(self._backend).__name__})")
+        return self._running
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._backend.stop()
+        with self._cond:
+            self._cond.notify_all()
+
+    def current(self) -> ForegroundEvent:
+        return self._state
+
+    def wake(self):
+        """唤醒所有 wait_for 等待者重新检查取消事件"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def subscribe(self, callback: Callable[[ForegroundEvent], None]) -> Callable[[], None]:
+        """订阅状态变化，返回取消订阅函数
+
+        回调在事件源线程中同步调用，应尽快返回。
+        """
+        with self._cond:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._cond:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _emit(self, event: ForegroundEvent):
+        with self._cond:
+            last = self._state
+            # 标题未变化的重复事件直接丢弃
+            if event.hwnd == last.hwnd and event.title == last.title:
+                return
+            self._state = event
+            self._seq += 1
+            self._cond.notify_all()
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Foreground subscriber failed: {e}", exc_info=True)
+
+    def wait_for(self, predicate: Callable[[ForegroundEvent], bool], timeout: float,
+                 cancel: threading.Event = None) -> bool:
+        """阻塞等待前台状态满足条件，仅在状态变化时重新求值
+
+        Args:
+            predicate: 条件函数，参数为当前状态
+            timeout: 超时（秒）
+            cancel: 取消事件，置位后尽快返回 False
+        """
+        deadline = time.monotonic() + timeout
+        seen = -1
+        with self._cond:
+            while True:
+                if seen != self._seq:
+                    seen = self._seq
+                    if predicate(self._state):
+                        return True
+                if cancel is not None and cancel.is_set():
+                    return False
+                left = deadline - time.monotonic()
+                if left <= 0 or not self._running:
+                    return False
+                self._cond.wait(min(left, _CANCEL_CHECK) if cancel is not None else left)
+
+    async def wait_for_async(self, predicate: Callable[[ForegroundEvent], bool],
+                             timeout: float, cancel: threading.Event = None) -> bool:
+        """wait_for 的协程版本，在事件循环中挂起而不占用线程"""
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        unsubscribe = self.subscribe(lambda _: loop.call_soon_threadsafe(changed.set))
+        try:
+            deadline = loop.time() + timeout
+            seen = -1
+            while True:
+                changed.clear()
+                if seen != self._seq:
+                    seen = self._seq
+                    if predicate(self._state):
+                        return True
+                if cancel is not None and cancel.is_set():
+                    return False
+                left = deadline - loop.time()
+                if left <= 0 or not self._running:
+                    return False
+                try:
+                    await asyncio.wait_for(changed.wait(), min(left, _CANCEL_CHECK))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            unsubscribe()
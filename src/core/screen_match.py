@@ -0,0 +1,381 @@
+"""屏幕区域匹配 — 按区域一次截取像素缓冲，批量比较参考图或采样点
+
+比较不逐像素调用 Python：每个颜色通道展开为 16 位通道后整体装入大整数，
+一次整数加减与掩码运算即可判断一整行所有通道是否在容差内。
+截图后端可替换，SyntheticCapture 在无显示器环境下提供合成缓冲。
+"""
+
+import ctypes
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable
+from ..utils.logger import get_logger
+
+logger = get_logger('screen_match')
+
+
+class Frame:
+    """截取的屏幕区域，BGRA 自上而下排列，alpha 统一置 0
+
+    Args:
+        x, y: 区域左上角的屏幕坐标
+        width, height: 区域尺寸
+        data: width * height * 4 字节像素数据
+    """
+
+    __slots__ = ('x', 'y', 'width', 'height', 'data')
+
+    def __init__(self, x: int, y: int, width: int, height: int, data):
+        buf = bytearray(data)
+        buf[3::4] = bytes(width * height)
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.data = bytes(buf)
+
+    def row(self, y: int) -> bytes:
+        stride = self.width * 4
+        return self.data[y * stride:(y + 1) * stride]
+
+    def pixel(self, x: int, y: int) -> str:
+        """指定区域内坐标的颜色（#rrggbb）"""
+        i = (y * self.width + x) * 4
+        b, g, r = self.data[i], self.data[i + 1], self.data[i + 2]
+        return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def parse_color(color: str) -> bytes:
+    """#rrggbb → BGRA 字节（alpha 为 0）"""
+    text = color.lstrip('#')
+    r, g, b = int(text[0:2], 16), int(text[2:4], 16), int(text[4:6], 16)
+    return bytes((b, g, r, 0))
+
+
+# ── 批量通道比较 ──
+
+@lru_cache(maxsize=256)
+def _repeat(value: int, lanes: int) -> int:
+    """将 16 位值重复 lanes 次组成的整数"""
+    return int.from_bytes(value.to_bytes(2, 'little') * lanes, 'little')
+
+
+def _expand(data: bytes) -> int:
+    """每个字节展开为一个 16 位通道并装入整数"""
+    buf = bytearray(len(data) * 2)
+    buf[0::2] = data
+    return int.from_bytes(buf, 'little')
+
+
+def _lanes_ok(a: int, b: int, lanes: int, tolerance: int) -> int:
+    """逐通道判断 |a - b| <= tolerance，满足的通道第 9 位置 1
+
+    d = 256 + a - b 落在 [1, 511]，各通道互不借位；
+    d + 256 + t 的第 9 位表示 d >= 256 - t，d + 255 - t 的第 9 位表示 d > 256 + t。
+    """
+    d = (a | _repeat(0x100, lanes)) - b
+    return ((d + _repeat(0x100 + tolerance, lanes))
+            & ~(d + _repeat(0xFF - tolerance, lanes))
+            & _repeat(0x200, lanes))
+
+
+def _all_ok(a: int, b: int, lanes: int, tolerance: int) -> bool:
+    return _lanes_ok(a, b, lanes, tolerance) == _repeat(0x200, lanes)
+
+
+def _pixel_hits(row: int, color: int, pixels: int, tolerance: int) -> bytes:
+    """一行中每个像素是否与颜色匹配，返回每像素一字节（匹配为非 0）"""
+    ok = _lanes_ok(row, color, pixels * 4, tolerance)
+    ok &= (ok >> 16) & (ok >> 32) & (ok >> 48)
+    return ok.to_bytes(pixels * 8, 'little')[1::8]
+
+
+def _positions(hits: bytes, limit: int) -> Iterable[int]:
+    """hits 中非 0 字节的下标（不超过 limit）"""
+    marker = b'\x02'
+    i = hits.find(marker)
+    while 0 <= i <= limit:
+        yield i
+        i = hits.find(marker, i + 1)
+
+
+# ── 匹配模式 ──
+
+class ImagePattern:
+    """参考图模板：预先展开每行通道，在区域内查找首个匹配位置"""
+
+    def __init__(self, frame: Frame):
+        self.width = frame.width
+        self.height = frame.height
+        self._rows = tuple(frame.row(y) for y in range(frame.height))
+        self._lanes = tuple(_expand(row) for row in self._rows)
+        self._anchor = self._rows[0][:4] if self._rows and self.width else b''
+
+    def find(self, frame: Frame, tolerance: int = 0) -> tuple[int, int] | None:
+        """在区域中查找模板，返回区域内左上角坐标"""
+        tw, th = self.width, self.height
+        if not tw or not th or tw > frame.width or th > frame.height:
+            return None
+        if tolerance <= 0:
+            return self._find_exact(frame)
+        return self._find_tolerant(frame, tolerance)
+
+    def _find_exact(self, frame: Frame) -> tuple[int, int] | None:
+        first = self._rows[0]
+        max_x = (frame.width - self.width) * 4
+        for y in range(frame.height - self.height + 1):
+            row = frame.row(y)
+            i = row.find(first)
+            while 0 <= i <= max_x:
+                if i % 4 == 0 and self._rows_equal(frame, i // 4, y):
+                    return i // 4, y
+                i = row.find(first, i + 1)
+        return None
+
+    def _rows_equal(self, frame: Frame, x: int, y: int) -> bool:
+        start, end = x * 4, (x + self.width) * 4
+        for j in range(1, self.height):
+            if frame.row(y + j)[start:end] != self._rows[j]:
+                return False
+        return True
+
+    def _find_tolerant(self, frame: Frame, tolerance: int) -> tuple[int, int] | None:
+        fw = frame.width
+        anchor = _expand(self._anchor * fw)
+        rows: dict[int, int] = {}
+
+        def expanded(y: int) -> int:
+            value = rows.get(y)
+            if value is None:
+                value = rows[y] = _expand(frame.row(y))
+            return value
+
+        lanes = self.width * 4
+        mask = (1 << (lanes * 16)) - 1
+        for y in range(frame.height - self.height + 1):
+            hits = _pixel_hits(expanded(y), anchor, fw, tolerance)
+            for x in _positions(hits, fw - self.width):
+                shift = x * 64
+                if all(_all_ok((expanded(y + j) >> shift) & mask, self._lanes[j], lanes, tolerance)
+                       for j in range(self.height)):
+                    return x, y
+        return None
+
+
+class PointSet:
+    """采样点集合：所有点同时在容差内才算匹配
+
+    Args:
+        points: [{'x', 'y', 'color'}]，屏幕坐标
+    """
+
+    def __init__(self, points: list[dict]):
+        coords = [(int(p.get('x', 0)), int(p.get('y', 0))) for p in points]
+        xs = [c[0] for c in coords]
+        ys = [c[1] for c in coords]
+        self.bounds = (min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+        left, top, width, _ = self.bounds
+        self._offsets = tuple(((y - top) * width + (x - left)) * 4 for x, y in coords)
+        self._expected = _expand(b''.join(parse_color(str(p.get('color', '#000000')))
+                                          for p in points))
+        self._lanes = len(points) * 4
+        self.center = coords[0]
+
+    def match(self, frame: Frame, tolerance: int = 0) -> bool:
+        data = frame.data
+        actual = _expand(b''.join(data[o:o + 4] for o in self._offsets))
+        return _all_ok(actual, self._expected, self._lanes, tolerance)
+
+
+def compile_points(value) -> PointSet | None:
+    """编译期字段转换：采样点列表 → PointSet，空或无效时返回 None"""
+    if not value or not isinstance(value, list):
+        return None
+    try:
+        return PointSet(value)
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"Invalid sample points: {e}")
+        return None
+
+
+# ── 参考图 ──
+
+def load_bmp(path: str) -> Frame:
+    """读取 24/32 位未压缩 BMP（screenshot 步骤保存的格式）"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if raw[:2] != b'BM':
+        raise ValueError(f'not a BMP file: {path}')
+    offset = struct.unpack_from('<I', raw, 10)[0]
+    width, height = struct.unpack_from('<ii', raw, 18)
+    bpp = struct.unpack_from('<H', raw, 28)[0]
+    compression = struct.unpack_from('<I', raw, 30)[0]
+    if bpp not in (24, 32) or compression not in (0, 3):
+        raise ValueError(f'unsupported BMP format: {bpp} bpp, compression {compression}')
+    top_down = height < 0
+    height = abs(height)
+    step = bpp // 8
+    stride = (width * step + 3) & ~3
+    rows = []
+    for y in range(height):
+        start = offset + y * stride
+        row = raw[start:start + width * step]
+        if step == 3:
+            out = bytearray(width * 4)
+            out[0::4] = row[0::3]
+            out[1::4] = row[1::3]
+            out[2::4] = row[2::3]
+            row = bytes(out)
+        rows.append(row)
+    if not top_down:
+        rows.reverse()
+    return Frame(0, 0, width, height, b''.join(rows))
+
+
+_patterns: OrderedDict[tuple, ImagePattern] = OrderedDict()
+_patterns_lock = threading.Lock()
+_PATTERN_CACHE_SIZE = 32
+
+
+def load_pattern(path: str) -> ImagePattern:
+    """加载参考图模板，按路径和修改时间缓存"""
+    key = (path, os.path.getmtime(path))
+    with _patterns_lock:
+        pattern = _patterns.get(key)
+        if pattern is not None:
+            _patterns.move_to_end(key)
+            return pattern
+    pattern = ImagePattern(load_bmp(path))
+    with _patterns_lock:
+        _patterns[key] = pattern
+        while len(_patterns) > _PATTERN_CACHE_SIZE:
+            _patterns.popitem(last=False)
+    return pattern
+
+
+# ── 截图后端 ──
+
+class CaptureBackend:
+    """屏幕区域截取接口"""
+
+    def capture(self, x: int, y: int, w: int, h: int) -> Frame:
+        """截取区域，w/h 为 0 时截取到屏幕右下角"""
+        raise NotImplementedError
+
+
+class GdiCapture(CaptureBackend):
+    """GDI BitBlt + GetDIBits：每次只做一轮 DC 往返"""
+
+    class _BitmapInfoHeader(ctypes.Structure):
+        _fields_ = [
+            ('biSize', ctypes.c_uint32), ('biWidth', ctypes.c_int32),
+            ('biHeight', ctypes.c_int32), ('biPlanes', ctypes.c_uint16),
+            ('biBitCount', ctypes.c_uint16), ('biCompression', ctypes.c_uint32),
+            ('biSizeImage', ctypes.c_uint32), ('biXPelsPerMeter', ctypes.c_int32),
+            ('biYPelsPerMeter', ctypes.c_int32), ('biClrUsed', ctypes.c_uint32),
+            ('biClrImportant', ctypes.c_uint32),
+        ]
+
+    def capture(self, x: int, y: int, w: int, h: int) -> Frame:
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        if w <= 0:
+            w = user32.GetSystemMetrics(0) - x
+        if h <= 0:
+            h = user32.GetSystemMetrics(1) - y
+
+        hdc_screen = user32.GetDC(0)
+        hdc_mem = gdi32.CreateCompatibleDC(hdc_screen)
+        hbmp = gdi32.CreateCompatibleBitmap(hdc_screen, w, h)
+        old_bmp = gdi32.SelectObject(hdc_mem, hbmp)
+        try:
+            gdi32.BitBlt(hdc_mem, 0, 0, w, h, hdc_screen, x, y, 0x00CC0020)  # SRCCOPY
+            bmi = self._BitmapInfoHeader()
+            bmi.biSize = ctypes.sizeof(self._BitmapInfoHeader)
+            bmi.biWidth = w
+            bmi.biHeight = -h  # top-down
+            bmi.biPlanes = 1
+            bmi.biBitCount = 32
+            bmi.biCompression = 0  # BI_RGB
+            buf = ctypes.create_string_buffer(w * h * 4)
+            gdi32.GetDIBits(hdc_mem, hbmp, 0, h, buf, ctypes.byref(bmi), 0)
+        finally:
+            gdi32.SelectObject(hdc_mem, old_bmp)
+            gdi32.DeleteObject(hbmp)
+            gdi32.DeleteDC(hdc_mem)
+            user32.ReleaseDC(0, hdc_screen)
+        return Frame(x, y, w, h, buf.raw)
+
+
+class SyntheticCapture(CaptureBackend):
+    """内存画布截图后端，用于无显示器环境下的验证和基准测试
+
+    Args:
+        width, height: 画布尺寸
+        background: 背景色 #rrggbb
+    """
+
+    def __init__(self, width: int = 1920, height: int = 1080, background: str = '#000000'):
+        self.width = width
+        self.height = height
+        self._canvas = bytearray(parse_color(background) * (width * height))
+        self._lock = threading.Lock()
+        self.captures = 0
+
+    def fill(self, x: int, y: int, w: int, h: int, color: str):
+        """填充矩形"""
+        pixel = parse_color(color)
+        with self._lock:
+            for row in range(max(0, y), min(self.height, y + h)):
+                left, right = max(0, x), min(self.width, x + w)
+                if left < right:
+                    start = (row * self.width + left) * 4
+                    self._canvas[start:start + (right - left) * 4] = pixel * (right - left)
+
+    def paste(self, x: int, y: int, frame: Frame):
+        """把图像贴到画布指定位置"""
+        with self._lock:
+            for j in range(frame.height):
+                row = y + j
+                if not 0 <= row < self.height:
+                    continue
+                src = frame.row(j)
+                left, right = max(0, x), min(self.width, x + frame.width)
+                if left < right:
+                    start = (row * self.width + left) * 4
+                    self._canvas[start:start + (right - left) * 4] = \
+                        src[(left - x) * 4:(right - x) * 4]
+
+    def capture(self, x: int, y: int, w: int, h: int) -> Frame:
+        if w <= 0:
+            w = self.width - x
+        if h <= 0:
+            h = self.height - y
+        stride = self.width * 4
+        rows = []
+        with self._lock:
+            self.captures += 1
+            for row in range(y, y + h):
+                if 0 <= row < self.height:
+                    line = bytes(self._canvas[row * stride:(row + 1) * stride])
+                    # 超出画布的部分补 0
+                    left = line[max(0, x) * 4:max(0, min(self.width, x + w)) * 4]
+                    rows.append(bytes(max(0, -x) * 4) + left
+                                + bytes(max(0, x + w - self.width) * 4))
+                else:
+                    rows.append(bytes(w * 4))
+        return Frame(x, y, w, h, b''.join(rows))
+
+
+_default_capture: CaptureBackend | None = None
+
+
+def default_capture() -> CaptureBackend:
+    """默认截图后端（GDI）"""
+    global _default_capture
+    if _default_capture is None:
+        _default_capture = GdiCapture()
+    return _default_capture
@@ -12,9 +12,16 @@ STEP_TYPES = [
     ('mouse_scroll', '鼠标滚轮', '🔄'),
     ('wait_window', '等待窗口', '🪟'),
     ('wait_pixel', '等待像素', '🎨'),
+    ('wait_region', '等待图像', '🖼'),
+    ('find_image', '查找图像', '🔍'),
     ('window_activate', '激活窗口', '🪟'),
     ('if_condition', '条件分支', '🔀'),
     ('loop', '循环', '🔁'),
+    ('parallel', '并行分支', '⏸'),
+    ('parallel_for_each', '并行遍历', '🔀'),
+    ('call_flow', '调用流程', '📞'),
+    ('for_each_line', '逐行遍历', '📜'),
+    ('for_each_chunk', '分块遍历', '📦'),
     # 原有动作类型也可作为步骤
     ('app', '打开应用', '📂'),
     ('keys', '按键', '⌨'),
@@ -27,6 +34,8 @@ STEP_TYPES = [
     ('screenshot', '截图', '📸'),
     ('file_read', '读文件', '📖'),
     ('file_write', '写文件', '✏️'),
+    ('json_extract', 'JSON提取', '🧩'),
+    ('regex_extract', '正则提取', '🔎'),
 ]
 
 # 条件分支数据源
@@ -43,6 +52,10 @@ CONDITION_OPS = [
     ('equals', '等于'),
     ('starts_with', '开头是'),
     ('not_contains', '不包含'),
+    ('gt', '大于'),
+    ('ge', '大于等于'),
+    ('lt', '小于'),
+    ('le', '小于等于'),
 ]
 
 # 步骤分类（用于前端 API 和 UI 展示）
@@ -71,6 +84,10 @@ PALETTE_CATEGORIES = [
     ('数据', [
         ('file_read', '读文件', '📖', '读取文件内容'),
         ('file_write', '写文件', '✏️', '写入文件内容'),
+        ('json_extract', 'JSON提取', '🧩', '按 JSONPath 从变量提取字段'),
+        ('regex_extract', '正则提取', '🔎', '用正则从变量提取匹配文本'),
+        ('for_each_line', '逐行遍历', '📜', '流式读取文件，对每一行执行循环体'),
+        ('for_each_chunk', '分块遍历', '📦', '按固定长度分块读取文件并执行循环体'),
     ]),
     ('系统', [
         ('screenshot', '截图', '📸', '截取屏幕区域'),
@@ -81,10 +98,15 @@ PALETTE_CATEGORIES = [
     ('流程', [
         ('if_condition', '条件', '🔀', '条件分支'),
         ('loop', '循环', '🔁', '循环执行'),
+        ('parallel', '并行', '⏸', '并发执行多个分支'),
+        ('parallel_for_each', '并行遍历', '🔀', '并发处理列表中的每一项'),
+        ('call_flow', '调用流程', '📞', '调用另一个组合动作并取回变量'),
     ]),
     ('等待', [
         ('wait_window', '窗口', '🪟', '等待窗口'),
         ('wait_pixel', '像素', '🎨', '等待像素'),
+        ('wait_region', '图像', '🖼', '等待区域出现参考图或采样点'),
+        ('find_image', '找图', '🔍', '在区域中查找参考图'),
         ('window_activate', '激活窗口', '🪟', '激活指定窗口'),
     ]),
 ]
@@ -101,7 +123,11 @@ STEP_CATEGORY_COLORS = {
     'mouse_double_click': 'peach', 'mouse_scroll': 'peach',
     'set_var': 'green', 'get_clipboard': 'green', 'set_clipboard': 'green',
     'file_read': 'green', 'file_write': 'green',
+    'json_extract': 'green', 'regex_extract': 'green',
+    'for_each_line': 'mauve', 'for_each_chunk': 'mauve',
     'if_condition': 'mauve', 'loop': 'mauve',
+    'parallel': 'mauve', 'parallel_for_each': 'mauve', 'call_flow': 'mauve',
     'wait_window': 'yellow', 'wait_pixel': 'yellow',
+    'wait_region': 'yellow', 'find_image': 'yellow',
     'window_activate': 'yellow',
 }
@@ -24,8 +24,14 @@ def step_summary(step: dict) -> str:
         return f'"{step.get("title", "")}"'
     elif t == 'wait_pixel':
         return f"({step.get('x', 0)},{step.get('y', 0)}) {step.get('color', '')}"
+    elif t in ('wait_region', 'find_image'):
+        target = step.get('image', '') or f"{len(step.get('points') or [])} 个采样点"
+        return f"{target} → {step.get('var', '')}"
     elif t == 'if_condition':
         cond = step.get('condition', {})
+        if isinstance(cond, str) or 'expr' in cond:
+            expr = cond if isinstance(cond, str) else str(cond['expr'])
+            return expr[:30] + ('...' if len(expr) > 30 else '')
         src = cond.get('source', '')
         op = cond.get('op', '')
         val = cond.get('value', '')
@@ -35,6 +41,10 @@ def step_summary(step: dict) -> str:
         if mode == 'count':
             return f"{step.get('count', 0)} 次"
         return "条件循环"
+    elif t == 'parallel':
+        return f"{len(step.get('branches', []))} 个分支"
+    elif t == 'parallel_for_each':
+        return f"{step.get('item_var', 'item')} in {{{{{step.get('list_var', '')}}}}}"
     elif t in ('app', 'keys', 'snippet', 'shell', 'url'):
         label = step.get('label', '') or step.get('target', '')
         return label[:20] + ('...' if len(label) > 20 else '')
@@ -56,6 +66,17 @@ def step_summary(step: dict) -> str:
         return step.get('path', '')[:20]
     elif t == 'file_write':
         return step.get('path', '')[:20]
+    elif t == 'call_flow':
+        params = step.get('args') or {}
+        return f"{step.get('flow', '')}({', '.join(params) if isinstance(params, dict) else ''})"
+    elif t == 'json_extract':
+        return f"{step.get('source_var', '')}: {step.get('path', '$')} → {step.get('var', '')}"
+    elif t == 'regex_extract':
+        pattern = step.get('pattern', '')
+        return f"/{pattern[:16]}{'...' if len(pattern) > 16 else ''}/ → {step.get('var', '')}"
+    elif t in ('for_each_line', 'for_each_chunk'):
+        default = 'line' if t == 'for_each_line' else 'chunk'
+        return f"{step.get('item_var', default)} in {step.get('path', '')[:20]}"
     return ''
 
 
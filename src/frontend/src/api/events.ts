@@ -0,0 +1,123 @@
+import { ref } from 'vue'
+import { WS_CONFIG } from '@/constants'
+
+/**
+ * WebSocket 推送客户端
+ * 按主题订阅服务端事件（recorder / runs / config / tokens / context），
+ * 断线后按指数退避重连并恢复订阅；没有订阅时关闭连接
+ */
+
+export type EventTopic = 'recorder' | 'runs' | 'config' | 'tokens' | 'context'
+
+export interface ServerEvent<T = any> {
+  topic: EventTopic | 'ws'
+  key: string
+  data: T
+}
+
+export type EventHandler<T = any> = (event: ServerEvent<T>) => void
+
+class EventClient {
+  private socket: WebSocket | null = null
+  private handlers = new Map<EventTopic, Set<EventHandler>>()
+  private retryDelay: number = WS_CONFIG.RECONNECT_MIN
+  private retryTimer: number | null = null
+
+  /** 连接是否已建立（断开期间调用方可自行回退到 HTTP 拉取） */
+  public readonly connected = ref(false)
+
+  /**
+   * 订阅主题，返回取消订阅的函数
+   * 采样类主题（recorder / runs）订阅后会立即收到当前值
+   */
+  subscribe<T = any>(topic: EventTopic, handler: EventHandler<T>): () => void {
+    let set = this.handlers.get(topic)
+    if (!set) {
+      set = new Set()
+      this.handlers.set(topic, set)
+      this.send({ op: 'subscribe', topics: [topic] })
+    }
+    set.add(handler as EventHandler)
+    this.connect()
+
+    return () => {
+      const current = this.handlers.get(topic)
+      if (!current) return
+      current.delete(handler as EventHandler)
+      if (current.size) return
+      this.handlers.delete(topic)
+      this.send({ op: 'unsubscribe', topics: [topic] })
+      if (!this.handlers.size) this.close()
+    }
+  }
+
+  private url(): string {
+    const scheme = location.protocol === 'https:' ? 'wss' : 'ws'
+    const topics = [...this.handlers.keys()].join(',')
+    return `${scheme}://${location.host}${WS_CONFIG.PATH}?topics=${topics}`
+  }
+
+  private connect(): void {
+    if (this.socket || this.retryTimer !== null || !this.handlers.size) return
+
+    const socket = new WebSocket(this.url())
+    this.socket = socket
+
+    socket.onopen = () => {
+      this.connected.value = true
+      this.retryDelay = WS_CONFIG.RECONNECT_MIN
+      // 连接建立期间新增的主题不在 URL 中，这里补发（重复订阅由服务端忽略）
+      this.send({ op: 'subscribe', topics: [...this.handlers.keys()] })
+    }
+
+    socket.onmessage = (message: MessageEvent) => {
+      let events: ServerEvent[]
+      try {
+        events = JSON.parse(message.data)
+      } catch (error) {
+        console.error('Invalid push message:', error)
+        return
+      }
+      for (const event of events) {
+        if (event.topic === 'ws') {
+          if (event.key === 'error') console.warn('Push error:', event.data.error)
+          continue
+        }
+        for (const handler of this.handlers.get(event.topic) ?? []) {
+          handler(event)
+        }
+      }
+    }
+
+    socket.onclose = () => {
+      if (this.socket !== socket) return // 已主动关闭并被新连接取代
+      this.socket = null
+      this.connected.value = false
+      if (!this.handlers.size) return
+      this.retryTimer = window.setTimeout(() => {
+        this.retryTimer = null
+        this.connect()
+      }, this.retryDelay)
+      this.retryDelay = Math.min(this.retryDelay * 2, WS_CONFIG.RECONNECT_MAX)
+    }
+  }
+
+  private send(message: { op: 'subscribe' | 'unsubscribe'; topics: EventTopic[] }): void {
+    // 未连接时无需发送：连接建立时会订阅全部主题
+    if (this.socket?.readyState === WebSocket.OPEN) {
+      this.socket.send(JSON.stringify(message))
+    }
+  }
+
+  private close(): void {
+    if (this.retryTimer !== null) {
+      clearTimeout(this.retryTimer)
+      this.retryTimer = null
+    }
+    this.socket?.close()
+    this.socket = null
+    this.connected.value = false
+  }
+}
+
+export const events = new EventClient()
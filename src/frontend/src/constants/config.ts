@@ -33,6 +33,13 @@ export const API_CONFIG = {
   BASE_URL: 'http://localhost:8765'
 } as const
 
+// WebSocket push configuration
+export const WS_CONFIG = {
+  PATH: '/api/v1/ws',
+  RECONNECT_MIN: 1000, // 1 second
+  RECONNECT_MAX: 30000 // 30 seconds
+} as const
+
 // Text configuration
 export const TEXT_CONFIG = {
   MAX_LABEL_LENGTH: 20,
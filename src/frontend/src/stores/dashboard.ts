@@ -1,8 +1,20 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
 import { tokenApi } from '@/api/tokens'
+import { events, type ServerEvent } from '@/api/events'
 import type { Token, TokenStats, TokenDetail } from '@/types/token'
 
+type TokenEventKind = 'stats' | 'details'
+
+interface TokenEvent {
+  idx: number
+  kind: TokenEventKind
+  data: any
+}
+
+// 当前 token 超过该时长没有新数据（推送或拉取）时才回退到 HTTP 拉取
+const STALE_AFTER = 20000 // 20 seconds
+
 export const useDashboardStore = defineStore('dashboard', () => {
   const tokens = ref<Token[]>([])
   const currentTokenIdx = ref(0)
@@ -10,7 +22,8 @@ export const useDashboardStore = defineStore('dashboard', () => {
   const details = ref<TokenDetail[]>([])
   const loading = ref(false)
   const autoRefresh = ref(true)
-  const refreshInterval = ref<number | null>(null)
+  const staleTimers: Record<TokenEventKind, number | null> = { stats: null, details: null }
+  let unsubscribe: (() => void) | null = null
 
   const fetchTokens = async () => {
     try {
@@ -30,6 +43,7 @@ export const useDashboardStore = defineStore('dashboard', () => {
       stats.value = null
     } finally {
       loading.value = false
+      markFresh('stats')
     }
   }
 
@@ -40,6 +54,8 @@ export const useDashboardStore = defineStore('dashboard', () => {
     } catch (error) {
       console.error('Failed to fetch details:', error)
       details.value = []
+    } finally {
+      markFresh('details')
     }
   }
 
@@ -48,20 +64,48 @@ export const useDashboardStore = defineStore('dashboard', () => {
     await Promise.all([fetchStats(idx), fetchDetails(idx)])
   }
 
-  const startAutoRefresh = () => {
-    if (refreshInterval.value) return
-    refreshInterval.value = window.setInterval(() => {
-      if (autoRefresh.value) {
+  const markFresh = (kind: TokenEventKind) => {
+    if (!unsubscribe) return
+    const timer = staleTimers[kind]
+    if (timer !== null) clearTimeout(timer)
+    staleTimers[kind] = window.setTimeout(() => {
+      staleTimers[kind] = null
+      if (!autoRefresh.value) {
+        markFresh(kind)
+      } else if (kind === 'stats') {
         fetchStats()
+      } else {
         fetchDetails()
       }
-    }, 20000) // 20 seconds
+    }, STALE_AFTER)
+  }
+
+  const onTokenEvent = (event: ServerEvent<TokenEvent>) => {
+    const { idx, kind, data } = event.data
+    if (idx !== currentTokenIdx.value) return
+    if (kind === 'stats') {
+      stats.value = data
+    } else {
+      details.value = data
+    }
+    markFresh(kind)
+  }
+
+  const startAutoRefresh = () => {
+    if (unsubscribe) return
+    // 卡片定时刷新与其他窗口的拉取结果都会推送到 tokens 主题
+    unsubscribe = events.subscribe<TokenEvent>('tokens', onTokenEvent)
+    markFresh('stats')
+    markFresh('details')
   }
 
   const stopAutoRefresh = () => {
-    if (refreshInterval.value) {
-      clearInterval(refreshInterval.value)
-      refreshInterval.value = null
+    unsubscribe?.()
+    unsubscribe = null
+    for (const kind of ['stats', 'details'] as const) {
+      const timer = staleTimers[kind]
+      if (timer !== null) clearTimeout(timer)
+      staleTimers[kind] = null
     }
   }
 
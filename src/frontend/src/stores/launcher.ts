@@ -1,6 +1,7 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
 import { actionApi } from '@/api/actions'
+import { events } from '@/api/events'
 import type { Action, ActionsResponse, SearchResult } from '@/types/action'
 import { debounce } from '@/utils'
 import { DELAY_CONFIG } from '@/constants'
@@ -13,6 +14,7 @@ export const useLauncherStore = defineStore('launcher', () => {
   const loading = ref(false)
   const searchQuery = ref('')
   const searchResults = ref<SearchResult[]>([])
+  let unwatchContext: (() => void) | null = null
 
   const fetchActions = async (page?: number) => {
     loading.value = true
@@ -151,6 +153,21 @@ export const useLauncherStore = defineStore('launcher', () => {
     searchResults.value = []
   }
 
+  // 前台进程匹配到上下文页时由服务端推送，切换到该页
+  const watchContextPage = () => {
+    if (unwatchContext) return
+    unwatchContext = events.subscribe<{ page: number; process: string }>('context', (event) => {
+      if (event.data.page !== currentPage.value) {
+        fetchActions(event.data.page)
+      }
+    })
+  }
+
+  const unwatchContextPage = () => {
+    unwatchContext?.()
+    unwatchContext = null
+  }
+
   return {
     currentPage,
     pageName,
@@ -166,7 +183,9 @@ export const useLauncherStore = defineStore('launcher', () => {
     executeAction,
     reorderActions,
     search,
-    clearSearch
+    clearSearch,
+    watchContextPage,
+    unwatchContextPage
   }
 })
 
@@ -33,7 +33,8 @@ export default defineConfig(({ mode }) => ({
     proxy: {
       '/api': {
         target: 'http://127.0.0.1:18900',
-        changeOrigin: true
+        changeOrigin: true,
+        ws: true
       }
     }
   },
@@ -59,6 +59,30 @@ class WebConfig:
     enabled: bool = True
     port: int = 18900
     allowed_origins: list[str] = field(default_factory=list)
+    server: str = 'thread'  # thread（每个请求一个线程，HTTP/1.0）/ async（asyncio，HTTP/1.1 长连接）
+    handler_workers: int = 8  # async 模式下处理请求的线程数
+    keepalive_timeout: float = 15.0  # async 模式下空闲连接保持的秒数
+    ws_interval_ms: int = 100  # WebSocket 推送合并间隔（毫秒）
+
+
+@dataclass
+class ExecutionConfig:
+    """动作执行池配置"""
+    workers: int = 4
+    max_queue: int = 64
+    max_inflight_per_action: int = 4
+    flow_runtime: str = 'thread'  # combo 默认运行时: thread / async
+    async_io_workers: int = 4  # 异步模式下阻塞步骤的卸载线程数
+    max_async_runs: int = 256  # 同时运行的异步流程上限
+    trace_flows: bool = False  # 默认追踪每个 combo 步骤的耗时
+    trace_max_spans: int = 2000  # 单次运行最多保留的步骤记录
+    type_chunk_size: int = 256  # type_text 批量输入时单次 SendInput 的最大字符数
+    playback_speed: float = 1.0  # combo 回放倍速 0.5-10，缩放步骤间隔与 delay 步骤
+    high_resolution_timer: bool = False  # combo 运行期间把系统计时器精度提高到 1ms
+    http_pool_per_host: int = 4  # http_request 步骤每个主机保持的 keep-alive 连接数
+    http_cache_entries: int = 256  # http_request 响应缓存条目上限（步骤 cache: true 时使用）
+    condition_snapshot_ms: int = 0  # 条件求值复用窗口标题/进程名/剪贴板读取结果的时间窗口
+    max_call_depth: int = 8  # call_flow 子流程嵌套深度上限
 
 
 @dataclass
@@ -68,6 +92,7 @@ class AppConfig:
     api: APIConfig = field(default_factory=APIConfig)
     launcher: LauncherConfig = field(default_factory=LauncherConfig)
     web: WebConfig = field(default_factory=WebConfig)
+    execution: ExecutionConfig = field(default_factory=ExecutionConfig)
 
 
 class ConfigManager:
@@ -240,6 +265,30 @@ class ConfigManager:
             enabled=web_raw.get('enabled', True),
             port=web_raw.get('port', 18900),
             allowed_origins=web_raw.get('allowed_origins', []),
+            server=web_raw.get('server', 'thread'),
+            handler_workers=web_raw.get('handler_workers', 8),
+            keepalive_timeout=web_raw.get('keepalive_timeout', 15.0),
+            ws_interval_ms=web_raw.get('ws_interval_ms', 100),
+        )
+
+        # 解析 execution
+        exec_raw = raw.get('execution', {})
+        execution = ExecutionConfig(
+            workers=exec_raw.get('workers', 4),
+            max_queue=exec_raw.get('max_queue', 64),
+            max_inflight_per_action=exec_raw.get('max_inflight_per_action', 4),
+            flow_runtime=exec_raw.get('flow_runtime', 'thread'),
+            async_io_workers=exec_raw.get('async_io_workers', 4),
+            max_async_runs=exec_raw.get('max_async_runs', 256),
+            trace_flows=exec_raw.get('trace_flows', False),
+            trace_max_spans=exec_raw.get('trace_max_spans', 2000),
+            type_chunk_size=exec_raw.get('type_chunk_size', 256),
+            playback_speed=exec_raw.get('playback_speed', 1.0),
+            high_resolution_timer=exec_raw.get('high_resolution_timer', False),
+            http_pool_per_host=exec_raw.get('http_pool_per_host', 4),
+            http_cache_entries=exec_raw.get('http_cache_entries', 256),
+            condition_snapshot_ms=exec_raw.get('condition_snapshot_ms', 0),
+            max_call_depth=exec_raw.get('max_call_depth', 8),
         )
 
         return AppConfig(
@@ -247,6 +296,7 @@ class ConfigManager:
             api=api,
             launcher=launcher,
             web=web,
+            execution=execution,
         )
 
     def _to_dict(self, config: AppConfig) -> dict:
@@ -277,6 +327,9 @@ class ConfigManager:
         # web
         result['web'] = asdict(config.web)
 
+        # execution
+        result['execution'] = asdict(config.execution)
+
         return result
 
     def _validate_config(self, config: AppConfig) -> None:
@@ -309,6 +362,65 @@ class ConfigManager:
         # 验证 Web 配置
         if not 1024 <= config.web.port <= 65535:
             raise ValueError(f"Invalid web port: {config.web.port} (must be 1024-65535)")
+        if config.web.server not in ('thread', 'async'):
+            raise ValueError(f"Invalid web server: {config.web.server} (must be thread or async)")
+        if not 1 <= config.web.handler_workers <= 64:
+            raise ValueError(f"Invalid web handler_workers: {config.web.handler_workers} (must be 1-64)")
+        if not 0 < config.web.keepalive_timeout <= 300:
+            raise ValueError(f"Invalid web keepalive_timeout: {config.web.keepalive_timeout} (must be 0-300)")
+        if not 16 <= config.web.ws_interval_ms <= 5000:
+            raise ValueError(f"Invalid web ws_interval_ms: {config.web.ws_interval_ms} (must be 16-5000)")
+
+        # 验证执行池配置
+        if not 1 <= config.execution.workers <= 64:
+            raise ValueError(f"Invalid execution workers: {config.execution.workers} (must be 1-64)")
+
+        if config.execution.max_queue < 1:
+            raise ValueError(f"Invalid execution max_queue: {config.execution.max_queue} (must be >= 1)")
+
+        if config.execution.max_inflight_per_action < 1:
+            raise ValueError(
+                f"Invalid max_inflight_per_action: {config.execution.max_inflight_per_action} (must be >= 1)")
+
+        if config.execution.flow_runtime not in ['thread', 'async']:
+            raise ValueError(f"Invalid flow_runtime: {config.execution.flow_runtime}")
+
+        if not 1 <= config.execution.async_io_workers <= 64:
+            raise ValueError(
+                f"Invalid async_io_workers: {config.execution.async_io_workers} (must be 1-64)")
+
+        if config.execution.max_async_runs < 1:
+            raise ValueError(
+                f"Invalid max_async_runs: {config.execution.max_async_runs} (must be >= 1)")
+
+        if config.execution.trace_max_spans < 1:
+            raise ValueError(
+                f"Invalid trace_max_spans: {config.execution.trace_max_spans} (must be >= 1)")
+
+        if not 1 <= config.execution.type_chunk_size <= 4096:
+            raise ValueError(
+                f"Invalid type_chunk_size: {config.execution.type_chunk_size} (must be 1-4096)")
+
+        if not 0.5 <= config.execution.playback_speed <= 10:
+            raise ValueError(
+                f"Invalid playback_speed: {config.execution.playback_speed} (must be 0.5-10)")
+
+        if not 1 <= config.execution.http_pool_per_host <= 64:
+            raise ValueError(
+                f"Invalid http_pool_per_host: {config.execution.http_pool_per_host} (must be 1-64)")
+
+        if config.execution.http_cache_entries < 0:
+            raise ValueError(
+                f"Invalid http_cache_entries: {config.execution.http_cache_entries} (must be >= 0)")
+
+        if not 0 <= config.execution.condition_snapshot_ms <= 5000:
+            raise ValueError(
+                f"Invalid condition_snapshot_ms: {config.execution.condition_snapshot_ms} "
+                f"(must be 0-5000)")
+
+        if not 1 <= config.execution.max_call_depth <= 64:
+            raise ValueError(
+                f"Invalid max_call_depth: {config.execution.max_call_depth} (must be 1-64)")
 
         # 验证 Launcher 配置
         if config.launcher.default_view not in ['launcher', 'detail', 'overview']:
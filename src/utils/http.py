@@ -1,7 +1,16 @@
 """HTTP 请求封装"""
 
-import requests
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from http.cookiejar import DefaultCookiePolicy
 from typing import Any
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from .logger import get_logger
 
 logger = get_logger('http')
@@ -67,3 +76,252 @@ class HttpClient:
     def __del__(self):
         """析构时关闭 Session"""
         self.close()
+
+
+# ── 流程 HTTP 步骤 ──
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+# 可缓存的方法
+_CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+@dataclass(frozen=True, slots=True)
+class HttpResult:
+    """一次请求的结果"""
+    status: int
+    text: str
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    cached: bool = False  # 来自响应缓存（含 304 重新验证）
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+
+class _CacheEntry:
+    __slots__ = ('result', 'expires', 'etag', 'last_modified')
+
+    def __init__(self, result: HttpResult, expires: float):
+        self.result = result
+        self.expires = expires
+        self.etag = result.headers.get('ETag', '')
+        self.last_modified = result.headers.get('Last-Modified', '')
+
+
+def _freshness(headers: dict, ttl: float) -> float | None:
+    """响应可直接复用的秒数；None 表示不可缓存
+
+    ttl > 0 时优先使用步骤指定的有效期，否则取 Cache-Control max-age，
+    no-cache 或无有效期但带 ETag/Last-Modified 的响应以 0 缓存（每次重新验证）。
+    """
+    control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in control:
+        return None
+    if ttl > 0:
+        return ttl
+    if 'no-cache' not in control:
+        m = _MAX_AGE.search(control)
+        if m:
+            return float(m.group(1))
+    if headers.get('ETag') or headers.get('Last-Modified'):
+        return 0.0
+    return None
+
+
+def _decode_body(resp: requests.Response) -> str:
+    """响应文本：Content-Type 声明了 charset 时按声明解码，否则按 UTF-8（无效字节替换）
+
+    requests 对未声明 charset 的 text/* 响应使用 ISO-8859-1，中文会变成乱码。
+    """
+    if 'charset=' in resp.headers.get('Content-Type', '').lower():
+        return resp.text
+    return resp.content.decode('utf-8', errors='replace')
+
+
+class ResponseCache:
+    """按 (URL, 请求头) 缓存 GET 响应，LRU 淘汰
+
+    Args:
+        max_entries: 最多缓存的响应数
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._max = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> _CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, result: HttpResult, ttl: float) -> bool:
+        """缓存成功响应，不可缓存时返回 False"""
+        if result.status != 200:
+            return False
+        fresh = _freshness(result.headers, ttl)
+        if fresh is None:
+            return False
+        with self._lock:
+            self._entries[key] = _CacheEntry(result, time.monotonic() + fresh)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+        return True
+
+    def refresh(self, entry: _CacheEntry, headers: dict, ttl: float):
+        """304 重新验证后按新响应头延长有效期"""
+        merged = CaseInsensitiveDict(entry.result.headers)
+        merged.update(headers)
+        fresh = _freshness(merged, ttl)
+        entry.expires = time.monotonic() + (fresh or 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FlowHttpSession:
+    """流程 http_request 步骤共享的 HTTP 会话
+
+    keep-alive 连接池按主机复用连接（每个主机最多 per_host 个并发请求，超出时排队，
+    最多等待该请求的 timeout），轮询同一接口的流程不再每次建立 TCP/TLS 连接；
+    可选的响应缓存支持 TTL、ETag 与 Last-Modified。
+
+    会话由所有流程共享，因此不保存响应设置的 Cookie，避免一个流程的登录态泄漏到其他流程；
+    需要 Cookie 的步骤在 headers 中显式传入。
+
+    Args:
+        per_host: 每个主机的最大连接数
+        hosts: 连接池保留的主机数
+        cache_entries: 响应缓存条目上限
+    """
+
+    def __init__(self, per_host: int = 4, hosts: int = 16, cache_entries: int = 256):
+        self.per_host = per_host
+        self._session = requests.Session()
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))  # 拒绝所有 Cookie
+        # 排队由 _acquire 负责（可设等待上限），连接池本身不阻塞
+        adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=per_host, pool_block=False)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self.cache = ResponseCache(cache_entries)
+        self._lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._in_use: dict[tuple[str, str], int] = {}  # (scheme, host) → 进行中的请求数
+        # 指标
+        self._requests = 0
+        self._cache_hits = 0
+        self._revalidated = 0
+        self._errors = 0
+
+    def request(self, method: str, url: str, headers: dict = None, body: str = None,
+                json_body: Any = None, timeout: float = 5.0, cache: bool = False,
+                ttl: float = 0.0) -> HttpResult:
+        """发送请求并读取完整响应体（读完后连接归还连接池）
+
+        Args:
+            json_body: 非 None 时以 JSON 发送，忽略 body
+            cache: 是否使用响应缓存（仅 GET/HEAD）
+            ttl: 缓存有效期（秒），0 表示按响应头判断
+
+        Raises:
+            requests.RequestException: 连接失败、超时、等待空闲连接超时等
+        """
+        method = method.upper()
+        headers = dict(headers or {})
+        key = entry = None
+        if cache and method in _CACHEABLE_METHODS:
+            key = (method, url, tuple(sorted(headers.items())))
+            entry = self.cache.get(key)
+            if entry is not None:
+                if time.monotonic() < entry.expires:
+                    self._count('_cache_hits')
+                    return replace(entry.result, cached=True)
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+
+        self._count('_requests')
+        parts = urlsplit(url)
+        host = (parts.scheme.lower(), parts.netloc.lower())
+        try:
+            self._acquire(host, timeout)
+            try:
+                resp = self._session.request(
+                    method, url, headers=headers or None,
+                    data=body.encode('utf-8') if body and json_body is None else None,
+                    json=json_body, timeout=timeout)
+                result = HttpResult(resp.status_code, _decode_body(resp),
+                                    CaseInsensitiveDict(resp.headers))
+            finally:
+                self._release(host)
+        except requests.RequestException:
+            self._count('_errors')
+            raise
+
+        if entry is not None and resp.status_code == 304:
+            self._count('_revalidated')
+            self.cache.refresh(entry, result.headers, ttl)
+            return replace(entry.result, cached=True)
+        if key is not None:
+            self.cache.put(key, result, ttl)
+        return result
+
+    def _acquire(self, host: tuple[str, str], timeout: float):
+        """占用主机的一个连接名额，最多等待 timeout 秒"""
+        with self._slots:
+            if not self._slots.wait_for(lambda: self._in_use.get(host, 0) < self.per_host,
+                                        timeout):
+                raise requests.ConnectTimeout(
+                    f"No free connection to {host[1]} within {timeout}s "
+                    f"({self.per_host} in use)")
+            self._in_use[host] = self._in_use.get(host, 0) + 1
+
+    def _release(self, host: tuple[str, str]):
+        with self._slots:
+            remaining = self._in_use[host] - 1
+            if remaining:
+                self._in_use[host] = remaining
+            else:
+                del self._in_use[host]
+            self._slots.notify_all()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'per_host': self.per_host,
+                'requests': self._requests,
+                'cache_hits': self._cache_hits,
+                'revalidated': self._revalidated,
+                'errors': self._errors,
+                'cache_entries': len(self.cache),
+            }
+
+    def close(self):
+        self._session.close()
+        self.cache.clear()
+
+
+_default_session: FlowHttpSession | None = None
+_default_lock = threading.Lock()
+
+
+def default_session() -> FlowHttpSession:
+    """未注入会话时使用的进程级共享会话"""
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = FlowHttpSession()
+        return _default_session
@@ -114,32 +114,9 @@ def send_keys(vk_codes: list[int]) -> bool:
         logger.warning("Empty key codes")
         return False
 
+    from .platform_backend import get_backend
     try:
-        inputs = []
-
-        # 按下所有键
-        for vk in vk_codes:
-            inp = INPUT(type=INPUT_KEYBOARD)
-            inp._input.ki.wVk = vk
-            inp._input.ki.dwFlags = 0
-            inputs.append(inp)
-
-        # 释放所有键（逆序）
-        for vk in reversed(vk_codes):
-            inp = INPUT(type=INPUT_KEYBOARD)
-            inp._input.ki.wVk = vk
-            inp._input.ki.dwFlags = KEYEVENTF_KEYUP
-            inputs.append(inp)
-
-        n = len(inputs)
-        arr = (INPUT * n)(*inputs)
-        sent = ctypes.windll.user32.SendInput(n, arr, ctypes.sizeof(INPUT))
-
-        if sent != n:
-            logger.warning(f"Only sent {sent}/{n} inputs")
-            return False
-
-        return True
+        return get_backend().send_keys(vk_codes)
     except Exception as e:
         logger.error(f"Failed to send keys: {e}")
         return False
@@ -0,0 +1,647 @@
+"""平台后端 — 键鼠输入、剪贴板、窗口与时钟的统一接口
+
+执行引擎只通过当前后端访问 Win32：Windows 下默认 Win32Backend，其他平台默认 SimulatedBackend。
+SimulatedBackend 提供假剪贴板、假窗口和输入日志，配合 VirtualClock 可在无桌面环境中
+瞬间跳过所有延时，反复回放流程以测量引擎开销。
+"""
+
+import ctypes
+import ctypes.wintypes
+import os
+import threading
+import time
+from collections import deque
+from .logger import get_logger
+
+logger = get_logger('platform_backend')
+
+# mouse_event 标志
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_MIDDLEDOWN = 0x0020
+MOUSEEVENTF_MIDDLEUP = 0x0040
+MOUSEEVENTF_WHEEL = 0x0800
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+INPUT_MOUSE = 0
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+MOUSE_BUTTONS = {
+    'left': (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+    'right': (MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP),
+    'middle': (MOUSEEVENTF_MIDDLEDOWN, MOUSEEVENTF_MIDDLEUP),
+}
+
+CF_UNICODETEXT = 13
+
+VK_RETURN = 0x0D
+
+# send_input 批量事件：(类型, 参数...)
+INPUT_MOVE = 'move'      # (INPUT_MOVE, x, y) 移动到绝对屏幕坐标
+INPUT_BUTTON = 'button'  # (INPUT_BUTTON, button, down) 鼠标键按下/释放
+INPUT_WHEEL = 'wheel'    # (INPUT_WHEEL, delta) 滚轮格数（正数向上）
+INPUT_KEY = 'key'        # (INPUT_KEY, vk, down) 虚拟键按下/释放
+
+# type_text 批量输入时单次 SendInput 的默认最大字符数
+DEFAULT_INPUT_CHUNK = 256
+
+
+def text_key_events(text: str) -> list[tuple[int, int]]:
+    """把文本转换为按键列表 (wVk, wScan)，每项发送一次按下和释放
+
+    换行（\\r\\n、\\r、\\n）转为回车键；BMP 之外的字符拆成 UTF-16 代理对，前后两半各占一项。
+    wVk 为 0 的项以 KEYEVENTF_UNICODE 发送 wScan 码元。
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    events = []
+    append = events.append
+    for ch in text:
+        code = ord(ch)
+        if code == 0x0A:
+            append((VK_RETURN, 0))
+        elif code > 0xFFFF:
+            code -= 0x10000
+            append((0, 0xD800 | (code >> 10)))
+            append((0, 0xDC00 | (code & 0x3FF)))
+        else:
+            append((0, code))
+    return events
+
+
+# ── 时钟 ──
+
+# 截止时间前最后这段时间（秒）以 sleep(0) 让出 CPU 的方式等待，其余用睡眠
+YIELD_WINDOW = 0.001
+
+
+class RealClock:
+    """真实时钟"""
+
+    virtual = False
+
+    @staticmethod
+    def sleep(seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    @staticmethod
+    def monotonic() -> float:
+        return time.monotonic()
+
+    @staticmethod
+    def now() -> float:
+        """高精度时间基准（perf_counter），用于截止时间调度"""
+        return time.perf_counter()
+
+    @staticmethod
+    def sleep_until(deadline: float, spin: float = 0.0,
+                    interrupt: threading.Event = None) -> bool:
+        """睡眠到 now() 达到 deadline：先粗睡眠，剩余不足 spin 秒时精细等待
+
+        粗睡眠用 interrupt.wait，在 Windows 上受系统计时器粒度（约 15.6ms）限制；
+        精细阶段用 time.sleep（Python 3.11+ 在 Windows 上使用高精度可等待计时器），
+        只在最后 YIELD_WINDOW 内以 sleep(0) 让出 CPU，不再忙等整个 spin 窗口。
+
+        Args:
+            spin: 精细等待窗口（秒），应不小于粗睡眠的粒度
+            interrupt: 中断事件，置位后立即返回
+
+        Returns:
+            被中断返回 False
+        """
+        while True:
+            left = deadline - time.perf_counter()
+            if left <= spin:
+                break
+            if interrupt is not None:
+                if interrupt.wait(left - spin):
+                    return False
+            else:
+                time.sleep(left - spin)
+        while True:
+            if interrupt is not None and interrupt.is_set():
+                return False
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                return True
+            time.sleep(left - YIELD_WINDOW if left > YIELD_WINDOW else 0)
+
+
+class VirtualClock:
+    """虚拟时钟：sleep 立即返回并推进时间
+
+    并行分支的 sleep 也直接累加，虚拟时间反映的是所有等待的总和而非墙钟时间。
+    """
+
+    virtual = True
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._lock = threading.Lock()
+        self.sleeps = 0
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+                self.sleeps += 1
+
+    def monotonic(self) -> float:
+        return self._now
+
+    now = monotonic
+
+    def sleep_until(self, deadline: float, spin: float = 0.0,
+                    interrupt: threading.Event = None) -> bool:
+        with self._lock:
+            if deadline > self._now:
+                self._now = deadline
+                self.sleeps += 1
+        return True
+
+    def advance(self, seconds: float):
+        """手动推进时间"""
+        self.sleep(seconds)
+
+
+# ── 后端接口 ──
+
+class PlatformBackend:
+    """平台后端接口"""
+
+    clock = RealClock()
+
+    # 键盘
+    def send_keys(self, vk_codes: list[int]) -> bool:
+        """按下并逆序释放一组虚拟键"""
+        raise NotImplementedError
+
+    def send_unicode(self, text: str) -> int:
+        """以 Unicode 字符事件输入文本，返回发送的事件数"""
+        raise NotImplementedError
+
+    def send_input(self, events: list[tuple]) -> int:
+        """一次原子提交一组键鼠事件（INPUT_* 元组），返回实际注入的事件数
+
+        整批注入期间不会与用户的实际输入交错。
+        """
+        raise NotImplementedError
+
+    # 鼠标
+    def move_mouse(self, x: int, y: int):
+        raise NotImplementedError
+
+    def mouse_click(self, button: str = 'left'):
+        """在当前位置按下并释放鼠标键"""
+        raise NotImplementedError
+
+    def mouse_wheel(self, delta: int):
+        """滚轮，delta 为格数（正数向上）"""
+        raise NotImplementedError
+
+    # 计时器
+    def begin_timer_period(self, ms: int) -> bool:
+        """提高系统计时器精度（Windows timeBeginPeriod），不支持时返回 False"""
+        return False
+
+    def end_timer_period(self, ms: int):
+        pass
+
+    # 剪贴板
+    def get_clipboard(self) -> str:
+        raise NotImplementedError
+
+    def set_clipboard(self, text: str) -> bool:
+        raise NotImplementedError
+
+    # 窗口
+    def foreground_window(self) -> int:
+        raise NotImplementedError
+
+    def window_title(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def window_process(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def find_window(self, title: str) -> int:
+        """按标题子串（不区分大小写）查找窗口，未找到返回 0"""
+        raise NotImplementedError
+
+    def activate_window(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    # 屏幕
+    def pixel_color(self, x: int, y: int) -> str:
+        """屏幕像素颜色（#rrggbb）"""
+        raise NotImplementedError
+
+
+class Win32Backend(PlatformBackend):
+    """ctypes Win32 实现"""
+
+    def __init__(self):
+        self._input_lock = threading.Lock()
+        self._input_buf = None  # 复用的 INPUT 数组，按需扩容
+
+    def _send_input(self, arr, n: int) -> int:
+        """提交 arr 的前 n 个 INPUT，返回实际注入的事件数"""
+        from .keyboard import INPUT
+        return ctypes.windll.user32.SendInput(n, arr, ctypes.sizeof(INPUT))
+
+    def send_keys(self, vk_codes: list[int]) -> bool:
+        from .keyboard import INPUT, INPUT_KEYBOARD, KEYEVENTF_KEYUP
+        inputs = []
+
+        # 按下所有键
+        for vk in vk_codes:
+            inp = INPUT(type=INPUT_KEYBOARD)
+            inp._input.ki.wVk = vk
+            inp._input.ki.dwFlags = 0
+            inputs.append(inp)
+
+        # 释放所有键（逆序）
+        for vk in reversed(vk_codes):
+            inp = INPUT(type=INPUT_KEYBOARD)
+            inp._input.ki.wVk = vk
+            inp._input.ki.dwFlags = KEYEVENTF_KEYUP
+            inputs.append(inp)
+
+        n = len(inputs)
+        arr = (INPUT * n)(*inputs)
+        sent = self._send_input(arr, n)
+        if sent != n:
+            logger.warning(f"Only sent {sent}/{n} inputs")
+            return False
+        return True
+
+    def send_unicode(self, text: str) -> int:
+        """整段文本一次 SendInput 提交，调用方负责分块以控制单次数组大小"""
+        from .keyboard import KEYEVENTF_UNICODE, KEYEVENTF_KEYUP
+        events = text_key_events(text)
+        n = len(events) * 2
+        if not n:
+            return 0
+        with self._input_lock:
+            arr = self._input_array(n)
+            i = 0
+            for vk, scan in events:
+                flags = 0 if vk else KEYEVENTF_UNICODE
+                down = arr[i]._input.ki
+                down.wVk, down.wScan, down.dwFlags = vk, scan, flags
+                up = arr[i + 1]._input.ki
+                up.wVk, up.wScan, up.dwFlags = vk, scan, flags | KEYEVENTF_KEYUP
+                i += 2
+            sent = self._send_input(arr, n)
+        if sent != n:
+            logger.warning(f"Only sent {sent}/{n} inputs")
+        return sent
+
+    def send_input(self, events: list[tuple]) -> int:
+        from .keyboard import INPUT, INPUT_KEYBOARD, KEYEVENTF_KEYUP
+        n = len(events)
+        if not n:
+            return 0
+        arr = (INPUT * n)()
+        screen = None
+        for inp, event in zip(arr, events):
+            kind = event[0]
+            if kind == INPUT_KEY:
+                inp.type = INPUT_KEYBOARD
+                inp._input.ki.wVk = event[1]
+                inp._input.ki.dwFlags = 0 if event[2] else KEYEVENTF_KEYUP
+                continue
+            inp.type = INPUT_MOUSE
+            mi = inp._input.mi
+            if kind == INPUT_MOVE:
+                if screen is None:
+                    screen = self._virtual_screen()
+                left, top, width, height = screen
+                # 绝对坐标归一化到 0..65535，覆盖整个虚拟桌面（多显示器）
+                mi.dx = round((event[1] - left) * 65535 / max(1, width - 1))
+                mi.dy = round((event[2] - top) * 65535 / max(1, height - 1))
+                mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+            elif kind == INPUT_BUTTON:
+                down, up = MOUSE_BUTTONS.get(event[1], MOUSE_BUTTONS['left'])
+                mi.dwFlags = down if event[2] else up
+            elif kind == INPUT_WHEEL:
+                mi.mouseData = (event[1] * 120) & 0xFFFFFFFF
+                mi.dwFlags = MOUSEEVENTF_WHEEL
+        sent = self._send_input(arr, n)
+        if sent != n:
+            logger.warning(f"Only sent {sent}/{n} inputs")
+        return sent
+
+    @staticmethod
+    def _virtual_screen() -> tuple[int, int, int, int]:
+        metrics = ctypes.windll.user32.GetSystemMetrics
+        return (metrics(SM_XVIRTUALSCREEN), metrics(SM_YVIRTUALSCREEN),
+                metrics(SM_CXVIRTUALSCREEN), metrics(SM_CYVIRTUALSCREEN))
+
+    def _input_array(self, n: int):
+        """取至少容纳 n 个键盘事件的预分配数组（调用方持有 _input_lock）"""
+        from .keyboard import INPUT, INPUT_KEYBOARD
+        arr = self._input_buf
+        if arr is None or len(arr) < n:
+            arr = (INPUT * max(n, DEFAULT_INPUT_CHUNK * 2))()
+            for inp in arr:
+                inp.type = INPUT_KEYBOARD
+            self._input_buf = arr
+        return arr
+
+    def move_mouse(self, x: int, y: int):
+        ctypes.windll.user32.SetCursorPos(x, y)
+
+    def mouse_click(self, button: str = 'left'):
+        self.send_input([(INPUT_BUTTON, button, True), (INPUT_BUTTON, button, False)])
+
+    def mouse_wheel(self, delta: int):
+        self.send_input([(INPUT_WHEEL, delta)])
+
+    def begin_timer_period(self, ms: int) -> bool:
+        return ctypes.windll.winmm.timeBeginPeriod(ms) == 0
+
+    def end_timer_period(self, ms: int):
+        ctypes.windll.winmm.timeEndPeriod(ms)
+
+    def get_clipboard(self) -> str:
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        if not user32.OpenClipboard(0):
+            logger.warning("Failed to open clipboard")
+            return ''
+
+        try:
+            h = user32.GetClipboardData(CF_UNICODETEXT)
+            if not h:
+                return ''
+
+            p = kernel32.GlobalLock(h)
+            if not p:
+                return ''
+
+            try:
+                return ctypes.wstring_at(p)
+            except Exception as e:
+                logger.error(f"Failed to read clipboard data: {e}")
+                return ''
+            finally:
+                kernel32.GlobalUnlock(h)
+        except Exception as e:
+            logger.error(f"Clipboard operation error: {e}")
+            return ''
+        finally:
+            user32.CloseClipboard()
+
+    def set_clipboard(self, text: str) -> bool:
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        if not user32.OpenClipboard(0):
+            logger.warning("Failed to open clipboard")
+            return False
+
+        try:
+            user32.EmptyClipboard()
+            data = text.encode('utf-16-le') + b'\x00\x00'
+            h = kernel32.GlobalAlloc(0x0042, len(data))
+
+            if not h:
+                logger.error("Failed to allocate global memory")
+                return False
+
+            p = kernel32.GlobalLock(h)
+            if not p:
+                logger.error("Failed to lock global memory")
+                return False
+
+            try:
+                ctypes.memmove(p, data, len(data))
+            finally:
+                kernel32.GlobalUnlock(h)
+
+            if not user32.SetClipboardData(CF_UNICODETEXT, h):
+                logger.error("Failed to set clipboard data")
+                return False
+
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set clipboard: {e}")
+            return False
+        finally:
+            user32.CloseClipboard()
+
+    def foreground_window(self) -> int:
+        return ctypes.windll.user32.GetForegroundWindow() or 0
+
+    def window_title(self, hwnd: int) -> str:
+        if not hwnd:
+            return ''
+        buf = ctypes.create_unicode_buffer(256)
+        ctypes.windll.user32.GetWindowTextW(hwnd, buf, 256)
+        return buf.value
+
+    def window_process(self, hwnd: int) -> str:
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        if not hwnd:
+            return ''
+
+        pid = ctypes.wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if not pid.value:
+            return ''
+
+        # 打开进程获取可执行文件名
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+        if not handle:
+            return ''
+
+        try:
+            buf = ctypes.create_unicode_buffer(260)
+            size = ctypes.wintypes.DWORD(260)
+            ret = kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size))
+            if not ret:
+                return ''
+            full_path = buf.value
+            return os.path.basename(full_path) if full_path else ''
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def find_window(self, title: str) -> int:
+        title = title.lower()
+        found = [0]
+
+        def enum_callback(hwnd, _):
+            buf = ctypes.create_unicode_buffer(256)
+            ctypes.windll.user32.GetWindowTextW(hwnd, buf, 256)
+            if title in buf.value.lower() and buf.value:
+                found[0] = hwnd
+                return False
+            return True
+
+        WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
+        ctypes.windll.user32.EnumWindows(WNDENUMPROC(enum_callback), 0)
+        return found[0] or 0
+
+    def activate_window(self, hwnd: int) -> bool:
+        return bool(ctypes.windll.user32.SetForegroundWindow(hwnd))
+
+    def pixel_color(self, x: int, y: int) -> str:
+        hdc = ctypes.windll.user32.GetDC(0)
+        color = ctypes.windll.gdi32.GetPixel(hdc, x, y)
+        ctypes.windll.user32.ReleaseDC(0, hdc)
+        r = color & 0xFF
+        g = (color >> 8) & 0xFF
+        b = (color >> 16) & 0xFF
+        return f'#{r:02x}{g:02x}{b:02x}'
+
+
+class SimulatedBackend(PlatformBackend):
+    """模拟后端：内存剪贴板与窗口，输入记录到日志，默认使用虚拟时钟
+
+    Args:
+        clock: 时钟，默认 VirtualClock
+        max_log: 输入日志保留条数
+    """
+
+    def __init__(self, clock=None, max_log: int = 10000):
+        self.clock = clock or VirtualClock()
+        self.clipboard = ''
+        self.cursor = (0, 0)
+        self.input_log: deque[tuple] = deque(maxlen=max_log)
+        self.input_count = 0
+        self._windows: dict[int, tuple[str, str]] = {}
+        self._foreground = 0
+        self._next_hwnd = 0x1000
+        self._pixels: dict[tuple[int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def _log(self, *event):
+        with self._lock:
+            self.input_log.append(event)
+            self.input_count += 1
+
+    def clear_log(self):
+        with self._lock:
+            self.input_log.clear()
+            self.input_count = 0
+
+    # 键盘 / 鼠标
+    def send_keys(self, vk_codes: list[int]) -> bool:
+        self._log('keys', tuple(vk_codes))
+        return True
+
+    def send_unicode(self, text: str) -> int:
+        self._log('text', text)
+        return len(text_key_events(text)) * 2
+
+    def send_input(self, events: list[tuple]) -> int:
+        for event in events:
+            if event[0] == INPUT_MOVE:
+                self.cursor = (event[1], event[2])
+        self._log('batch', tuple(events))
+        return len(events)
+
+    def move_mouse(self, x: int, y: int):
+        self.cursor = (x, y)
+        self._log('move', x, y)
+
+    def mouse_click(self, button: str = 'left'):
+        self._log('click', button, *self.cursor)
+
+    def mouse_wheel(self, delta: int):
+        self._log('wheel', delta, *self.cursor)
+
+    # 剪贴板
+    def get_clipboard(self) -> str:
+        return self.clipboard
+
+    def set_clipboard(self, text: str) -> bool:
+        self.clipboard = text
+        return True
+
+    # 窗口
+    def open_window(self, title: str, process: str = '', activate: bool = True) -> int:
+        """创建模拟窗口，返回 hwnd"""
+        with self._lock:
+            hwnd = self._next_hwnd
+            self._next_hwnd += 1
+            self._windows[hwnd] = (title, process)
+        if activate:
+            self._foreground = hwnd
+        return hwnd
+
+    def close_window(self, hwnd: int):
+        with self._lock:
+            self._windows.pop(hwnd, None)
+            if self._foreground == hwnd:
+                self._foreground = next(reversed(self._windows), 0)
+
+    def set_title(self, hwnd: int, title: str):
+        with self._lock:
+            if hwnd in self._windows:
+                self._windows[hwnd] = (title, self._windows[hwnd][1])
+
+    def foreground_window(self) -> int:
+        return self._foreground
+
+    def window_title(self, hwnd: int) -> str:
+        return self._windows.get(hwnd, ('', ''))[0]
+
+    def window_process(self, hwnd: int) -> str:
+        return self._windows.get(hwnd, ('', ''))[1]
+
+    def find_window(self, title: str) -> int:
+        title = title.lower()
+        for hwnd, (text, _) in list(self._windows.items()):
+            if text and title in text.lower():
+                return hwnd
+        return 0
+
+    def activate_window(self, hwnd: int) -> bool:
+        if hwnd not in self._windows:
+            return False
+        self._foreground = hwnd
+        self._log('activate', hwnd)
+        return True
+
+    # 屏幕
+    def set_pixel(self, x: int, y: int, color: str):
+        self._pixels[(x, y)] = color.lower()
+
+    def pixel_color(self, x: int, y: int) -> str:
+        return self._pixels.get((x, y), '#000000')
+
+
+_backend: PlatformBackend | None = None
+
+
+def get_backend() -> PlatformBackend:
+    """当前平台后端：Windows 下为 Win32Backend，其他平台为 SimulatedBackend"""
+    global _backend
+    if _backend is None:
+        if os.name == 'nt':
+            _backend = Win32Backend()
+        else:
+            # 自动回退时保留真实时钟，延时语义与 Windows 一致
+            _backend = SimulatedBackend(clock=RealClock())
+            logger.info("Non-Windows platform, using simulated backend")
+    return _backend
+
+
+def set_backend(backend: PlatformBackend | None):
+    """替换全局平台后端，None 恢复默认"""
+    global _backend
+    _backend = backend
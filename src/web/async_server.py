@@ -0,0 +1,446 @@
+"""asyncio HTTP/1.1 服务 — 长连接、请求流水线与有界处理线程池
+
+与 WebServer 提供相同的 /api/v1 接口：每个请求在内存中构造一个 WebHandler，
+在有界线程池中执行 do_<METHOD>，响应写入缓冲区后由事件循环发回。
+连接默认保持（HTTP/1.1），同一连接上的流水线请求可并发处理、按顺序响应；
+非幂等请求（POST/PUT/DELETE）等待此前的请求完成后才执行，之后的请求也等待它完成。
+WebSocket 升级请求在此前的响应写完后接管连接，推送在事件循环上进行，不占用处理线程。
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from .events import EventHub
+from .router import build_router
+from .server import (STATIC_DIR, WS_PATH, WebHandler, logger, ERR_BAD_REQUEST, ERR_FORBIDDEN,
+                     ERR_NOT_FOUND)
+from .static_cache import StaticCache
+from .websocket import SEND_TIMEOUT, WebSocketSession, check_handshake, handshake_response, \
+    parse_topics
+
+# 请求头最大字节数（请求行 + 头部）
+MAX_HEADER_BYTES = 64 * 1024
+# 请求体最大字节数
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# 单个连接上已读取、尚未响应的请求数上限
+MAX_PIPELINE = 16
+# 停止时等待进行中请求完成的时间（秒）
+SHUTDOWN_TIMEOUT = 5.0
+
+# 可与同一连接上其他请求并发处理的方法
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# 不带响应体的状态码
+_NO_BODY_STATUS = frozenset({204, 304})
+
+# 响应队列中的连接移交标记：之前的响应写完后由 WebSocket 接管连接
+_UPGRADE = object()
+
+
+class _Request:
+    __slots__ = ('method', 'target', 'version', 'headers', 'body', 'keep_alive', 'peer')
+
+    def __init__(self, method: str, target: str, version: str,
+                 headers: http.client.HTTPMessage, body: bytes, peer: tuple):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.peer = peer
+        tokens = {t.strip().lower() for t in headers.get('Connection', '').split(',')}
+        if version == 'HTTP/1.0':
+            self.keep_alive = 'keep-alive' in tokens
+        else:
+            self.keep_alive = 'close' not in tokens
+
+
+class _BadRequest(Exception):
+    """请求无法解析，回复 status 后关闭连接"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncWebServer:
+    """基于 asyncio 的内嵌 HTTP/1.1 服务器，接口与 WebServer 相同
+
+    Args:
+        app: 主应用
+        port: 监听端口
+        allowed_origins: CORS 白名单
+        workers: 处理请求的线程数（路由处理器会调用阻塞接口）
+        keepalive_timeout: 空闲连接保持的秒数
+        ws_interval_ms: WebSocket 推送的最小间隔（毫秒）
+    """
+
+    def __init__(self, app, port: int = 18900, allowed_origins: list[str] = None,
+                 workers: int = 8, keepalive_timeout: float = 15.0, ws_interval_ms: int = 100):
+        self.app = app
+        self.port = port
+        self.allowed_origins = allowed_origins or []
+        self.workers = workers
+        self.keepalive_timeout = keepalive_timeout
+        self._start_time = time.time()
+        self.router = build_router(WebHandler)
+        self.static = StaticCache(STATIC_DIR)
+        self.events = EventHub(app, ws_interval_ms / 1000)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._connections: dict[asyncio.Task, asyncio.Queue] = {}  # 连接任务 → 待写回的响应
+        self._closing = False
+        self.requests = 0
+        self.connections_total = 0
+        self.reused = 0  # 在已有连接上处理的请求数
+
+    # ── 生命周期 ──
+
+    def start(self):
+        self.static.preload()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='web-handler')
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self._listen())
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            loop.run_forever()
+            loop.close()
+
+        self._loop = loop
+        self._thread = threading.Thread(target=run, name='web-server', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._pool.shutdown(wait=False)
+            raise errors[0]
+        logger.info(f"Web server (asyncio) started on http://127.0.0.1:{self.port}")
+
+    async def _listen(self):
+        # 线程池满时请求在此排队，不再继续读取连接上的数据
+        self._slots = asyncio.Semaphore(self.workers * 4)
+        self._server = await asyncio.start_server(
+            self._serve_connection, '127.0.0.1', self.port, limit=MAX_HEADER_BYTES)
+
+    def stop(self):
+        """停止接受新连接，等待进行中的请求完成（最多 SHUTDOWN_TIMEOUT 秒）后关闭"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+        try:
+            future.result(SHUTDOWN_TIMEOUT + 1)
+        except Exception as e:
+            logger.warning(f"Web server shutdown: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=2)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._loop = None
+        logger.info("Web server stopped")
+
+    async def _shutdown(self):
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        # WebSocket 连接发送关闭帧后结束
+        self.events.close()
+        # 各连接写完已接收请求的响应后关闭，超时仍未结束的连接直接取消
+        for responses in self._connections.values():
+            responses.put_nowait(None)
+        tasks = list(self._connections)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            'mode': 'async',
+            'connections': len(self._connections),
+            'connections_total': self.connections_total,
+            'requests': self.requests,
+            'reused': self.reused,
+            'workers': self.workers,
+        }
+
+    # ── 连接处理 ──
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        responses: asyncio.Queue = asyncio.Queue()
+        self._connections[task] = responses
+        self.connections_total += 1
+        peer = writer.get_extra_info('peername') or ('', 0)
+        window = asyncio.Semaphore(MAX_PIPELINE)  # 已读取、尚未写回的请求数
+        sender = asyncio.create_task(self._send_responses(responses, writer, window))
+        inflight: list[asyncio.Future] = []
+        barrier: asyncio.Future | None = None  # 最近一个非幂等请求
+        served = 0
+        try:
+            while not self._closing and not sender.done():
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader, writer, peer),
+                                                     self.keepalive_timeout)
+                except _BadRequest as e:
+                    responses.put_nowait(_done(_error_response(e.status, str(e))))
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                if request.headers.get('Upgrade', '').lower() == 'websocket':
+                    # 等此前的响应全部写回后移交连接
+                    responses.put_nowait(_UPGRADE)
+                    if await sender:
+                        self.requests += 1
+                        await self._serve_websocket(request, reader, writer)
+                    break
+                await window.acquire()
+                inflight = [f for f in inflight if not f.done()]
+                if request.method not in SAFE_METHODS:
+                    if inflight:
+                        await asyncio.wait(inflight)
+                elif barrier is not None and not barrier.done():
+                    await asyncio.wait([barrier])
+                future = await self._dispatch(request)
+                if request.method not in SAFE_METHODS:
+                    barrier = future
+                inflight.append(future)
+                self.requests += 1
+                self.reused += served > 0
+                served += 1
+                responses.put_nowait(future)
+                if not request.keep_alive:
+                    break
+        except asyncio.CancelledError:
+            sender.cancel()
+            raise
+        finally:
+            if not sender.done():
+                responses.put_nowait(None)
+                await sender
+            writer.close()
+            self._connections.pop(task, None)
+
+    async def _read_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            peer: tuple) -> _Request | None:
+        """读取一个请求，连接正常关闭时返回 None"""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise _BadRequest(431, 'request header too large')
+        line, _, rest = head.partition(b'\r\n')
+        try:
+            method, target, version = line.decode('latin-1').split(' ')
+        except ValueError:
+            raise _BadRequest(400, 'bad request line')
+        if version not in ('HTTP/1.0', 'HTTP/1.1'):
+            raise _BadRequest(505, 'HTTP version not supported')
+        headers = http.client.parse_headers(io.BytesIO(rest))
+        if headers.get('Transfer-Encoding'):
+            raise _BadRequest(501, 'chunked request body not supported')
+        try:
+            length = int(headers.get('Content-Length', 0))
+        except ValueError:
+            raise _BadRequest(400, 'invalid Content-Length')
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise _BadRequest(413, 'request body too large')
+        body = b''
+        if length:
+            if headers.get('Expect', '').lower() == '100-continue':
+                writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            body = await reader.readexactly(length)
+        return _Request(method.upper(), target, version, headers, body, peer)
+
+    async def _dispatch(self, request: _Request) -> asyncio.Future:
+        """提交到处理线程池，线程池排队已满时等待空位"""
+        await self._slots.acquire()
+        future = self._loop.run_in_executor(self._pool, self._handle, request)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def _send_responses(self, responses: asyncio.Queue, writer: asyncio.StreamWriter,
+                              window: asyncio.Semaphore) -> bool:
+        """按请求顺序写回响应；收到 None 或需要关闭连接的响应后关闭连接
+
+        Returns:
+            是否在连接移交标记处停止（此时不关闭连接）
+        """
+        handover = False
+        try:
+            while True:
+                item = await responses.get()
+                if item is None:
+                    return False
+                if item is _UPGRADE:
+                    handover = True
+                    return True
+                try:
+                    data, close = await item
+                except Exception as e:
+                    logger.error(f"Web handler failed: {e}")
+                    data, close = _error_response(500, 'internal error')
+                writer.write(data)
+                window.release()
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    return False
+                if close:
+                    return False
+        finally:
+            # 关闭后读取端收到 EOF，连接任务随之结束
+            if not handover:
+                writer.close()
+
+    # ── WebSocket ──
+
+    async def _serve_websocket(self, request: _Request, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter):
+        """完成握手并运行推送会话直到连接关闭"""
+        parsed = urllib.parse.urlsplit(request.target)
+        if parsed.path != WS_PATH:
+            writer.write(_error_response(404, 'not found', ERR_NOT_FOUND)[0])
+            return
+        error = check_handshake(request.headers, self.allowed_origins)
+        if error:
+            status, message = error
+            code = ERR_FORBIDDEN if status == 403 else ERR_BAD_REQUEST
+            headers = {'Sec-WebSocket-Version': '13'} if status == 426 else None
+            writer.write(_error_response(status, message, code, headers=headers)[0])
+            return
+        writer.write(handshake_response(request.headers['Sec-WebSocket-Key']))
+        logger.info(f"[ws] GET {parsed.path} → 101")
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        session = WebSocketSession(self.events, lambda: loop.call_soon_threadsafe(wake.set),
+                                   parse_topics(urllib.parse.parse_qs(parsed.query)))
+
+        async def read():
+            try:
+                while not session.finished:
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    session.receive(data)
+            except ConnectionError:
+                pass
+            session.connection_lost()
+
+        receiver = asyncio.create_task(read())
+        try:
+            while True:
+                wake.clear()
+                data, timeout = session.poll(time.monotonic())
+                if data:
+                    writer.write(data)
+                    # 对端读得慢时在此等待，期间的事件在订阅者中合并
+                    await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+                if session.finished:
+                    break
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            logger.debug(f"WebSocket send failed: {e}")
+        finally:
+            session.finished = True
+            session.release()
+            receiver.cancel()
+
+    # ── 请求处理（线程池中执行） ──
+
+    def _handle(self, request: _Request) -> tuple[bytes, bool]:
+        """用 WebHandler 处理请求，返回 (响应字节, 是否关闭连接)"""
+        handler = WebHandler.__new__(WebHandler)
+        handler.server = self
+        handler.client_address = request.peer
+        handler.command = request.method
+        handler.path = request.target
+        handler.request_version = request.version
+        handler.requestline = f'{request.method} {request.target} {request.version}'
+        handler.protocol_version = 'HTTP/1.1'
+        handler.headers = request.headers
+        handler.rfile = io.BytesIO(request.body)
+        handler.wfile = io.BytesIO()
+        handler.close_connection = not request.keep_alive
+        method = getattr(handler, f'do_{request.method}', None)
+        try:
+            if method is None:
+                handler.send_error(501, f'Unsupported method ({request.method!r})')
+            else:
+                method()
+        except Exception as e:
+            logger.exception(f"Unhandled error in {request.method} {request.target}: {e}")
+            return _error_response(500, 'internal error')
+        close = handler.close_connection or self._closing
+        raw = handler.wfile.getvalue()
+        if not raw:
+            # 处理器未写响应（如未知的 /api/ 前缀）
+            return _error_response(404, 'not found', ERR_NOT_FOUND, close)
+        return _frame(raw, close, request), close
+
+
+def _frame(raw: bytes, close: bool, request: _Request) -> bytes:
+    """补全长连接需要的 Content-Length 与 Connection 头"""
+    head, sep, body = raw.partition(b'\r\n\r\n')
+    lines = head.split(b'\r\n')
+    names = {ln.split(b':', 1)[0].strip().lower() for ln in lines[1:]}
+    try:
+        status = int(lines[0].split(b' ', 2)[1])
+    except (IndexError, ValueError):
+        status = 200
+    extra = []
+    if b'content-length' not in names and status not in _NO_BODY_STATUS and status >= 200:
+        extra.append(b'Content-Length: %d' % len(body))
+    if b'connection' in names:
+        lines = [ln for ln in lines if ln.split(b':', 1)[0].strip().lower() != b'connection']
+    if close:
+        extra.append(b'Connection: close')
+    elif request.version == 'HTTP/1.0':
+        extra.append(b'Connection: keep-alive')
+    if not extra and b'connection' not in names:
+        return raw
+    return b'\r\n'.join(lines + extra) + b'\r\n\r\n' + body
+
+
+def _error_response(status: int, message: str, code: int = ERR_BAD_REQUEST,
+                    close: bool = True, headers: dict = None) -> tuple[bytes, bool]:
+    body = json.dumps({'code': code, 'data': None, 'error': message}).encode('utf-8')
+    reason = http.client.responses.get(status, '')
+    head = (f'HTTP/1.1 {status} {reason}\r\n'
+            f'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n')
+    for name, value in (headers or {}).items():
+        head += f'{name}: {value}\r\n'
+    if close:
+        head += 'Connection: close\r\n'
+    return head.encode('latin-1') + b'\r\n' + body, close
+
+
+def _done(result) -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
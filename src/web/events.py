@@ -0,0 +1,244 @@
+"""WebSocket 推送事件中心 — 按主题订阅，同一主题与键的事件只保留最新值
+
+主题:
+    recorder  录制状态与事件数（采样）
+    runs      流程运行的状态与已执行步骤数（采样，键为 run_id）
+    config    配置保存通知
+    tokens    Token 统计刷新结果（键为 "<序号>:<stats|details>"，数据见 token_event）
+    context   前台进程匹配到的上下文页（键为 page），启动器据此切换页面
+
+采样类主题由一个后台线程每个间隔读取一次，只发布变化的值；线程只在有订阅者时运行。
+每个订阅者的待发送事件按 (主题, 键) 合并，连接写得慢时旧值被新值覆盖，内存有上限。
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+logger = logging.getLogger('flowkit.web')
+
+TOPICS = ('recorder', 'runs', 'config', 'tokens', 'context')
+
+# 单个订阅者待发送的 (主题, 键) 数上限，超出时丢弃最早的事件
+MAX_PENDING = 512
+
+
+def token_event(idx: int, kind: str, data) -> tuple[str, dict]:
+    """tokens 主题的键与数据，所有来源统一使用
+
+    Args:
+        idx: token 序号（app.tokens 中的位置）
+        kind: stats（/api/stats 结果）或 details（/api/request-details 结果）
+        data: 上游返回的数据
+    """
+    return f'{idx}:{kind}', {'idx': idx, 'kind': kind, 'data': data}
+
+
+class Subscriber:
+    """一个推送连接的订阅状态与待发送事件
+
+    Args:
+        notify: 待发送事件从无到有时调用，唤醒连接的写循环（可能在任意线程调用）
+    """
+
+    __slots__ = ('topics', 'closed', '_notify', '_pending', '_lock',
+                 'delivered', 'coalesced', 'dropped')
+
+    def __init__(self, notify: Callable[[], None]):
+        self.topics: set[str] = set()
+        self.closed = False
+        self._notify = notify
+        self._pending: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.coalesced = 0  # 发送前被新值覆盖的事件数
+        self.dropped = 0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def offer(self, topic: str, key, data):
+        """加入待发送事件，同一 (主题, 键) 的旧值被覆盖"""
+        slot = (topic, key)
+        with self._lock:
+            wake = not self._pending
+            if slot in self._pending:
+                self.coalesced += 1
+                self._pending.move_to_end(slot)
+            self._pending[slot] = {'topic': topic, 'key': key, 'data': data}
+            if len(self._pending) > MAX_PENDING:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+        if wake:
+            self._notify()
+
+    def drain(self) -> list[dict]:
+        """取出全部待发送事件"""
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+        self.delivered += len(events)
+        return events
+
+    def close(self):
+        self.closed = True
+        self._notify()
+
+
+class EventHub:
+    """推送事件的发布与订阅
+
+    Args:
+        app: 主应用（读取 executor.runs 与 _recorder）
+        interval: 采样与向每个连接发送的最小间隔（秒）
+    """
+
+    def __init__(self, app, interval: float = 0.1):
+        self.app = app
+        self.interval = interval
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+        self._ticker: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last: dict[str, dict] = {}  # 采样主题 → 上次采样值
+        self._samplers: dict[str, Callable[[], dict]] = {
+            'recorder': self._sample_recorder,
+            'runs': self._sample_runs,
+        }
+        self.published = 0
+        self.ticks = 0
+
+    # ── 订阅 ──
+
+    def connect(self, notify: Callable[[], None]) -> Subscriber:
+        sub = Subscriber(notify)
+        with self._lock:
+            self._subscribers.append(sub)
+            if self._ticker is None and not self._stop.is_set():
+                self._ticker = threading.Thread(target=self._tick_loop, name='ws-events',
+                                                daemon=True)
+                self._ticker.start()
+        return sub
+
+    def disconnect(self, sub: Subscriber):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def subscribe(self, sub: Subscriber, topics: list[str]) -> list[str]:
+        """订阅主题并立即推送采样类主题的当前值，返回未知的主题"""
+        unknown = [t for t in topics if t not in TOPICS]
+        added = [t for t in topics if t in TOPICS and t not in sub.topics]
+        samples = {t: self._samplers[t]() for t in added if t in self._samplers}
+        with self._lock:
+            sub.topics.update(added)
+            for topic, values in samples.items():
+                # 作为采样基线，避免快照与下一次采样之间的变化丢失
+                self._last.setdefault(topic, values)
+        for topic, values in samples.items():
+            for key, data in self._snapshot(topic, values).items():
+                sub.offer(topic, key, data)
+        return unknown
+
+    def unsubscribe(self, sub: Subscriber, topics: list[str]):
+        with self._lock:
+            sub.topics.difference_update(topics)
+
+    def publish(self, topic: str, key, data):
+        """向订阅了该主题的连接发布事件（任意线程可调用）"""
+        with self._lock:
+            targets = [s for s in self._subscribers if topic in s.topics]
+        for sub in targets:
+            sub.offer(topic, key, data)
+        self.published += 1
+
+    def close(self):
+        """停止采样并通知所有连接关闭"""
+        self._stop.set()
+        with self._lock:
+            subs = list(self._subscribers)
+        for sub in subs:
+            sub.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._subscribers)
+        topics = {t: sum(t in s.topics for s in subs) for t in TOPICS}
+        return {
+            'connections': len(subs),
+            'topics': topics,
+            'interval_ms': round(self.interval * 1000),
+            'published': self.published,
+            'ticks': self.ticks,
+            'delivered': sum(s.delivered for s in subs),
+            'coalesced': sum(s.coalesced for s in subs),
+            'dropped': sum(s.dropped for s in subs),
+        }
+
+    # ── 采样 ──
+
+    def _tick_loop(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self._subscribers:
+                    # 没有连接时停止采样，下次连接时重新建立基线
+                    self._ticker = None
+                    self._last.clear()
+                    return
+                wanted = set().union(*(s.topics for s in self._subscribers))
+                for topic in self._samplers:
+                    if topic not in wanted:
+                        self._last.pop(topic, None)
+            self.ticks += 1
+            for topic, sampler in self._samplers.items():
+                if topic not in wanted:
+                    continue
+                try:
+                    current = sampler()
+                except Exception as e:
+                    logger.warning(f"Event sampler {topic} failed: {e}")
+                    continue
+                with self._lock:
+                    previous = self._last.get(topic)
+                    self._last[topic] = current
+                if previous is None:
+                    continue
+                for key, data in current.items():
+                    if previous.get(key) != data:
+                        self.publish(topic, key, data)
+        with self._lock:
+            self._ticker = None
+
+    @staticmethod
+    def _snapshot(topic: str, values: dict) -> dict:
+        """订阅时推送的当前值：运行只推送未结束的"""
+        if topic == 'runs':
+            return {k: v for k, v in values.items() if not v['finished']}
+        return values
+
+    def _sample_recorder(self) -> dict:
+        recorder = getattr(self.app, '_recorder', None)
+        if recorder is None:
+            return {'status': {'recording': False, 'paused': False, 'event_count': 0}}
+        return {'status': {
+            'recording': recorder.is_recording,
+            'paused': recorder._paused,
+            'event_count': recorder.event_count,
+        }}
+
+    def _sample_runs(self) -> dict:
+        executor = getattr(self.app, 'executor', None)
+        if executor is None:
+            return {}
+        return {run.run_id: {
+            'run_id': run.run_id,
+            'action_id': run.action_id,
+            'label': run.label,
+            'status': run.status,
+            'steps_executed': run.steps_executed,
+            'finished': run.finished,
+            'error': run.error,
+        } for run in executor.runs.list_runs()}
+
@@ -0,0 +1,190 @@
+"""API 路由表 — 声明式注册，启动时编译为按路径段匹配的前缀树
+
+处理方法用 @route 声明路径与方法，build_router 扫描处理器类一次生成 Router。
+分发时按 / 切分路径逐段查找：字面段优先，其次是带类型的参数段，
+查找成本只与路径段数有关，与端点数量无关。每条路由记录调用次数、错误数与耗时。
+"""
+
+import inspect
+import threading
+import urllib.parse
+from typing import Callable
+
+# 参数类型 → 转换函数
+PARAM_TYPES: dict[str, Callable[[str], object]] = {
+    'str': str,
+    'int': int,
+}
+
+
+def route(method: str, pattern: str, query=None, **fixed):
+    """声明处理方法对应的路由，可叠加多个
+
+    Args:
+        method: HTTP 方法
+        pattern: 路径模式，如 /tokens/{idx:int}/stats，参数类型缺省为 str
+        query: 查询参数 → 关键字参数；元组按同名传入，字典为 {查询名: 参数名}，
+               True 传入完整的 parse_qs 结果（参数名 query）
+        fixed: 固定传入的关键字参数（同一方法服务多条路由时区分用途）
+    """
+    def decorator(fn):
+        fn.__dict__.setdefault('_routes', []).append((method.upper(), pattern, query, fixed))
+        return fn
+    return decorator
+
+
+class BadParam(ValueError):
+    """路径结构匹配但参数类型转换失败"""
+
+    def __init__(self, name: str, value: str):
+        super().__init__(f"invalid {name}: {value!r}")
+        self.name = name
+        self.value = value
+
+
+class Route:
+    """一条已注册的路由及其统计"""
+
+    __slots__ = ('method', 'pattern', 'handler', 'query', 'fixed', 'body',
+                 'calls', 'errors', 'total_ms', 'max_ms')
+
+    def __init__(self, method: str, pattern: str, handler: Callable, query, fixed: dict):
+        self.method = method
+        self.pattern = pattern
+        self.handler = handler
+        if isinstance(query, (tuple, list)):
+            query = {name: name for name in query}
+        self.query = query
+        self.fixed = fixed
+        self.body = 'body' in inspect.signature(handler).parameters
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def arguments(self, params: dict, query: dict, body) -> dict:
+        """组装处理方法的关键字参数"""
+        kwargs = dict(params)
+        if self.query is True:
+            kwargs['query'] = query
+        elif self.query:
+            for key, name in self.query.items():
+                kwargs[name] = query.get(key, [''])[0]
+        if self.body:
+            kwargs['body'] = body
+        kwargs.update(self.fixed)
+        return kwargs
+
+    def stats(self) -> dict:
+        return {
+            'method': self.method,
+            'pattern': self.pattern,
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0,
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class _Node:
+    __slots__ = ('literal', 'params', 'routes')
+
+    def __init__(self):
+        self.literal: dict[str, _Node] = {}
+        self.params: list[tuple[str, Callable, _Node]] = []  # (参数名, 转换函数, 子节点)
+        self.routes: dict[str, Route] = {}
+
+
+class Router:
+    """按路径段匹配的路由前缀树"""
+
+    def __init__(self):
+        self._root = _Node()
+        self._routes: list[Route] = []
+        self._lock = threading.Lock()
+
+    def add(self, method: str, pattern: str, handler: Callable, query=None, **fixed) -> Route:
+        node = self._root
+        for segment in pattern.split('/')[1:]:
+            if segment.startswith('{') and segment.endswith('}'):
+                name, _, kind = segment[1:-1].partition(':')
+                convert = PARAM_TYPES[kind or 'str']
+                for pname, pconvert, child in node.params:
+                    if pname == name and pconvert is convert:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.params.append((name, convert, child))
+                    # 严格类型（int）先于 str 尝试
+                    node.params.sort(key=lambda p: p[1] is str)
+                    node = child
+            else:
+                node = node.literal.setdefault(segment, _Node())
+        if method in node.routes:
+            raise ValueError(f"Duplicate route: {method} {pattern}")
+        entry = Route(method, pattern, handler, query, fixed)
+        node.routes[method] = entry
+        self._routes.append(entry)
+        return entry
+
+    def match(self, method: str, path: str) -> tuple[Route | None, dict]:
+        """查找路由，返回 (路由, 路径参数)，未找到返回 (None, {})
+
+        Raises:
+            BadParam: 路径只在参数类型不符时无法匹配
+        """
+        bad: list[BadParam] = []
+        found = self._walk(self._root, path.split('/')[1:], 0, method, {}, bad)
+        if found is not None:
+            return found
+        if bad:
+            raise bad[0]
+        return None, {}
+
+    def _walk(self, node: _Node, parts: list[str], i: int, method: str, params: dict,
+              bad: list) -> tuple[Route, dict] | None:
+        if i == len(parts):
+            entry = node.routes.get(method)
+            return (entry, params) if entry is not None else None
+        segment = parts[i]
+        child = node.literal.get(segment)
+        if child is not None:
+            found = self._walk(child, parts, i + 1, method, params, bad)
+            if found is not None:
+                return found
+        for name, convert, child in node.params:
+            try:
+                value = convert(urllib.parse.unquote(segment))
+            except ValueError:
+                bad.append(BadParam(name, segment))
+                continue
+            found = self._walk(child, parts, i + 1, method, {**params, name: value}, bad)
+            if found is not None:
+                return found
+        return None
+
+    def record(self, entry: Route, elapsed_ms: float, status: int):
+        """记录一次调用"""
+        with self._lock:
+            entry.calls += 1
+            entry.errors += status >= 400
+            entry.total_ms += elapsed_ms
+            if elapsed_ms > entry.max_ms:
+                entry.max_ms = elapsed_ms
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [r.stats() for r in self._routes]
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+
+def build_router(handler_cls: type) -> Router:
+    """扫描处理器类中 @route 声明的方法，生成路由表"""
+    router = Router()
+    for _, fn in inspect.getmembers(handler_cls, inspect.isfunction):
+        for method, pattern, query, fixed in getattr(fn, '_routes', ()):
+            router.add(method, pattern, fn, query, **fixed)
+    return router
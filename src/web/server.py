@@ -10,9 +10,17 @@ import urllib.parse
 from pathlib import Path
 from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from ..utils.http_cache import HttpClientCache
+from ..core.combo_extract import cache_stats as extract_cache_stats
+from ..core.combo_optimize import optimize_flow, resolve_passes
+from ..core.exec_pool import QueueFullError, PRIORITY_API
+from .events import EventHub, token_event
+from .router import BadParam, build_router, route
+from .static_cache import StaticCache, accepts_gzip, etag_matches, parse_range
+from .websocket import check_handshake, handshake_response, parse_topics, serve_socket
 
 STATIC_DIR = Path(__file__).parent / 'static'
 API_PREFIX = '/api/v1'
+WS_PATH = API_PREFIX + '/ws'
 
 # MIME 补充
 mimetypes.add_type('application/javascript', '.js')
@@ -29,6 +37,7 @@ ERR_INVALID_ACTION = 1006
 ERR_NOT_IMPLEMENTED = 1007
 ERR_PARSE_ERROR = 1008
 ERR_UPSTREAM_ERROR = 1009
+ERR_QUEUE_FULL = 1010
 
 # ── 日志 ──
 logger = logging.getLogger('flowkit.web')
@@ -79,15 +88,18 @@ class WebHandler(BaseHTTPRequestHandler):
         """成功 → code=0"""
         self._send_json(http_code, {'code': 0, 'data': data, 'error': ''})
 
-    def _err(self, error: str, err_code: int = ERR_BAD_REQUEST, http_code: int = 400):
+    def _err(self, error: str, err_code: int = ERR_BAD_REQUEST, http_code: int = 400,
+             headers: dict = None):
         """失败 → code=非零错误码"""
-        self._send_json(http_code, {'code': err_code, 'data': None, 'error': error})
+        self._send_json(http_code, {'code': err_code, 'data': None, 'error': error}, headers)
 
-    def _send_json(self, code: int, obj):
+    def _send_json(self, code: int, obj, headers: dict = None):
         body = json.dumps(obj, ensure_ascii=False, default=str).encode('utf-8')
         self.send_response(code)
         self.send_header('Content-Type', 'application/json; charset=utf-8')
         self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self._cors_headers()
         self.end_headers()
         self.wfile.write(body)
@@ -115,22 +127,59 @@ class WebHandler(BaseHTTPRequestHandler):
     # ── 静态文件 ──
 
     def _serve_static(self, rel_path: str):
-        if not rel_path or rel_path == '/':
-            rel_path = '/index.html'
-        safe = Path(STATIC_DIR / rel_path.lstrip('/')).resolve()
-        if not str(safe).startswith(str(STATIC_DIR.resolve())):
+        """从内存缓存返回静态文件，支持 ETag/304、单段 Range 与 gzip 变体"""
+        rel_path = urllib.parse.unquote(rel_path)
+        if '..' in rel_path.replace('\\', '/').split('/'):
             return self._err('forbidden', ERR_FORBIDDEN, 403)
-        if not safe.is_file():
+        asset = self.server.static.get(rel_path)
+        if asset is None:
             return self._err('not found', ERR_NOT_FOUND, 404)
-        mime = mimetypes.guess_type(str(safe))[0] or 'application/octet-stream'
-        data = safe.read_bytes()
-        self.send_response(200)
-        self.send_header('Content-Type', mime)
+
+        byte_range = None
+        if self.headers.get('Range') and self.headers.get('If-Range', asset.etag) == asset.etag:
+            try:
+                byte_range = parse_range(self.headers['Range'], asset.size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{asset.size}')
+                self.send_header('Content-Length', '0')
+                self._cors_headers()
+                self.end_headers()
+                return
+        # 分段请求只对原始内容计算
+        packed = (asset.gzip is not None and byte_range is None
+                  and accepts_gzip(self.headers.get('Accept-Encoding', '')))
+        etag = asset.gzip_etag if packed else asset.etag
+        if etag_matches(self.headers.get('If-None-Match', ''), etag):
+            self.send_response(304)
+            self._static_headers(asset, etag)
+            self.end_headers()
+            return
+
+        data = asset.gzip if packed else asset.data
+        if byte_range is not None:
+            start, end = byte_range
+            data = data[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{asset.size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', asset.mime)
         self.send_header('Content-Length', str(len(data)))
-        self._cors_headers()
+        if packed:
+            self.send_header('Content-Encoding', 'gzip')
+        self._static_headers(asset, etag)
         self.end_headers()
         self.wfile.write(data)
 
+    def _static_headers(self, asset, etag: str):
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', asset.cache_control)
+        self.send_header('Accept-Ranges', 'bytes')
+        if asset.gzip is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+        self._cors_headers()
+
     # ── 辅助 ──
 
     def _read_body(self) -> dict:
@@ -144,6 +193,19 @@ class WebHandler(BaseHTTPRequestHandler):
             self._log_error(f"JSON parse error: {e}")
             return None  # 调用方检查 None
 
+    def _submit_action(self, action: dict, method: str, path: str) -> tuple[bool, object]:
+        """提交动作到执行池，队列已满时返回 429 + Retry-After
+
+        Returns:
+            (是否已提交, FlowRun 或 None)
+        """
+        try:
+            return True, self.app.executor.submit(action, PRIORITY_API)
+        except QueueFullError as e:
+            self._err(str(e), ERR_QUEUE_FULL, 429, {'Retry-After': str(e.retry_after)})
+            self._log_request(method, path, 429)
+            return False, None
+
     def _cors_headers(self):
         """CORS 头 — 仅允许 localhost 和配置的白名单"""
         origin = self.headers.get('Origin', '')
@@ -158,16 +220,6 @@ class WebHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
 
-    def _parse_idx(self, path: str, prefix: str, suffix: str = '') -> int | None:
-        try:
-            seg = path[len(prefix):]
-            if suffix:
-                seg = seg[:-len(suffix)]
-            return int(seg)
-        except (ValueError, IndexError):
-            self._err('invalid index', ERR_INVALID_INDEX)
-            return None
-
     def _strip_api_prefix(self, path: str) -> str | None:
         """提取 API_PREFIX 之后的路径部分，不匹配返回 None"""
         if path.startswith(API_PREFIX):
@@ -199,14 +251,14 @@ class WebHandler(BaseHTTPRequestHandler):
         parsed = urllib.parse.urlparse(self.path)
         path = parsed.path
 
-        # WebSocket 升级检测（预留）
+        # WebSocket 升级
         if self.headers.get('Upgrade', '').lower() == 'websocket':
-            self._handle_websocket_upgrade()
+            self._handle_websocket_upgrade(path, urllib.parse.parse_qs(parsed.query))
             return
 
         route = self._strip_api_prefix(path)
         if route is not None:
-            self._route_get(route)
+            self._dispatch('GET', route, urllib.parse.parse_qs(parsed.query))
         elif not path.startswith('/api/'):
             # 非 API 路径 → 静态文件
             self._serve_static(path)
@@ -222,7 +274,7 @@ class WebHandler(BaseHTTPRequestHandler):
             return
         route = self._strip_api_prefix(path)
         if route is not None:
-            self._route_post(route, body)
+            self._dispatch('POST', route, body=body)
         if not path.startswith('/api/'):
             self._err('not found', ERR_NOT_FOUND, 404)
             self._log_request('POST', path, 404)
@@ -237,7 +289,7 @@ class WebHandler(BaseHTTPRequestHandler):
             return
         route = self._strip_api_prefix(path)
         if route is not None:
-            self._route_put(route, body)
+            self._dispatch('PUT', route, body=body)
         if not path.startswith('/api/'):
             self._err('not found', ERR_NOT_FOUND, 404)
             self._log_request('PUT', path, 404)
@@ -247,148 +299,42 @@ class WebHandler(BaseHTTPRequestHandler):
         path = urllib.parse.urlparse(self.path).path
         route = self._strip_api_prefix(path)
         if route is not None:
-            self._route_delete(route)
+            self._dispatch('DELETE', route)
         if not path.startswith('/api/'):
             self._err('not found', ERR_NOT_FOUND, 404)
             self._log_request('DELETE', path, 404)
 
-    # ── GET 路由 ──
-
-    def _route_get(self, route: str):
-        parsed = urllib.parse.urlparse(route)
-        path = parsed.path
-        query = urllib.parse.parse_qs(parsed.query)
-
-        if route == '/health':
-            return self._api_health()
-        if route == '/tokens':
-            return self._api_get_tokens()
-        if route.startswith('/tokens/') and route.endswith('/stats'):
-            idx = self._parse_idx(route, '/tokens/', '/stats')
-            if idx is not None:
-                return self._api_get_token_stats(idx)
-            return
-        if route.startswith('/tokens/') and route.endswith('/details'):
-            idx = self._parse_idx(route, '/tokens/', '/details')
-            if idx is not None:
-                return self._api_get_token_details(idx)
-            return
-        if route == '/flows/step-types':
-            return self._api_get_step_types()
-        if route == '/pages':
-            return self._api_get_pages()
-        if route == '/actions':
-            return self._api_get_actions(query)
-        if route == '/config':
-            return self._api_get_config()
-        if route == '/recorder/status':
-            return self._api_recorder_status()
-        if route == '/stats/actions':
-            return self._api_get_action_stats()
-        if route == '/stats/overview':
-            return self._api_get_stats_overview()
-        if route == '/scripts':
-            return self._api_get_scripts()
-        if path == '/search':
-            return self._api_search(query.get('q', [''])[0])
-        self._err('not found', ERR_NOT_FOUND, 404)
-        self._log_request('GET', route, 404)
-
-    # ── POST 路由 ──
-
-    def _route_post(self, route: str, body: dict):
-        if route == '/tokens':
-            return self._api_add_token(body)
-        if route == '/flows/execute':
-            return self._api_execute_flow(body)
-        if route == '/actions/execute':
-            return self._api_execute_action(body)
-        if route == '/actions':
-            return self._api_add_action(body)
-        if route == '/actions/reorder':
-            return self._api_reorder_actions(body)
-        if route == '/recorder/start':
-            return self._api_recorder_start()
-        if route == '/recorder/stop':
-            return self._api_recorder_stop()
-        if route == '/recorder/pause':
-            return self._api_recorder_pause()
-        if route == '/input/pick-coordinate':
-            return self._api_pick_coordinate(body)
-        if route == '/pages':
-            return self._api_create_page(body)
-        if route == '/scripts/execute':
-            return self._api_execute_script(body)
-        if route.startswith('/actions/') and route.endswith('/execute'):
-            idx = self._parse_idx(route, '/actions/', '/execute')
-            if idx is not None:
-                return self._api_execute_action_by_idx(idx)
-            return
-        self._err('not found', ERR_NOT_FOUND, 404)
-        self._log_request('POST', route, 404)
+    # ── 路由分发 ──
 
-    # ── PUT 路由 ──
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
 
-    def _route_put(self, route: str, body: dict):
-        if route.startswith('/tokens/'):
-            idx = self._parse_idx(route, '/tokens/')
-            if idx is not None:
-                return self._api_update_token(idx, body)
-            return
-
-        if route.startswith('/actions/'):
-            idx = self._parse_idx(route, '/actions/')
-            if idx is not None:
-                return self._api_update_action_by_idx(idx, body)
-            return
-
-        if route == '/config':
-            return self._api_update_config(body)
-
-        if route == '/theme':
-            return self._api_update_theme(body)
-
-        if route.startswith('/pages/'):
-            idx = self._parse_idx(route, '/pages/')
-            if idx is not None:
-                return self._api_update_page(idx, body)
-            return
-
-        # PUT /pages/{pidx}/actions/{aidx}
-        parts = route.strip('/').split('/')
-        if len(parts) == 4 and parts[0] == 'pages' and parts[2] == 'actions':
-            try:
-                pidx, aidx = int(parts[1]), int(parts[3])
-                return self._api_update_action(pidx, aidx, body)
-            except (ValueError, IndexError):
-                pass
-
-        self._err('not found', ERR_NOT_FOUND, 404)
-        self._log_request('PUT', route, 404)
-
-    # ── DELETE 路由 ──
-
-    def _route_delete(self, route: str):
-        if route.startswith('/tokens/'):
-            idx = self._parse_idx(route, '/tokens/')
-            if idx is not None:
-                return self._api_delete_token(idx)
-            return
-        if route.startswith('/actions/'):
-            idx = self._parse_idx(route, '/actions/')
-            if idx is not None:
-                return self._api_delete_action(idx)
+    def _dispatch(self, method: str, route: str, query: dict = None, body: dict = None):
+        """按路由表分发 API 请求，并记录该路由的调用统计"""
+        router = self.server.router
+        try:
+            entry, params = router.match(method, route)
+        except BadParam:
+            self._err('invalid index', ERR_INVALID_INDEX)
             return
-        if route.startswith('/pages/'):
-            idx = self._parse_idx(route, '/pages/')
-            if idx is not None:
-                return self._api_delete_page(idx)
+        if entry is None:
+            self._err('not found', ERR_NOT_FOUND, 404)
+            self._log_request(method, route, 404)
             return
-        self._err('not found', ERR_NOT_FOUND, 404)
-        self._log_request('DELETE', route, 404)
+        self._status = 0
+        started = time.perf_counter()
+        try:
+            entry.handler(self, **entry.arguments(params, query or {}, body))
+        except Exception:
+            self._status = 500
+            raise
+        finally:
+            router.record(entry, (time.perf_counter() - started) * 1000, self._status)
 
     # ── Health API ──
 
+    @route('GET', '/health')
     def _api_health(self):
         """健康检查端点"""
         self._ok({
@@ -399,6 +345,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Token API ──
 
+    @route('GET', '/tokens')
     def _api_get_tokens(self):
         tokens = []
         for i, t in enumerate(self.app.tokens):
@@ -413,6 +360,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok(tokens)
         self._log_request('GET', '/tokens', 200)
 
+    @route('GET', '/tokens/{idx:int}/stats')
     def _api_get_token_stats(self, idx: int):
         if idx >= len(self.app.tokens):
             self._err('token not found', ERR_NOT_FOUND, 404)
@@ -425,6 +373,7 @@ class WebHandler(BaseHTTPRequestHandler):
             return
         try:
             data = client.post('/api/stats')
+            self._publish('tokens', *token_event(idx, 'stats', data))
             self._ok(data)
             self._log_request('GET', f'/tokens/{idx}/stats', 200)
         except Exception as e:
@@ -432,6 +381,7 @@ class WebHandler(BaseHTTPRequestHandler):
             self._err('upstream API error', ERR_UPSTREAM_ERROR, 502)
             self._log_request('GET', f'/tokens/{idx}/stats', 502)
 
+    @route('GET', '/tokens/{idx:int}/details')
     def _api_get_token_details(self, idx: int):
         if idx >= len(self.app.tokens):
             self._err('token not found', ERR_NOT_FOUND, 404)
@@ -444,6 +394,7 @@ class WebHandler(BaseHTTPRequestHandler):
             return
         try:
             data = client.post('/api/request-details')
+            self._publish('tokens', *token_event(idx, 'details', data))
             self._ok(data)
             self._log_request('GET', f'/tokens/{idx}/details', 200)
         except Exception as e:
@@ -451,6 +402,7 @@ class WebHandler(BaseHTTPRequestHandler):
             self._err('upstream API error', ERR_UPSTREAM_ERROR, 502)
             self._log_request('GET', f'/tokens/{idx}/details', 502)
 
+    @route('POST', '/tokens')
     def _api_add_token(self, body: dict):
         name = body.get('name', '').strip()
         credential = body.get('credential', '').strip()
@@ -468,6 +420,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'index': len(self.app.tokens) - 1}, 201)
         self._log_request('POST', '/tokens', 201)
 
+    @route('PUT', '/tokens/{idx:int}')
     def _api_update_token(self, idx: int, body: dict):
         if idx >= len(self.app.tokens):
             self._err('token not found', ERR_NOT_FOUND, 404)
@@ -488,6 +441,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok()
         self._log_request('PUT', f'/tokens/{idx}', 200)
 
+    @route('DELETE', '/tokens/{idx:int}')
     def _api_delete_token(self, idx: int):
         if idx >= len(self.app.tokens) or len(self.app.tokens) <= 1:
             self._err('cannot delete', ERR_CANNOT_DELETE)
@@ -504,6 +458,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Flow API ──
 
+    @route('GET', '/flows/step-types')
     def _api_get_step_types(self):
         from ..core.step_types import PALETTE_CATEGORIES, STEP_CATEGORY_COLORS
         result = []
@@ -521,6 +476,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok(result)
         self._log_request('GET', '/flows/step-types', 200)
 
+    @route('GET', '/pages')
     def _api_get_pages(self):
         pages = self.app.config.get('launcher', {}).get('pages', [])
         result = []
@@ -544,6 +500,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok(result)
         self._log_request('GET', '/pages', 200)
 
+    @route('POST', '/flows/execute')
     def _api_execute_flow(self, body: dict):
         steps = body.get('steps', [])
         delay = body.get('delay', 500)
@@ -551,24 +508,127 @@ class WebHandler(BaseHTTPRequestHandler):
             self._err('no steps', ERR_MISSING_FIELD)
             self._log_request('POST', '/flows/execute', 400)
             return
-        action = {'type': 'combo', 'steps': steps, 'delay': delay}
-        threading.Thread(
-            target=self.app.executor.execute, args=(action,), daemon=True
-        ).start()
-        self._ok({'message': 'flow started'})
+        action = {'type': 'combo', 'steps': steps, 'delay': delay,
+                  'label': body.get('label', '')}
+        for key in ('trace', 'runtime', 'speed', 'optimize'):
+            if key in body:
+                action[key] = body[key]
+        accepted, run = self._submit_action(action, 'POST', '/flows/execute')
+        if not accepted:
+            return
+        self._ok({'message': 'flow started', 'run_id': run.run_id if run else None})
         self._log_request('POST', '/flows/execute', 200)
 
+    @route('POST', '/flows/optimize')
+    def _api_optimize_flow(self, body: dict):
+        """POST /api/v1/flows/optimize - 预览优化结果（不执行）"""
+        steps = body.get('steps', [])
+        if not steps:
+            self._err('no steps', ERR_MISSING_FIELD)
+            self._log_request('POST', '/flows/optimize', 400)
+            return
+        passes = resolve_passes(body.get('optimize', True))
+        if not passes:
+            self._err('no optimizer passes enabled', ERR_BAD_REQUEST)
+            self._log_request('POST', '/flows/optimize', 400)
+            return
+        try:
+            optimized, report = optimize_flow(steps, body.get('delay', 500), passes)
+        except (TypeError, ValueError) as e:
+            self._err(f'invalid flow: {e}', ERR_BAD_REQUEST)
+            self._log_request('POST', '/flows/optimize', 400)
+            return
+        self._ok({'steps': optimized, 'report': report})
+        self._log_request('POST', '/flows/optimize', 200)
+
+    @route('POST', '/actions/execute')
     def _api_execute_action(self, body: dict):
         if not body.get('type'):
             self._err('action type required', ERR_MISSING_FIELD)
             self._log_request('POST', '/actions/execute', 400)
             return
-        threading.Thread(
-            target=self.app.executor.execute, args=(body,), daemon=True
-        ).start()
-        self._ok()
+        accepted, run = self._submit_action(body, 'POST', '/actions/execute')
+        if not accepted:
+            return
+        self._ok({'run_id': run.run_id} if run else None)
         self._log_request('POST', '/actions/execute', 200)
 
+    @route('GET', '/flows/runs', query=('status',))
+    def _api_get_runs(self, status: str = ''):
+        """GET /api/v1/flows/runs - 列出流程运行"""
+        runs = self.app.executor.runs.list_runs(status or None)
+        self._ok([r.to_dict() for r in reversed(runs)])
+        self._log_request('GET', '/flows/runs', 200)
+
+    @route('GET', '/flows/runs/{run_id}')
+    def _api_get_run(self, run_id: str):
+        """GET /api/v1/flows/runs/{id} - 获取单次运行详情"""
+        run = self.app.executor.runs.get(run_id)
+        if not run:
+            self._err('run not found', ERR_NOT_FOUND, 404)
+            self._log_request('GET', f'/flows/runs/{run_id}', 404)
+            return
+        self._ok(run.to_dict(detail=True))
+        self._log_request('GET', f'/flows/runs/{run_id}', 200)
+
+    @route('GET', '/flows/runs/{run_id}/trace', query={'format': 'fmt'})
+    def _api_get_run_trace(self, run_id: str, fmt: str = ''):
+        """GET /api/v1/flows/runs/{id}/trace - 步骤追踪，?format=chrome 导出 trace-event JSON"""
+        run = self.app.executor.runs.get(run_id)
+        if not run:
+            self._err('run not found', ERR_NOT_FOUND, 404)
+            self._log_request('GET', f'/flows/runs/{run_id}/trace', 404)
+            return
+        tracer = run.tracer
+        if tracer is None:
+            self._err('tracing not enabled for this run', ERR_BAD_REQUEST)
+            self._log_request('GET', f'/flows/runs/{run_id}/trace', 400)
+            return
+        if fmt == 'chrome':
+            self._send_json(200, tracer.to_chrome(run.label or run.run_id), {
+                'Content-Disposition': f'attachment; filename="trace-{run_id}.json"'})
+        else:
+            self._ok({
+                'run': run.to_dict(),
+                'summary': tracer.summary(),
+                'spans': [s.to_dict() for s in tracer.spans()],
+            })
+        self._log_request('GET', f'/flows/runs/{run_id}/trace', 200)
+
+    @route('POST', '/flows/runs/{run_id}/cancel')
+    def _api_cancel_run(self, run_id: str):
+        """POST /api/v1/flows/runs/{id}/cancel - 取消运行"""
+        runs = self.app.executor.runs
+        run = runs.get(run_id)
+        if not run:
+            self._err('run not found', ERR_NOT_FOUND, 404)
+            self._log_request('POST', f'/flows/runs/{run_id}/cancel', 404)
+            return
+        if not runs.cancel(run_id):
+            self._err('run already finished', ERR_BAD_REQUEST)
+            self._log_request('POST', f'/flows/runs/{run_id}/cancel', 400)
+            return
+        self._ok({'run_id': run_id, 'status': 'cancelling'})
+        self._log_request('POST', f'/flows/runs/{run_id}/cancel', 200)
+
+    @route('POST', '/flows/runs/{run_id}/pause', op='pause')
+    @route('POST', '/flows/runs/{run_id}/resume', op='resume')
+    def _api_control_run(self, run_id: str, op: str):
+        """POST /api/v1/flows/runs/{id}/pause|resume - 暂停 / 恢复运行"""
+        runs = self.app.executor.runs
+        run = runs.get(run_id)
+        if not run:
+            self._err('run not found', ERR_NOT_FOUND, 404)
+            self._log_request('POST', f'/flows/runs/{run_id}/{op}', 404)
+            return
+        if not getattr(runs, op)(run_id):
+            self._err(f'cannot {op} run in state {run.status}', ERR_BAD_REQUEST)
+            self._log_request('POST', f'/flows/runs/{run_id}/{op}', 400)
+            return
+        self._ok({'run_id': run_id, 'status': run.status, 'paused': run.paused})
+        self._log_request('POST', f'/flows/runs/{run_id}/{op}', 200)
+
+    @route('PUT', '/pages/{pidx:int}/actions/{aidx:int}')
     def _api_update_action(self, pidx: int, aidx: int, body: dict):
         pages = self.app.config.get('launcher', {}).get('pages', [])
         if pidx >= len(pages):
@@ -586,6 +646,7 @@ class WebHandler(BaseHTTPRequestHandler):
                 action['steps'] = body['steps']
             if 'delay' in body:
                 action['delay'] = body['delay']
+            self.app.executor.invalidate_plan(action.get('id'))
             self.app._save_config()
             self._ok()
             self._log_request('PUT', f'/pages/{pidx}/actions/{aidx}', 200)
@@ -595,6 +656,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Launcher API ──
 
+    @route('GET', '/actions', query=True)
     def _api_get_actions(self, query: dict):
         """获取当前页所有动作"""
         launcher_cfg = self.app.config.get('launcher', {})
@@ -636,6 +698,7 @@ class WebHandler(BaseHTTPRequestHandler):
         })
         self._log_request('GET', '/actions', 200)
 
+    @route('POST', '/actions/{idx:int}/execute')
     def _api_execute_action_by_idx(self, idx: int):
         """执行指定索引的动作"""
         launcher_cfg = self.app.config.get('launcher', {})
@@ -653,13 +716,13 @@ class WebHandler(BaseHTTPRequestHandler):
             self._log_request('POST', f'/actions/{idx}/execute', 404)
             return
 
-        action = actions[idx]
-        threading.Thread(
-            target=self.app.executor.execute, args=(action,), daemon=True
-        ).start()
-        self._ok({'message': 'action started'})
+        accepted, run = self._submit_action(actions[idx], 'POST', f'/actions/{idx}/execute')
+        if not accepted:
+            return
+        self._ok({'message': 'action started', 'run_id': run.run_id if run else None})
         self._log_request('POST', f'/actions/{idx}/execute', 200)
 
+    @route('POST', '/actions')
     def _api_add_action(self, body: dict):
         """新增动作"""
         import uuid
@@ -706,6 +769,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'index': len(actions) - 1, 'id': action['id']}, 201)
         self._log_request('POST', '/actions', 201)
 
+    @route('PUT', '/actions/{idx:int}')
     def _api_update_action_by_idx(self, idx: int, body: dict):
         """更新指定索引的动作"""
         launcher_cfg = self.app.config.get('launcher', {})
@@ -735,6 +799,7 @@ class WebHandler(BaseHTTPRequestHandler):
                 action['steps'] = body['steps']
             if 'delay' in body:
                 action['delay'] = body['delay']
+            self.app.executor.invalidate_plan(action.get('id'))
 
         self.app._save_config()
 
@@ -745,6 +810,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok()
         self._log_request('PUT', f'/actions/{idx}', 200)
 
+    @route('DELETE', '/actions/{idx:int}')
     def _api_delete_action(self, idx: int):
         """删除指定索引的动作"""
         launcher_cfg = self.app.config.get('launcher', {})
@@ -762,6 +828,8 @@ class WebHandler(BaseHTTPRequestHandler):
             self._log_request('DELETE', f'/actions/{idx}', 404)
             return
 
+        if actions[idx]:
+            self.app.executor.invalidate_plan(actions[idx].get('id'))
         actions[idx] = None
         # 清理尾部 None
         while actions and actions[-1] is None:
@@ -776,6 +844,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok()
         self._log_request('DELETE', f'/actions/{idx}', 200)
 
+    @route('POST', '/actions/reorder')
     def _api_reorder_actions(self, body: dict):
         """拖拽重排序动作"""
         from_idx = body.get('from')
@@ -813,6 +882,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok()
         self._log_request('POST', '/actions/reorder', 200)
 
+    @route('GET', '/config')
     def _api_get_config(self):
         """获取配置"""
         cfg = self.app.config.copy()
@@ -838,6 +908,7 @@ class WebHandler(BaseHTTPRequestHandler):
             else:
                 target[key] = value
 
+    @route('PUT', '/config')
     def _api_update_config(self, body: dict):
         """更新配置（支持深度合并）"""
         # 允许更新的顶级字段
@@ -861,6 +932,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok()
         self._log_request('PUT', '/config', 200)
 
+    @route('GET', '/search', query={'q': 'query'})
     def _api_search(self, query: str):
         """搜索动作"""
         if not query:
@@ -906,6 +978,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Recorder API ──
 
+    @route('POST', '/recorder/start')
     def _api_recorder_start(self):
         """POST /api/v1/recorder/start - 开始录制"""
         if not hasattr(self.app, '_recorder'):
@@ -915,6 +988,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'status': 'recording'})
         self._log_request('POST', '/recorder/start', 200)
 
+    @route('POST', '/recorder/stop')
     def _api_recorder_stop(self):
         """POST /api/v1/recorder/stop - 停止录制并返回步骤"""
         if not hasattr(self.app, '_recorder'):
@@ -926,6 +1000,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'steps': steps, 'count': len(steps)})
         self._log_request('POST', '/recorder/stop', 200)
 
+    @route('POST', '/recorder/pause')
     def _api_recorder_pause(self):
         """POST /api/v1/recorder/pause - 暂停/恢复录制"""
         if hasattr(self.app, '_recorder'):
@@ -933,6 +1008,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'status': 'paused' if self.app._recorder._paused else 'recording'})
         self._log_request('POST', '/recorder/pause', 200)
 
+    @route('GET', '/recorder/status')
     def _api_recorder_status(self):
         """GET /api/v1/recorder/status - 获取录制状态"""
         if not hasattr(self.app, '_recorder'):
@@ -948,6 +1024,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Input Capture API ──
 
+    @route('POST', '/input/pick-coordinate')
     def _api_pick_coordinate(self, body: dict):
         """POST /api/v1/input/pick-coordinate - 拾取屏幕坐标"""
         from ..core.input_capture import CoordinatePicker
@@ -963,6 +1040,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Stats API ──
 
+    @route('GET', '/stats/actions')
     def _api_get_action_stats(self):
         """GET /api/v1/stats/actions - 获取动作使用统计"""
         pages = self.app.config.get('launcher', {}).get('pages', [])
@@ -978,6 +1056,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok(result)
         self._log_request('GET', '/stats/actions', 200)
 
+    @route('GET', '/stats/overview')
     def _api_get_stats_overview(self):
         """GET /api/v1/stats/overview - 获取总览数据"""
         pages = self.app.config.get('launcher', {}).get('pages', [])
@@ -992,8 +1071,60 @@ class WebHandler(BaseHTTPRequestHandler):
         })
         self._log_request('GET', '/stats/overview', 200)
 
+    @route('GET', '/stats/executor')
+    def _api_get_executor_stats(self):
+        """GET /api/v1/stats/executor - 执行池队列深度与等待时间"""
+        metrics = self.app.executor.pool.metrics()
+        metrics['active_runs'] = len(self.app.executor.runs.active())
+        metrics['async'] = self.app.executor.event_loop.metrics()
+        metrics['runs'] = self.app.executor.runs.metrics()
+        session = self.app.executor.http_session
+        metrics['http'] = session.metrics() if session else None
+        metrics['extract'] = extract_cache_stats()
+        metrics['flows'] = self.app.executor.flows.stats()
+        self._ok(metrics)
+        self._log_request('GET', '/stats/executor', 200)
+
+    @route('GET', '/stats/routes')
+    def _api_get_route_stats(self):
+        """GET /api/v1/stats/routes - 各路由的调用次数、错误数与耗时"""
+        self._ok(self.server.router.stats())
+        self._log_request('GET', '/stats/routes', 200)
+
+    @route('GET', '/stats/static')
+    def _api_get_static_stats(self):
+        """GET /api/v1/stats/static - 静态资源缓存统计"""
+        self._ok(self.server.static.stats())
+        self._log_request('GET', '/stats/static', 200)
+
+    @route('GET', '/stats/events')
+    def _api_get_event_stats(self):
+        """GET /api/v1/stats/events - WebSocket 推送连接、订阅与合并统计"""
+        self._ok(self.server.events.stats())
+        self._log_request('GET', '/stats/events', 200)
+
+    @route('GET', '/stats/server')
+    def _api_get_server_stats(self):
+        """GET /api/v1/stats/server - 服务模式、连接数、请求数与连接复用次数"""
+        self._ok(self.server.stats())
+        self._log_request('GET', '/stats/server', 200)
+
+    @route('GET', '/context')
+    def _api_get_context(self):
+        """GET /api/v1/context - 当前前台窗口与匹配的上下文页"""
+        monitor = getattr(self.app, 'foreground', None)
+        state = monitor.current() if monitor and monitor.running else None
+        self._ok({
+            'available': state is not None,
+            'title': state.title if state else '',
+            'process': state.process if state else '',
+            'page': getattr(self.app, 'context_page', None),
+        })
+        self._log_request('GET', '/context', 200)
+
     # ── Pages CRUD API ──
 
+    @route('POST', '/pages')
     def _api_create_page(self, body: dict):
         """POST /api/v1/pages - 创建新页面"""
         pages = self.app.config.get('launcher', {}).get('pages', [])
@@ -1006,6 +1137,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'index': len(pages) - 1, 'page': new_page})
         self._log_request('POST', '/pages', 200)
 
+    @route('PUT', '/pages/{idx:int}')
     def _api_update_page(self, idx: int, body: dict):
         """PUT /api/v1/pages/{idx} - 更新页面"""
         pages = self.app.config.get('launcher', {}).get('pages', [])
@@ -1018,11 +1150,13 @@ class WebHandler(BaseHTTPRequestHandler):
             pages[idx]['name'] = body['name']
         if 'actions' in body:
             pages[idx]['actions'] = body['actions']
+            self.app.executor.invalidate_plan()
 
         self.app._save_config()
         self._ok(pages[idx])
         self._log_request('PUT', f'/pages/{idx}', 200)
 
+    @route('DELETE', '/pages/{idx:int}')
     def _api_delete_page(self, idx: int):
         """DELETE /api/v1/pages/{idx} - 删除页面"""
         pages = self.app.config.get('launcher', {}).get('pages', [])
@@ -1038,6 +1172,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Scripts API ──
 
+    @route('GET', '/scripts')
     def _api_get_scripts(self):
         """GET /api/v1/scripts - 获取脚本列表"""
         pages = self.app.config.get('launcher', {}).get('pages', [])
@@ -1054,6 +1189,7 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok(scripts)
         self._log_request('GET', '/scripts', 200)
 
+    @route('POST', '/scripts/execute')
     def _api_execute_script(self, body: dict):
         """POST /api/v1/scripts/execute - 执行脚本"""
         code = body.get('code', '')
@@ -1090,6 +1226,7 @@ class WebHandler(BaseHTTPRequestHandler):
 
     # ── Theme API ──
 
+    @route('PUT', '/theme')
     def _api_update_theme(self, body: dict):
         """PUT /api/v1/theme - 切换主题"""
         theme_name = body.get('theme', 'dark')
@@ -1100,40 +1237,104 @@ class WebHandler(BaseHTTPRequestHandler):
         self._ok({'theme': theme_name})
         self._log_request('PUT', '/theme', 200)
 
-    # ── WebSocket 预留 ──
+    # ── WebSocket 推送 ──
+
+    def _publish(self, topic: str, key, data):
+        """向 WebSocket 订阅者推送事件"""
+        events = getattr(self.server, 'events', None)
+        if events is not None:
+            events.publish(topic, key, data)
 
-    def _handle_websocket_upgrade(self):
-        """WebSocket 握手（预留，当前返回 501）"""
-        key = self.headers.get('Sec-WebSocket-Key', '')
-        if not key:
-            self._err('missing websocket key', ERR_BAD_REQUEST)
+    def _handle_websocket_upgrade(self, path: str, query: dict):
+        """GET /api/v1/ws - 升级为 WebSocket，连接期间占用当前处理线程"""
+        if path != WS_PATH:
+            self._err('not found', ERR_NOT_FOUND, 404)
+            self._log_request('GET', path, 404)
+            return
+        error = check_handshake(self.headers, self.server.allowed_origins)
+        if error:
+            status, message = error
+            headers = {'Sec-WebSocket-Version': '13'} if status == 426 else None
+            self._err(message, ERR_FORBIDDEN if status == 403 else ERR_BAD_REQUEST, status, headers)
+            self._log_request('GET', path, status)
             return
-        # 握手实现预留 — 后续可用 wsproto 或手写帧解析
-        # 当前返回 501 告知客户端尚未支持
-        self._err('WebSocket not yet implemented', ERR_NOT_IMPLEMENTED, 501)
-        self._log_request('GET', '/websocket-upgrade', 501)
+        self.wfile.write(handshake_response(self.headers['Sec-WebSocket-Key']))
+        self.wfile.flush()
+        self._log_request('GET', path, 101)
+        self.close_connection = True
+        serve_socket(self.connection, self.server.events, parse_topics(query))
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    """thread 模式的 HTTP 服务器：每个连接一个线程，记录连接数
+
+    处理器使用 HTTP/1.0，每个连接只处理一个请求，请求数等于连接数。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count_lock = threading.Lock()
+        self.connections = 0
+        self.connections_total = 0
+
+    def process_request_thread(self, request, client_address):
+        with self._count_lock:
+            self.connections += 1
+            self.connections_total += 1
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._count_lock:
+                self.connections -= 1
+
+    def stats(self) -> dict:
+        with self._count_lock:
+            return {
+                'mode': 'thread',
+                'connections': self.connections,
+                'connections_total': self.connections_total,
+                'requests': self.connections_total,
+                'reused': 0,
+                'workers': None,  # 不限，每个连接一个线程
+            }
 
 
 class WebServer:
     """内嵌 HTTP 服务器"""
 
-    def __init__(self, app, port: int = 18900, allowed_origins: list[str] = None):
+    def __init__(self, app, port: int = 18900, allowed_origins: list[str] = None,
+                 ws_interval_ms: int = 100):
         self.app = app
         self.port = port
         self.allowed_origins = allowed_origins or []
         self._httpd = None
         self._thread = None
         self._start_time = time.time()
+        self.router = build_router(WebHandler)
+        self.static = StaticCache(STATIC_DIR)
+        self.events = EventHub(app, ws_interval_ms / 1000)
 
     def start(self):
-        self._httpd = ThreadingHTTPServer(('127.0.0.1', self.port), WebHandler)
+        self._httpd = _ThreadingServer(('127.0.0.1', self.port), WebHandler)
         self._httpd.app = self.app  # 注入 app 引用
+        self._httpd._start_time = self._start_time
+        self._httpd.router = self.router
+        self._httpd.static = self.static
+        self._httpd.events = self.events
+        self.static.preload()
         self._httpd.allowed_origins = self.allowed_origins
         self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
         self._thread.start()
         logger.info(f"Web server started on http://127.0.0.1:{self.port}")
 
+    def stats(self) -> dict:
+        if self._httpd is None:
+            return {'mode': 'thread', 'connections': 0, 'connections_total': 0,
+                    'requests': 0, 'reused': 0, 'workers': None}
+        return self._httpd.stats()
+
     def stop(self):
+        self.events.close()
         if self._httpd:
             self._httpd.shutdown()
             logger.info("Web server stopped")
@@ -0,0 +1,201 @@
+"""静态资源缓存 — web/static 下的文件读入内存，按 mtime 失效
+
+每个文件缓存原始内容、gzip 变体（优先使用构建产物中的 .gz，否则加载时压缩）、
+强 ETag 与 MIME 类型。命中时不再读盘，同一文件最多每 CHECK_INTERVAL 秒 stat 一次。
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import threading
+import time
+from pathlib import Path
+from ..utils.logger import get_logger
+
+logger = get_logger('web.static')
+
+# 同一文件两次检查 mtime 的最小间隔（秒）
+CHECK_INTERVAL = 1.0
+# 启动时预加载的总字节数上限，超出的文件在首次访问时加载
+PRELOAD_BYTES = 32 * 1024 * 1024
+# 小于该字节数的文件不压缩
+GZIP_MIN_BYTES = 1024
+
+# 带内容哈希的构建产物，可长期缓存
+IMMUTABLE_PREFIX = 'assets/'
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+
+_COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                 'application/xml')
+
+
+class StaticAsset:
+    """缓存的静态文件"""
+
+    __slots__ = ('path', 'data', 'gzip', 'etag', 'mime', 'mtime_ns', 'size', 'cache_control',
+                 'checked')
+
+    def __init__(self, path: Path, rel: str):
+        st = path.stat()
+        self.path = path
+        self.data = path.read_bytes()
+        self.size = len(self.data)
+        self.mtime_ns = st.st_mtime_ns
+        self.mime = mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+        self.etag = '"%s"' % hashlib.sha1(self.data).hexdigest()[:20]
+        self.cache_control = (CACHE_IMMUTABLE if rel.startswith(IMMUTABLE_PREFIX)
+                              else CACHE_REVALIDATE)
+        self.gzip = self._load_gzip(path, st.st_mtime_ns)
+        self.checked = time.monotonic()
+
+    def _load_gzip(self, path: Path, mtime_ns: int) -> bytes | None:
+        """构建产物中不早于源文件的 .gz 直接使用，否则对可压缩类型现场压缩"""
+        prebuilt = path.with_name(path.name + '.gz')
+        try:
+            if prebuilt.stat().st_mtime_ns >= mtime_ns:
+                return prebuilt.read_bytes()
+        except OSError:
+            pass
+        if self.size < GZIP_MIN_BYTES or not self.mime.startswith(_COMPRESSIBLE):
+            return None
+        packed = gzip.compress(self.data, compresslevel=6, mtime=0)
+        # 压缩收益不足 10% 时不提供 gzip 变体
+        return packed if len(packed) < self.size * 0.9 else None
+
+    @property
+    def gzip_etag(self) -> str:
+        return self.etag[:-1] + '-gz"'
+
+
+class StaticCache:
+    """静态资源的内存缓存
+
+    Args:
+        root: 静态文件根目录
+    """
+
+    def __init__(self, root: Path):
+        self.root = root.resolve()
+        self._assets: dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def preload(self):
+        """启动时加载根目录下的文件（.gz 作为变体随源文件加载）"""
+        if not self.root.is_dir():
+            return
+        total = 0
+        for path in sorted(self.root.rglob('*')):
+            if not path.is_file() or path.suffix == '.gz':
+                continue
+            if total + path.stat().st_size > PRELOAD_BYTES:
+                break
+            rel = path.relative_to(self.root).as_posix()
+            asset = self._load(rel, path)
+            if asset is not None:
+                total += asset.size
+        logger.debug(f"Preloaded {len(self._assets)} static files ({total} bytes)")
+
+    def get(self, rel_path: str) -> StaticAsset | None:
+        """按请求路径获取文件，不存在或越出根目录时返回 None"""
+        rel = rel_path.lstrip('/') or 'index.html'
+        asset = self._assets.get(rel)
+        if asset is not None:
+            now = time.monotonic()
+            if now - asset.checked < CHECK_INTERVAL:
+                self.hits += 1
+                return asset
+            try:
+                st = asset.path.stat()
+            except OSError:
+                with self._lock:
+                    self._assets.pop(rel, None)
+                return None
+            if st.st_mtime_ns == asset.mtime_ns:
+                asset.checked = now
+                self.hits += 1
+                return asset
+        path = (self.root / rel).resolve()
+        if not path.is_relative_to(self.root) or not path.is_file():
+            return None
+        return self._load(rel, path)
+
+    def _load(self, rel: str, path: Path) -> StaticAsset | None:
+        try:
+            asset = StaticAsset(path, rel)
+        except OSError as e:
+            logger.warning(f"Failed to read static file {path}: {e}")
+            return None
+        with self._lock:
+            self._assets[rel] = asset
+            self.loads += 1
+        return asset
+
+    def stats(self) -> dict:
+        with self._lock:
+            assets = list(self._assets.values())
+        return {
+            'files': len(assets),
+            'bytes': sum(a.size for a in assets),
+            'gzip_bytes': sum(len(a.gzip) for a in assets if a.gzip),
+            'hits': self.hits,
+            'loads': self.loads,
+        }
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，支持 * 与多个 ETag）"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    tags = {t.strip().removeprefix('W/') for t in header.split(',')}
+    return etag in tags
+
+
+def accepts_gzip(header: str) -> bool:
+    """Accept-Encoding 是否接受 gzip（q=0 视为拒绝）"""
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """解析单段 Range: bytes=start-end，返回闭区间 (start, end)
+
+    多段或格式不支持的 Range 返回 None，按完整内容响应。
+
+    Raises:
+        ValueError: 范围无法满足（416）
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, sep, end = header[6:].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not start:
+            length = int(end)
+        else:
+            first = int(start)
+            last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if not start:
+        if length <= 0:
+            raise ValueError('empty suffix range')
+        return max(0, size - length), size - 1
+    if first >= size or last < first:
+        raise ValueError('range not satisfiable')
+    return first, min(last, size - 1)
@@ -0,0 +1,431 @@
+"""WebSocket（RFC 6455）— 握手校验、帧编解码与推送会话
+
+WebSocketSession 只处理协议状态，不做 I/O：传输层把收到的字节交给 receive，
+循环调用 poll 取出要发送的字节与下次需要调用的时间。推送事件每个间隔最多发送一帧，
+一帧是本间隔内合并后的事件 JSON 数组。serve_socket 是阻塞 socket 的传输实现，
+asyncio 服务的传输在 async_server 中。
+
+客户端消息（文本帧 JSON）:
+    {"op": "subscribe", "topics": ["recorder", "runs"]}
+    {"op": "unsubscribe", "topics": ["runs"]}
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+from collections import deque
+from typing import Callable
+from .events import EventHub
+
+logger = logging.getLogger('flowkit.web')
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# 操作码
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# 关闭码
+CLOSE_NORMAL = 1000
+CLOSE_GOING_AWAY = 1001
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_UNSUPPORTED = 1003
+CLOSE_INVALID_DATA = 1007
+CLOSE_TOO_BIG = 1009
+
+# 客户端消息（合并分片后）最大字节数
+MAX_MESSAGE_BYTES = 64 * 1024
+# 连接空闲该秒数后发送 ping
+PING_INTERVAL = 20.0
+# 该秒数内未收到任何帧则关闭连接
+IDLE_TIMEOUT = 60.0
+# 发出关闭帧后等待对方关闭帧的秒数
+CLOSE_TIMEOUT = 3.0
+# 阻塞传输单次发送的超时（秒），超时视为连接失效
+SEND_TIMEOUT = 10.0
+# 任意端口均允许的本机来源主机名
+LOCAL_HOSTS = ('localhost', '127.0.0.1')
+
+_DATA_OPCODES = (OP_TEXT, OP_BINARY)
+_CONTROL_OPCODES = (OP_CLOSE, OP_PING, OP_PONG)
+
+
+class ProtocolError(Exception):
+    """收到不合规的帧，以 code 关闭连接"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+# ── 握手 ──
+
+def accept_key(key: str) -> str:
+    digest = hashlib.sha1((key + GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def check_handshake(headers, allowed_origins: list[str]) -> tuple[int, str] | None:
+    """校验升级请求头，合规返回 None，否则返回 (HTTP 状态码, 错误信息)"""
+    if 'upgrade' not in {t.strip().lower() for t in headers.get('Connection', '').split(',')}:
+        return 400, 'missing Connection: Upgrade'
+    key = headers.get('Sec-WebSocket-Key', '')
+    if not key:
+        return 400, 'missing websocket key'
+    try:
+        if len(base64.b64decode(key, validate=True)) != 16:
+            raise ValueError(key)
+    except ValueError:
+        return 400, 'invalid websocket key'
+    if headers.get('Sec-WebSocket-Version', '') != '13':
+        return 426, 'unsupported websocket version'
+    # 浏览器不对 WebSocket 做同源限制，按 CORS 白名单校验 Origin
+    origin = headers.get('Origin', '')
+    if origin and not origin_allowed(origin, allowed_origins):
+        return 403, 'origin not allowed'
+    return None
+
+
+def origin_allowed(origin: str, allowed_origins: list[str]) -> bool:
+    """Origin 的协议与主机名是否与本机或白名单完全一致
+
+    白名单项带端口时端口也须一致。不做前缀匹配：http://localhost.evil.example 不是本机。
+    """
+    try:
+        parts = urllib.parse.urlsplit(origin)
+        port = parts.port
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return False
+    if parts.hostname in LOCAL_HOSTS:
+        return True
+    for entry in allowed_origins:
+        try:
+            allowed = urllib.parse.urlsplit(entry)
+            allowed_port = allowed.port
+        except ValueError:
+            continue
+        if (allowed.scheme == parts.scheme and allowed.hostname == parts.hostname
+                and (allowed_port is None or allowed_port == port)):
+            return True
+    return False
+
+
+def handshake_response(key: str) -> bytes:
+    return ('HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept_key(key)}\r\n'
+            '\r\n').encode('latin-1')
+
+
+def parse_topics(query: dict) -> list[str]:
+    """URL 中 ?topics=a,b 指定的初始订阅"""
+    return [t for v in query.get('topics', []) for t in v.split(',') if t]
+
+
+# ── 帧 ──
+
+def encode_frame(opcode: int, payload: bytes = b'') -> bytes:
+    """服务端帧（FIN，不掩码）"""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 0x10000:
+        head = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def encode_close(code: int, reason: str = '') -> bytes:
+    return encode_frame(OP_CLOSE, struct.pack('!H', code) + reason.encode('utf-8')[:120])
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    n = len(payload)
+    if not n:
+        return payload
+    key = int.from_bytes((mask * (n // 4 + 1))[:n], 'big')
+    return (int.from_bytes(payload, 'big') ^ key).to_bytes(n, 'big')
+
+
+class FrameDecoder:
+    """增量解析客户端帧，合并分片消息
+
+    feed 返回已完整的 (操作码, 载荷) 列表，控制帧可穿插在分片消息之间。
+    """
+
+    def __init__(self, max_message: int = MAX_MESSAGE_BYTES):
+        self.max_message = max_message
+        self._buf = bytearray()
+        self._fragments: list[bytes] = []
+        self._fragment_op: int | None = None
+        self._fragment_size = 0
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        """Raises:
+            ProtocolError: 帧不合规或消息超出上限
+        """
+        self._buf += data
+        messages = []
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return messages
+            fin, opcode, payload = frame
+            if opcode in _CONTROL_OPCODES:
+                messages.append((opcode, payload))
+            elif opcode == OP_CONTINUATION:
+                if self._fragment_op is None:
+                    raise ProtocolError(CLOSE_PROTOCOL_ERROR, 'unexpected continuation frame')
+                self._append(payload)
+                if fin:
+                    messages.append((self._fragment_op, b''.join(self._fragments)))
+                    self._fragments = []
+                    self._fragment_op = None
+                    self._fragment_size = 0
+            elif opcode in _DATA_OPCODES:
+                if self._fragment_op is not None:
+                    raise ProtocolError(CLOSE_PROTOCOL_ERROR, 'expected continuation frame')
+                if fin:
+                    messages.append((opcode, payload))
+                else:
+                    self._fragment_op = opcode
+                    self._append(payload)
+            else:
+                raise ProtocolError(CLOSE_PROTOCOL_ERROR, f'unknown opcode {opcode:#x}')
+
+    def _append(self, payload: bytes):
+        self._fragment_size += len(payload)
+        if self._fragment_size > self.max_message:
+            raise ProtocolError(CLOSE_TOO_BIG, 'message too big')
+        self._fragments.append(payload)
+
+    def _next_frame(self) -> tuple[bool, int, bytes] | None:
+        buf = self._buf
+        if len(buf) < 2:
+            return None
+        b0, b1 = buf[0], buf[1]
+        if b0 & 0x70:
+            raise ProtocolError(CLOSE_PROTOCOL_ERROR, 'reserved bits set')
+        if not b1 & 0x80:
+            raise ProtocolError(CLOSE_PROTOCOL_ERROR, 'client frame not masked')
+        fin, opcode, length = bool(b0 & 0x80), b0 & 0x0F, b1 & 0x7F
+        offset = 2
+        if length == 126:
+            if len(buf) < 4:
+                return None
+            length = struct.unpack_from('!H', buf, 2)[0]
+            offset = 4
+        elif length == 127:
+            if len(buf) < 10:
+                return None
+            length = struct.unpack_from('!Q', buf, 2)[0]
+            offset = 10
+        if opcode in _CONTROL_OPCODES and (not fin or length > 125):
+            raise ProtocolError(CLOSE_PROTOCOL_ERROR, 'invalid control frame')
+        if length > self.max_message:
+            raise ProtocolError(CLOSE_TOO_BIG, 'message too big')
+        end = offset + 4 + length
+        if len(buf) < end:
+            return None
+        mask = bytes(buf[offset:offset + 4])
+        payload = _unmask(bytes(buf[offset + 4:end]), mask)
+        del buf[:end]
+        return fin, opcode, payload
+
+
+# ── 会话 ──
+
+class WebSocketSession:
+    """一个推送连接的协议状态
+
+    Args:
+        hub: 事件中心
+        notify: 有数据需要发送时调用，唤醒传输层的写循环（可能在任意线程调用）
+        topics: 初始订阅的主题
+    """
+
+    def __init__(self, hub: EventHub, notify: Callable[[], None], topics: list[str] = ()):
+        self.hub = hub
+        self.interval = hub.interval
+        self._notify = notify
+        self._decoder = FrameDecoder()
+        self._control: deque[bytes] = deque()  # 待发送的控制帧（pong / close）
+        self.subscriber = hub.connect(notify)
+        now = time.monotonic()
+        self.last_received = now
+        self._last_ping = now
+        self._next_flush = now
+        self._close_sent: float | None = None
+        self._close_queued = False
+        self.close_received = False
+        self.finished = False
+        self.frames_sent = 0
+        if topics:
+            self._subscribe(topics)
+
+    # ── 接收（传输层读取端调用） ──
+
+    def receive(self, data: bytes):
+        self.last_received = time.monotonic()
+        try:
+            messages = self._decoder.feed(data)
+        except ProtocolError as e:
+            self.close(e.code, str(e))
+            return
+        for opcode, payload in messages:
+            if opcode == OP_PING:
+                self._queue_control(encode_frame(OP_PONG, payload))
+            elif opcode == OP_CLOSE:
+                self.close_received = True
+                code = struct.unpack('!H', payload[:2])[0] if len(payload) >= 2 else CLOSE_NORMAL
+                self.close(code if 1000 <= code < 5000 else CLOSE_PROTOCOL_ERROR)
+            elif opcode == OP_TEXT:
+                try:
+                    self._on_text(payload.decode('utf-8'))
+                except UnicodeDecodeError:
+                    self.close(CLOSE_INVALID_DATA, 'invalid utf-8')
+            elif opcode == OP_BINARY:
+                self.close(CLOSE_UNSUPPORTED, 'binary messages not supported')
+            if self._close_queued:
+                break
+
+    def _on_text(self, text: str):
+        try:
+            msg = json.loads(text)
+            op, topics = msg.get('op'), msg.get('topics', [])
+            if not isinstance(topics, list):
+                raise ValueError('topics must be a list')
+        except (ValueError, AttributeError) as e:
+            self.subscriber.offer('ws', 'error', {'error': f'invalid message: {e}'})
+            return
+        if op == 'subscribe':
+            self._subscribe(topics)
+        elif op == 'unsubscribe':
+            self.hub.unsubscribe(self.subscriber, topics)
+            self.subscriber.offer('ws', 'subscribed', {'topics': sorted(self.subscriber.topics)})
+        else:
+            self.subscriber.offer('ws', 'error', {'error': f'unknown op: {op!r}'})
+
+    def _subscribe(self, topics: list[str]):
+        unknown = self.hub.subscribe(self.subscriber, [str(t) for t in topics])
+        if unknown:
+            self.subscriber.offer('ws', 'error', {'error': f'unknown topics: {unknown}'})
+        self.subscriber.offer('ws', 'subscribed', {'topics': sorted(self.subscriber.topics)})
+
+    def connection_lost(self):
+        self.finished = True
+        self._notify()
+
+    # ── 发送（传输层写循环调用） ──
+
+    def close(self, code: int = CLOSE_NORMAL, reason: str = ''):
+        """发起或回应关闭握手"""
+        if self._close_queued:
+            return
+        self._close_queued = True
+        self._queue_control(encode_close(code, reason))
+
+    def _queue_control(self, frame: bytes):
+        self._control.append(frame)
+        self._notify()
+
+    def poll(self, now: float) -> tuple[bytes, float]:
+        """取出当前要发送的字节，返回 (数据, 距下次调用的秒数)"""
+        if self.finished:
+            return b'', 0.0
+        if not self._close_queued:
+            if self.subscriber.closed:
+                self.close(CLOSE_GOING_AWAY, 'server shutting down')
+            elif now - self.last_received >= IDLE_TIMEOUT:
+                self.close(CLOSE_GOING_AWAY, 'idle timeout')
+            elif now - max(self._last_ping, self.last_received) >= PING_INTERVAL:
+                self._last_ping = now
+                self._control.append(encode_frame(OP_PING))
+        out = []
+        if (self.subscriber.pending and now >= self._next_flush
+                and self._close_sent is None and not self._close_queued):
+            events = self.subscriber.drain()
+            out.append(encode_frame(OP_TEXT, json.dumps(
+                events, ensure_ascii=False, default=str).encode('utf-8')))
+            self._next_flush = now + self.interval
+            self.frames_sent += 1
+        while self._control:
+            frame = self._control.popleft()
+            if self._close_sent is not None:
+                continue
+            out.append(frame)
+            if frame[0] & 0x0F == OP_CLOSE:
+                self._close_sent = now
+        if self._close_sent is not None:
+            if self.close_received or now - self._close_sent >= CLOSE_TIMEOUT:
+                self.finished = True
+            return b''.join(out), max(0.0, self._close_sent + CLOSE_TIMEOUT - now)
+        deadlines = [self.last_received + IDLE_TIMEOUT,
+                     max(self._last_ping, self.last_received) + PING_INTERVAL]
+        if self.subscriber.pending:
+            deadlines.append(self._next_flush)
+        return b''.join(out), max(0.0, min(deadlines) - now)
+
+    def release(self):
+        self.hub.disconnect(self.subscriber)
+
+
+def serve_socket(sock: socket.socket, hub: EventHub, topics: list[str]):
+    """在阻塞 socket 上运行会话直到关闭（握手响应已发送）
+
+    当前线程负责发送，另起一个线程读取；写得慢时 sendall 阻塞，
+    期间的事件在订阅者中合并，不会在内存中堆积。
+    """
+    wake = threading.Event()
+    session = WebSocketSession(hub, wake.set, topics)
+    sock.settimeout(SEND_TIMEOUT)
+    reader = threading.Thread(target=_read_socket, args=(sock, session), name='ws-reader',
+                              daemon=True)
+    reader.start()
+    try:
+        while True:
+            wake.clear()
+            data, timeout = session.poll(time.monotonic())
+            if data:
+                sock.sendall(data)
+            if session.finished:
+                break
+            wake.wait(timeout)
+    except OSError as e:
+        logger.debug(f"WebSocket send failed: {e}")
+    finally:
+        session.finished = True
+        session.release()
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        reader.join(timeout=1)
+
+
+def _read_socket(sock: socket.socket, session: WebSocketSession):
+    while not session.finished:
+        try:
+            data = sock.recv(65536)
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+        if not data:
+            break
+        session.receive(data)
+    session.connection_lost()